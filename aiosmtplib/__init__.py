@@ -26,7 +26,8 @@ from .errors import (
     SMTPServerDisconnected,
     SMTPTimeoutError,
 )
-from .response import SMTPResponse
+from .pool import SMTPConnectionPool
+from .response import EnhancedStatusCode, SMTPResponse
 from .smtp import SMTP
 from .status import SMTPStatus
 
@@ -39,7 +40,9 @@ __copyright__ = "Copyright 2019 Cole Maclean"
 __all__ = (
     "send",
     "SMTP",
+    "SMTPConnectionPool",
     "SMTPResponse",
+    "EnhancedStatusCode",
     "SMTPStatus",
     "SMTPAuthenticationError",
     "SMTPConnectError",
@@ -1,13 +1,16 @@
 """
 Main public API.
 """
+import datetime
 import os
 import socket
 import ssl
 import sys
 from email.message import Message
-from typing import Dict, List, Optional, Sequence, Tuple, Union, overload
+from typing import Dict, List, Optional, Sequence, Tuple, Union, cast, overload
 
+from .pool import SMTPConnectionPool, default_pool
+from .resolver import Resolver
 from .response import SMTPResponse
 from .smtp import SMTP
 
@@ -48,6 +51,22 @@ async def send(
     cert_bundle: Optional[str] = ...,
     socket_path: None = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -74,6 +93,22 @@ async def send(
     cert_bundle: Optional[str] = ...,
     socket_path: None = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -100,6 +135,22 @@ async def send(
     cert_bundle: None = ...,
     socket_path: None = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -126,6 +177,22 @@ async def send(
     cert_bundle: None = ...,
     socket_path: None = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -152,6 +219,22 @@ async def send(
     cert_bundle: Optional[str] = ...,
     socket_path: None = ...,
     sock: socket.socket = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -178,6 +261,22 @@ async def send(
     cert_bundle: Optional[str] = ...,
     socket_path: None = ...,
     sock: socket.socket = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -204,6 +303,22 @@ async def send(
     cert_bundle: None = ...,
     socket_path: None = ...,
     sock: socket.socket = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -230,6 +345,22 @@ async def send(
     cert_bundle: None = ...,
     socket_path: None = ...,
     sock: socket.socket = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -256,6 +387,22 @@ async def send(
     cert_bundle: Optional[str] = ...,
     socket_path: SocketPathType = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -282,6 +429,22 @@ async def send(
     cert_bundle: Optional[str] = ...,
     socket_path: SocketPathType = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -308,6 +471,22 @@ async def send(
     cert_bundle: None = ...,
     socket_path: SocketPathType = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -334,6 +513,22 @@ async def send(
     cert_bundle: None = ...,
     socket_path: SocketPathType = ...,
     sock: None = ...,
+    chunk_size: Optional[int] = ...,
+    max_response_size: int = ...,
+    max_response_lines: int = ...,
+    deadline: Optional[Union[float, datetime.datetime]] = ...,
+    write_buffer_high_water: Optional[int] = ...,
+    write_buffer_low_water: Optional[int] = ...,
+    pool: Optional[Union[SMTPConnectionPool, bool]] = ...,
+    happy_eyeballs_delay: Optional[float] = ...,
+    resolver: Optional[Resolver] = ...,
+    tcp_nodelay: bool = ...,
+    keepalive: bool = ...,
+    keepalive_idle: Optional[int] = ...,
+    keepalive_interval: Optional[int] = ...,
+    keepalive_count: Optional[int] = ...,
+    send_buffer_size: Optional[int] = ...,
+    receive_buffer_size: Optional[int] = ...,
 ) -> Tuple[Dict[str, SMTPResponse], str]:
     ...
 
@@ -359,7 +554,8 @@ async def send(message, sender=None, recipients=None, **kwargs):  # noqa: F811
     :keyword username:  Username to login as after connect.
     :keyword password:  Password for login after connect.
     :keyword source_address: The hostname of the client. Defaults to the
-        result of :py:func:`socket.getfqdn`. Note that this call blocks.
+        result of :py:func:`socket.getfqdn`, which is looked up in an executor
+        and cached (see :class:`.fqdn.FQDNCache`).
     :keyword timeout: Default timeout value for the connection, in seconds.
         Defaults to 60.
     :keyword use_tls: If True, make the initial connection to the server
@@ -379,6 +575,52 @@ async def send(message, sender=None, recipients=None, **kwargs):  # noqa: F811
         hostname or port. Accepts str or bytes, or a pathlike object in 3.7+.
     :keyword sock: An existing, connected socket object. If given, none of
         hostname, port, or socket_path should be provided.
+    :keyword chunk_size: Maximum size of each BDAT chunk, in bytes, when
+        sending messages to servers that support CHUNKING. If None (the
+        default), messages are always sent with the DATA command.
+    :keyword max_response_size: Maximum size of a single server response,
+        in bytes. If exceeded, the connection is closed. Defaults to 64KB.
+    :keyword max_response_lines: Maximum number of lines in a single server
+        response. If exceeded, the connection is closed. Defaults to 512.
+    :keyword write_buffer_high_water: Size of the transport write buffer, in
+        bytes, at which message content writes pause until it drains below
+        ``write_buffer_low_water``. Together these limit the memory held in
+        write buffers per connection. Defaults to the asyncio defaults
+        (64KB and 16KB).
+    :keyword write_buffer_low_water: See ``write_buffer_high_water``.
+    :keyword happy_eyeballs_delay: If the hostname resolves to several
+        addresses, connection attempts to each are started this many seconds
+        apart (or as soon as the previous attempt fails), and the first to
+        connect is used (RFC 8305). If None, addresses are tried one at a time.
+        Defaults to 0.25.
+    :keyword resolver: A :class:`.resolver.Resolver` to look up the hostname
+        with, e.g. a :class:`.resolver.CachingResolver`. Defaults to the event
+        loop's ``getaddrinfo``.
+    :keyword tcp_nodelay: If True, disable Nagle's algorithm (``TCP_NODELAY``),
+        so that small commands are sent immediately rather than held back
+        waiting for delayed ACKs. Defaults to True.
+    :keyword keepalive: If True, enable TCP keepalive probes
+        (``SO_KEEPALIVE``). Defaults to False.
+    :keyword keepalive_idle: Seconds a connection is idle before keepalive
+        probes are sent (``TCP_KEEPIDLE``). Defaults to the system setting.
+    :keyword keepalive_interval: Seconds between keepalive probes
+        (``TCP_KEEPINTVL``). Defaults to the system setting.
+    :keyword keepalive_count: Number of unanswered keepalive probes after which
+        the connection is dropped (``TCP_KEEPCNT``). Defaults to the system
+        setting.
+    :keyword send_buffer_size: Size of the socket send buffer, in bytes
+        (``SO_SNDBUF``). Defaults to the system setting.
+    :keyword receive_buffer_size: Size of the socket receive buffer, in bytes
+        (``SO_RCVBUF``). Defaults to the system setting.
+    :keyword deadline: Time limit for the whole send, including connecting,
+        STARTTLS and login, either in seconds from now or as a
+        :py:class:`datetime.datetime`. Unlike ``timeout``, which applies to each
+        operation separately, all operations share the time remaining.
+    :keyword pool: A :class:`.SMTPConnectionPool` to take the connection from,
+        and return it to afterwards, instead of connecting and disconnecting.
+        If True, the default pool for the running event loop is used (see
+        :func:`.pool.default_pool`). Connections are only shared between calls
+        with the same connection options. Not compatible with sock.
 
     :raises ValueError: required arguments missing or mutually exclusive options
         provided
@@ -389,14 +631,32 @@ async def send(message, sender=None, recipients=None, **kwargs):  # noqa: F811
         if not sender:
             raise ValueError("Sender must be provided with raw messages.")
 
+    deadline = kwargs.pop("deadline", None)
+    pool = kwargs.pop("pool", None)
+    if pool is True:
+        pool = default_pool()
+
+    if isinstance(pool, SMTPConnectionPool):
+        async with pool.connection(deadline=deadline, **kwargs) as client:
+            return await _send_with_client(client, message, sender, recipients)
+
     client = SMTP(**kwargs)
 
-    async with client:
-        if isinstance(message, Message):
-            result = await client.send_message(
-                message, sender=sender, recipients=recipients
-            )
-        else:
-            result = await client.sendmail(sender, recipients, message)
+    with client._deadline_scope(deadline):
+        async with client:
+            return await _send_with_client(client, message, sender, recipients)
+
+
+async def _send_with_client(
+    client: SMTP,
+    message: Union[Message, str, bytes],
+    sender: Optional[str],
+    recipients: Optional[Union[str, Sequence[str]]],
+) -> Tuple[Dict[str, SMTPResponse], str]:
+    if isinstance(message, Message):
+        return await client.send_message(message, sender=sender, recipients=recipients)
 
-    return result
+    # Sender and recipients are required for raw messages
+    return await client.sendmail(
+        cast(str, sender), cast(Union[str, Sequence[str]], recipients), message
+    )
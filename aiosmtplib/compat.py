@@ -9,6 +9,7 @@ from typing import Optional, Union
 
 
 __all__ = (
+    "BufferedProtocol",
     "PY36_OR_LATER",
     "PY37_OR_LATER",
     "all_tasks",
@@ -21,6 +22,14 @@ PY36_OR_LATER = sys.version_info[:2] >= (3, 6)
 PY37_OR_LATER = sys.version_info[:2] >= (3, 7)
 
 
+# Mypy special cases sys.version checks
+if sys.version_info >= (3, 7):
+    BufferedProtocol = asyncio.BufferedProtocol
+else:
+    # Falls back to data_received
+    BufferedProtocol = asyncio.Protocol
+
+
 def get_running_loop() -> asyncio.AbstractEventLoop:
     if PY37_OR_LATER:
         return asyncio.get_running_loop()
@@ -2,12 +2,26 @@
 Handles client connection/disconnection.
 """
 import asyncio
+import contextlib
+import datetime
 import os
 import socket
 import ssl
 import sys
+import time
 import warnings
-from typing import Any, Optional, Type, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 from .compat import create_connection, create_unix_connection, get_running_loop
 from .default import Default, _default
@@ -18,9 +32,27 @@ from .errors import (
     SMTPServerDisconnected,
     SMTPTimeoutError,
 )
-from .protocol import SMTPProtocol
+from .fqdn import fqdn_cache
+from .happy_eyeballs import (
+    DEFAULT_HAPPY_EYEBALLS_DELAY,
+    AddressInfo,
+    SocketOption,
+    staggered_connect,
+)
+from .protocol import (
+    MAX_RESPONSE_LINES,
+    MAX_RESPONSE_SIZE,
+    SMTPProtocol,
+    command_parts,
+)
+from .resolver import Resolver, address_infos, is_ip_address
 from .response import SMTPResponse
 from .status import SMTPStatus
+from .tls import get_session_cache, get_tls_context
+
+
+if TYPE_CHECKING:
+    from .tls import TLSSessionCache  # noqa: F401
 
 
 __all__ = ("SMTPConnection",)
@@ -30,6 +62,9 @@ SMTP_PORT = 25
 SMTP_TLS_PORT = 465
 SMTP_STARTTLS_PORT = 587
 DEFAULT_TIMEOUT = 60
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# macOS calls TCP_KEEPIDLE TCP_KEEPALIVE
+TCP_KEEPIDLE = getattr(socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None))
 
 
 # Mypy special cases sys.version checks
@@ -38,6 +73,20 @@ if sys.version_info >= (3, 7):
 else:
     SocketPathType = Union[str, bytes]
 
+# Seconds from now, or an absolute time
+DeadlineType = Union[float, datetime.datetime]
+
+
+def absolute_deadline(deadline: Optional[DeadlineType]) -> Optional[datetime.datetime]:
+    """
+    Convert a deadline in seconds from now to a datetime, so that it can be
+    applied more than once.
+    """
+    if deadline is None or isinstance(deadline, datetime.datetime):
+        return deadline
+
+    return datetime.datetime.now() + datetime.timedelta(seconds=deadline)
+
 
 class SMTPConnection:
     """
@@ -67,6 +116,20 @@ class SMTPConnection:
         cert_bundle: Optional[str] = None,
         socket_path: Optional[SocketPathType] = None,
         sock: Optional[socket.socket] = None,
+        chunk_size: Optional[int] = None,
+        max_response_size: int = MAX_RESPONSE_SIZE,
+        max_response_lines: int = MAX_RESPONSE_LINES,
+        write_buffer_high_water: Optional[int] = None,
+        write_buffer_low_water: Optional[int] = None,
+        happy_eyeballs_delay: Optional[float] = DEFAULT_HAPPY_EYEBALLS_DELAY,
+        resolver: Optional[Resolver] = None,
+        tcp_nodelay: bool = True,
+        keepalive: bool = False,
+        keepalive_idle: Optional[int] = None,
+        keepalive_interval: Optional[int] = None,
+        keepalive_count: Optional[int] = None,
+        send_buffer_size: Optional[int] = None,
+        receive_buffer_size: Optional[int] = None,
     ) -> None:
         """
         :keyword hostname:  Server name (or IP) to connect to. Defaults to "localhost".
@@ -75,7 +138,8 @@ class SMTPConnection:
         :keyword username:  Username to login as after connect.
         :keyword password:  Password for login after connect.
         :keyword source_address: The hostname of the client. Defaults to the
-            result of :func:`socket.getfqdn`. Note that this call blocks.
+            result of :func:`socket.getfqdn`, which is looked up in an executor
+            and cached (see :class:`.fqdn.FQDNCache`).
         :keyword timeout: Default timeout value for the connection, in seconds.
             Defaults to 60.
         :keyword loop: event loop to run on. If no loop is passed, the running loop
@@ -99,6 +163,43 @@ class SMTPConnection:
             hostname or port. Accepts str or bytes, or a pathlike object in 3.7+.
         :keyword sock: An existing, connected socket object. If given, none of
             hostname, port, or socket_path should be provided.
+        :keyword chunk_size: Maximum size of each BDAT chunk, in bytes, when
+            sending messages to servers that support CHUNKING. If None (the
+            default), messages are always sent with the DATA command.
+        :keyword max_response_size: Maximum size of a single server response,
+            in bytes. If exceeded, the connection is closed. Defaults to 64KB.
+        :keyword max_response_lines: Maximum number of lines in a single server
+            response. If exceeded, the connection is closed. Defaults to 512.
+        :keyword write_buffer_high_water: Size of the transport write buffer, in
+            bytes, at which message content writes pause until it drains below
+            ``write_buffer_low_water``. Together these limit the memory held in
+            write buffers per connection. Defaults to the asyncio defaults
+            (64KB and 16KB).
+        :keyword write_buffer_low_water: See ``write_buffer_high_water``.
+        :keyword happy_eyeballs_delay: If the hostname resolves to several
+            addresses, connection attempts to each are started this many
+            seconds apart (or as soon as the previous attempt fails), and the
+            first to connect is used (RFC 8305). If None, addresses are tried
+            one at a time. Defaults to 0.25.
+        :keyword resolver: A :class:`.resolver.Resolver` to look up the
+            hostname with, e.g. a :class:`.resolver.CachingResolver`. Defaults
+            to the event loop's ``getaddrinfo``.
+        :keyword tcp_nodelay: If True, disable Nagle's algorithm
+            (``TCP_NODELAY``), so that small commands are sent immediately
+            rather than held back waiting for delayed ACKs. Defaults to True.
+        :keyword keepalive: If True, enable TCP keepalive probes
+            (``SO_KEEPALIVE``). Defaults to False.
+        :keyword keepalive_idle: Seconds a connection is idle before keepalive
+            probes are sent (``TCP_KEEPIDLE``). Defaults to the system setting.
+        :keyword keepalive_interval: Seconds between keepalive probes
+            (``TCP_KEEPINTVL``). Defaults to the system setting.
+        :keyword keepalive_count: Number of unanswered keepalive probes after
+            which the connection is dropped (``TCP_KEEPCNT``). Defaults to the
+            system setting.
+        :keyword send_buffer_size: Size of the socket send buffer, in bytes
+            (``SO_SNDBUF``). Defaults to the system setting.
+        :keyword receive_buffer_size: Size of the socket receive buffer, in
+            bytes (``SO_RCVBUF``). Defaults to the system setting.
 
         :raises ValueError: mutually exclusive options provided
         """
@@ -121,6 +222,20 @@ class SMTPConnection:
         self.cert_bundle = cert_bundle
         self.socket_path = socket_path
         self.sock = sock
+        self.chunk_size = chunk_size
+        self.max_response_size = max_response_size
+        self.max_response_lines = max_response_lines
+        self.write_buffer_high_water = write_buffer_high_water
+        self.write_buffer_low_water = write_buffer_low_water
+        self.happy_eyeballs_delay = happy_eyeballs_delay
+        self.resolver = resolver
+        self.tcp_nodelay = tcp_nodelay
+        self.keepalive = keepalive
+        self.keepalive_idle = keepalive_idle
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count = keepalive_count
+        self.send_buffer_size = send_buffer_size
+        self.receive_buffer_size = receive_buffer_size
 
         if loop:
             warnings.warn(
@@ -131,6 +246,9 @@ class SMTPConnection:
             )
         self.loop = loop
         self._connect_lock = None  # type: Optional[asyncio.Lock]
+        self._deadline = None  # type: Optional[float]
+        self._tls_session_cache = None  # type: Optional[TLSSessionCache]
+        self._tls_server_hostname = None  # type: Optional[str]
 
         self._validate_config()
 
@@ -159,16 +277,85 @@ class SMTPConnection:
         """
         return bool(self.protocol is not None and self.protocol.is_connected)
 
+    @property
+    def tls_session_reused(self) -> Optional[bool]:
+        """
+        Check if the TLS session was resumed from a previous connection
+        (an abbreviated handshake). None if the connection isn't using TLS.
+        """
+        if self.transport is None:
+            return None
+
+        ssl_object = self.transport.get_extra_info("ssl_object")
+        if ssl_object is None:
+            return None
+
+        return bool(ssl_object.session_reused)
+
     @property
     def source_address(self) -> str:
         """
         Get the system hostname to be sent to the SMTP server.
-        Simply caches the result of :func:`socket.getfqdn`.
+        Defaults to the cached result of :func:`socket.getfqdn`. Note that if
+        it hasn't been looked up yet (which happens on connect), this blocks.
+        """
+        if self._source_address is not None:
+            return self._source_address
+
+        if fqdn_cache.value is None:
+            fqdn_cache.set(socket.getfqdn())
+
+        return cast(str, fqdn_cache.value)
+
+    async def _get_source_address(self) -> str:
+        """
+        Get the system hostname to be sent to the SMTP server, without blocking.
+        """
+        if self._source_address is not None:
+            return self._source_address
+
+        return await fqdn_cache.get()
+
+    @contextlib.contextmanager
+    def _deadline_scope(self, deadline: Optional[DeadlineType]) -> Iterator[None]:
+        """
+        Limit all network operations to the deadline given (seconds from now, or
+        a :py:class:`datetime.datetime`) until exit, on top of any timeout. If a
+        deadline is already set, the earlier of the two applies.
+        """
+        previous_deadline = self._deadline
+        if deadline is not None:
+            if isinstance(deadline, datetime.datetime):
+                remaining = deadline.timestamp() - time.time()
+            else:
+                remaining = deadline
+            loop = self.loop if self.loop is not None else get_running_loop()
+            loop_deadline = loop.time() + remaining
+            if previous_deadline is None or loop_deadline < previous_deadline:
+                self._set_deadline(loop_deadline)
+
+        try:
+            yield
+        finally:
+            self._set_deadline(previous_deadline)
+
+    def _set_deadline(self, deadline: Optional[float]) -> None:
+        self._deadline = deadline
+        if self.protocol is not None:
+            self.protocol.deadline = deadline
+
+    def _get_timeout(self) -> Optional[float]:
+        """
+        Get the timeout for connecting, limited by any deadline set.
         """
-        if self._source_address is None:
-            self._source_address = socket.getfqdn()
+        if self._deadline is None or self.loop is None:
+            return self.timeout
 
-        return self._source_address
+        remaining = max(self._deadline - self.loop.time(), 0.0)
+        if self.timeout is None or remaining < self.timeout:
+            return remaining
+
+        return self.timeout
 
     def _update_settings_from_kwargs(
         self,
@@ -188,6 +375,20 @@ class SMTPConnection:
         cert_bundle: Optional[Union[str, Default]] = _default,
         socket_path: Optional[Union[SocketPathType, Default]] = _default,
         sock: Optional[Union[socket.socket, Default]] = _default,
+        chunk_size: Optional[Union[int, Default]] = _default,
+        max_response_size: Optional[int] = None,
+        max_response_lines: Optional[int] = None,
+        write_buffer_high_water: Optional[Union[int, Default]] = _default,
+        write_buffer_low_water: Optional[Union[int, Default]] = _default,
+        happy_eyeballs_delay: Optional[Union[float, Default]] = _default,
+        resolver: Optional[Union[Resolver, Default]] = _default,
+        tcp_nodelay: Optional[bool] = None,
+        keepalive: Optional[bool] = None,
+        keepalive_idle: Optional[Union[int, Default]] = _default,
+        keepalive_interval: Optional[Union[int, Default]] = _default,
+        keepalive_count: Optional[Union[int, Default]] = _default,
+        send_buffer_size: Optional[Union[int, Default]] = _default,
+        receive_buffer_size: Optional[Union[int, Default]] = _default,
     ) -> None:
         """Update our configuration from the kwargs provided.
 
@@ -233,6 +434,34 @@ class SMTPConnection:
             self.socket_path = socket_path
         if sock is not _default:
             self.sock = sock
+        if chunk_size is not _default:
+            self.chunk_size = chunk_size
+        if max_response_size is not None:
+            self.max_response_size = max_response_size
+        if max_response_lines is not None:
+            self.max_response_lines = max_response_lines
+        if write_buffer_high_water is not _default:
+            self.write_buffer_high_water = write_buffer_high_water
+        if write_buffer_low_water is not _default:
+            self.write_buffer_low_water = write_buffer_low_water
+        if happy_eyeballs_delay is not _default:
+            self.happy_eyeballs_delay = happy_eyeballs_delay
+        if resolver is not _default:
+            self.resolver = resolver
+        if tcp_nodelay is not None:
+            self.tcp_nodelay = tcp_nodelay
+        if keepalive is not None:
+            self.keepalive = keepalive
+        if keepalive_idle is not _default:
+            self.keepalive_idle = keepalive_idle
+        if keepalive_interval is not _default:
+            self.keepalive_interval = keepalive_interval
+        if keepalive_count is not _default:
+            self.keepalive_count = keepalive_count
+        if send_buffer_size is not _default:
+            self.send_buffer_size = send_buffer_size
+        if receive_buffer_size is not _default:
+            self.receive_buffer_size = receive_buffer_size
 
     def _validate_config(self) -> None:
         if self._start_tls_on_connect and self.use_tls:
@@ -253,6 +482,57 @@ class SMTPConnection:
                 "The socket_path option is not compatible with hostname/port"
             )
 
+        if self.happy_eyeballs_delay is not None and self.happy_eyeballs_delay < 0:
+            raise ValueError("The happy_eyeballs_delay option must not be negative")
+
+        keepalive_options = (
+            self.keepalive_idle,
+            self.keepalive_interval,
+            self.keepalive_count,
+        )
+        if any(option is not None for option in keepalive_options):
+            if not self.keepalive:
+                raise ValueError(
+                    "The keepalive_idle, keepalive_interval and keepalive_count "
+                    "options require keepalive"
+                )
+            if any(option is not None and option < 1 for option in keepalive_options):
+                raise ValueError(
+                    "The keepalive_idle, keepalive_interval and keepalive_count "
+                    "options must be positive integers"
+                )
+
+        buffer_sizes = (self.send_buffer_size, self.receive_buffer_size)
+        if any(size is not None and size < 1 for size in buffer_sizes):
+            raise ValueError(
+                "The send_buffer_size and receive_buffer_size options must be "
+                "positive integers"
+            )
+
+        if self.chunk_size is not None and self.chunk_size < 1:
+            raise ValueError("The chunk_size option must be a positive integer")
+
+        if self.max_response_size < 1 or self.max_response_lines < 1:
+            raise ValueError(
+                "The max_response_size and max_response_lines options must be "
+                "positive integers"
+            )
+
+        high_water = self.write_buffer_high_water
+        low_water = self.write_buffer_low_water
+        if (high_water is not None and high_water < 0) or (
+            low_water is not None and low_water < 0
+        ):
+            raise ValueError(
+                "The write_buffer_high_water and write_buffer_low_water options "
+                "must not be negative"
+            )
+        if high_water is not None and low_water is not None and low_water > high_water:
+            raise ValueError(
+                "The write_buffer_low_water option must not be greater than "
+                "write_buffer_high_water"
+            )
+
     async def connect(self, **kwargs) -> SMTPResponse:
         """
         Initialize a connection to the server. Options provided to
@@ -263,7 +543,8 @@ class SMTPConnection:
         :keyword port: Server port. Defaults ``465`` if ``use_tls`` is ``True``,
             ``587`` if ``start_tls`` is ``True``, or ``25`` otherwise.
         :keyword source_address: The hostname of the client. Defaults to the
-            result of :func:`socket.getfqdn`. Note that this call blocks.
+            result of :func:`socket.getfqdn`, which is looked up in an executor
+            and cached (see :class:`.fqdn.FQDNCache`).
         :keyword timeout: Default timeout value for the connection, in seconds.
             Defaults to 60.
         :keyword loop: event loop to run on. If no loop is passed, the running loop
@@ -285,6 +566,43 @@ class SMTPConnection:
             hostname or port. Accepts str or bytes, or a pathlike object in 3.7+.
         :keyword sock: An existing, connected socket object. If given, none of
             hostname, port, or socket_path should be provided.
+        :keyword chunk_size: Maximum size of each BDAT chunk, in bytes, when
+            sending messages to servers that support CHUNKING. If None (the
+            default), messages are always sent with the DATA command.
+        :keyword max_response_size: Maximum size of a single server response,
+            in bytes. If exceeded, the connection is closed. Defaults to 64KB.
+        :keyword max_response_lines: Maximum number of lines in a single server
+            response. If exceeded, the connection is closed. Defaults to 512.
+        :keyword write_buffer_high_water: Size of the transport write buffer, in
+            bytes, at which message content writes pause until it drains below
+            ``write_buffer_low_water``. Together these limit the memory held in
+            write buffers per connection. Defaults to the asyncio defaults
+            (64KB and 16KB).
+        :keyword write_buffer_low_water: See ``write_buffer_high_water``.
+        :keyword happy_eyeballs_delay: If the hostname resolves to several
+            addresses, connection attempts to each are started this many
+            seconds apart (or as soon as the previous attempt fails), and the
+            first to connect is used (RFC 8305). If None, addresses are tried
+            one at a time. Defaults to 0.25.
+        :keyword resolver: A :class:`.resolver.Resolver` to look up the
+            hostname with, e.g. a :class:`.resolver.CachingResolver`. Defaults
+            to the event loop's ``getaddrinfo``.
+        :keyword tcp_nodelay: If True, disable Nagle's algorithm
+            (``TCP_NODELAY``), so that small commands are sent immediately
+            rather than held back waiting for delayed ACKs. Defaults to True.
+        :keyword keepalive: If True, enable TCP keepalive probes
+            (``SO_KEEPALIVE``). Defaults to False.
+        :keyword keepalive_idle: Seconds a connection is idle before keepalive
+            probes are sent (``TCP_KEEPIDLE``). Defaults to the system setting.
+        :keyword keepalive_interval: Seconds between keepalive probes
+            (``TCP_KEEPINTVL``). Defaults to the system setting.
+        :keyword keepalive_count: Number of unanswered keepalive probes after
+            which the connection is dropped (``TCP_KEEPCNT``). Defaults to the
+            system setting.
+        :keyword send_buffer_size: Size of the socket send buffer, in bytes
+            (``SO_SNDBUF``). Defaults to the system setting.
+        :keyword receive_buffer_size: Size of the socket receive buffer, in
+            bytes (``SO_RCVBUF``). Defaults to the system setting.
 
         :raises ValueError: mutually exclusive options provided
         """
@@ -297,6 +615,10 @@ class SMTPConnection:
             self._connect_lock = asyncio.Lock()
         await self._connect_lock.acquire()
 
+        # Look up our hostname for EHLO while connecting
+        if self._source_address is None and fqdn_cache.is_stale:
+            fqdn_cache.refresh()
+
         # Set default port last in case use_tls or start_tls is provided,
         # and only if we're not using a socket.
         if self.port is None and self.sock is None and self.socket_path is None:
@@ -327,14 +649,26 @@ class SMTPConnection:
             raise RuntimeError("No event loop set")
 
         protocol = SMTPProtocol(
-            loop=self.loop, connection_lost_callback=self._connection_lost
+            loop=self.loop,
+            connection_lost_callback=self._connection_lost,
+            max_response_size=self.max_response_size,
+            max_response_lines=self.max_response_lines,
         )
+        protocol.deadline = self._deadline
+
+        timeout = self._get_timeout()
+        if timeout is not None and timeout <= 0:
+            raise SMTPConnectTimeoutError(
+                "Timed out connecting to {host} on port {port}".format(
+                    host=self.hostname, port=self.port
+                )
+            )
 
         tls_context = None  # type: Optional[ssl.SSLContext]
         ssl_handshake_timeout = None  # type: Optional[float]
         if self.use_tls:
             tls_context = self._get_tls_context()
-            ssl_handshake_timeout = self.timeout
+            ssl_handshake_timeout = timeout
 
         if self.sock:
             connect_coro = create_connection(
@@ -352,6 +686,14 @@ class SMTPConnection:
                 ssl=tls_context,
                 ssl_handshake_timeout=ssl_handshake_timeout,
             )
+        elif (
+            self.happy_eyeballs_delay is not None
+            or self.resolver is not None
+            or self._connect_socket_options()
+        ):
+            connect_coro = self._create_staggered_connection(
+                protocol, tls_context, ssl_handshake_timeout
+            )
         else:
             connect_coro = create_connection(
                 self.loop,
@@ -363,7 +705,7 @@ class SMTPConnection:
             )
 
         try:
-            transport, _ = await asyncio.wait_for(connect_coro, timeout=self.timeout)
+            transport, _ = await asyncio.wait_for(connect_coro, timeout=timeout)
         except OSError as exc:
             raise SMTPConnectError(
                 "Error connecting to {host} on port {port}: {err}".format(
@@ -377,8 +719,21 @@ class SMTPConnection:
                 )
             ) from exc
 
+        try:
+            self._set_socket_options(transport)
+        except OSError as exc:
+            transport.close()
+            raise SMTPConnectError(
+                "Error configuring socket for {host} on port {port}: {err}".format(
+                    host=self.hostname, port=self.port, err=exc
+                )
+            ) from exc
+
         self.protocol = protocol
         self.transport = transport
+        self._set_write_buffer_limits()
+        if tls_context is not None:
+            self._record_tls_handshake(tls_context, self.hostname)
 
         try:
             response = await protocol.read_response(timeout=self.timeout)
@@ -398,6 +753,154 @@ class SMTPConnection:
 
         return response
 
+    async def _create_staggered_connection(
+        self,
+        protocol: SMTPProtocol,
+        tls_context: Optional[ssl.SSLContext],
+        ssl_handshake_timeout: Optional[float],
+    ) -> Tuple[asyncio.BaseTransport, asyncio.BaseProtocol]:
+        """
+        Connect to whichever of the hostname's addresses accepts first, with
+        staggered attempts to each (RFC 8305).
+        """
+        if self.loop is None:
+            raise RuntimeError("No event loop set")
+
+        infos = await self._resolve()
+        sock = await staggered_connect(
+            self.loop, infos, self.happy_eyeballs_delay, self._connect_socket_options()
+        )
+        try:
+            return await create_connection(
+                self.loop,
+                lambda: protocol,
+                sock=sock,
+                ssl=tls_context,
+                server_hostname=self.hostname if tls_context is not None else None,
+                ssl_handshake_timeout=ssl_handshake_timeout,
+            )
+        except BaseException:
+            sock.close()
+            raise
+
+    async def _resolve(self) -> List[AddressInfo]:
+        """
+        Look up the addresses to connect to.
+        """
+        hostname = cast(str, self.hostname)
+        port = cast(int, self.port)
+        if self.resolver is None:
+            loop = cast(asyncio.AbstractEventLoop, self.loop)
+            infos = await loop.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+            return cast(List[AddressInfo], infos)
+
+        if is_ip_address(hostname):
+            return address_infos([hostname], port)
+
+        resolution = await self.resolver.resolve(hostname)
+
+        return address_infos(resolution.addresses, port)
+
+    def _connect_socket_options(self) -> List[SocketOption]:
+        """
+        Socket options that must be set before connecting. The receive buffer
+        size determines the TCP window scale, which is agreed during the
+        handshake, so setting it afterwards has little effect.
+        """
+        options = []  # type: List[SocketOption]
+        if self.send_buffer_size is not None:
+            options.append((socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer_size))
+        if self.receive_buffer_size is not None:
+            options.append(
+                (socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer_size)
+            )
+
+        return options
+
+    def _set_socket_options(self, transport: asyncio.BaseTransport) -> None:
+        """
+        Apply the socket tuning options that can be changed after connecting
+        to the transport's socket. Buffer sizes are set before connecting to
+        a hostname, and only set here for Unix sockets and existing sockets,
+        which we don't connect ourselves. TCP options are skipped for Unix
+        sockets, as are any keepalive options the platform doesn't support.
+        """
+        sock = transport.get_extra_info("socket")
+        if sock is None:
+            return
+
+        if self.sock is not None or self.socket_path is not None:
+            for socket_option in self._connect_socket_options():
+                sock.setsockopt(*socket_option)
+
+        if sock.family not in (socket.AF_INET, socket.AF_INET6):
+            return
+
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self.tcp_nodelay))
+
+        if not self.keepalive:
+            return
+
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        keepalive_options = (
+            (TCP_KEEPIDLE, self.keepalive_idle),
+            (getattr(socket, "TCP_KEEPINTVL", None), self.keepalive_interval),
+            (getattr(socket, "TCP_KEEPCNT", None), self.keepalive_count),
+        )
+        for option, value in keepalive_options:
+            if option is not None and value is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, option, value)
+
+    def _set_write_buffer_limits(self) -> None:
+        """
+        Apply the write buffer options to the current transport, if set.
+        """
+        if self.transport is None or (
+            self.write_buffer_high_water is None and self.write_buffer_low_water is None
+        ):
+            return
+
+        transport = cast(asyncio.WriteTransport, self.transport)
+        transport.set_write_buffer_limits(
+            high=self.write_buffer_high_water, low=self.write_buffer_low_water
+        )
+
+    def _record_tls_handshake(
+        self, tls_context: ssl.SSLContext, server_hostname: Optional[str]
+    ) -> None:
+        """
+        Count the handshake just completed towards session resumption stats,
+        and keep the session to offer on the next connection.
+        """
+        session_cache = get_session_cache(tls_context)
+        if session_cache is None or server_hostname is None or self.transport is None:
+            return
+
+        ssl_object = self.transport.get_extra_info("ssl_object")
+        if ssl_object is None:
+            return
+
+        session_cache.record_handshake(server_hostname, ssl_object)
+        self._tls_session_cache = session_cache
+        self._tls_server_hostname = server_hostname
+
+    def _store_tls_session(self) -> None:
+        """
+        Keep the latest TLS session before disconnecting; with TLS 1.3, the
+        session ticket is sent after the handshake.
+        """
+        if (
+            self._tls_session_cache is not None
+            and self._tls_server_hostname is not None
+            and self.transport is not None
+        ):
+            ssl_object = self.transport.get_extra_info("ssl_object")
+            if ssl_object is not None:
+                self._tls_session_cache.store(self._tls_server_hostname, ssl_object)
+
+        self._tls_session_cache = None
+        self._tls_server_hostname = None
+
     def _connection_lost(self, waiter: asyncio.Future) -> None:
         if waiter.cancelled() or waiter.exception() is not None:
             self.close()
@@ -411,13 +914,24 @@ class SMTPConnection:
 
         :raises SMTPServerDisconnected: connection lost
         """
+        return await self._execute_command_parts(command_parts(*args), timeout=timeout)
+
+    async def _execute_command_parts(
+        self,
+        parts: Sequence[bytes],
+        timeout: Optional[Union[float, Default]] = _default,
+    ) -> SMTPResponse:
+        """
+        As for :meth:`execute_command`, but with the command already split into
+        parts (see :func:`.protocol.command_parts`).
+        """
         if self.protocol is None:
             raise SMTPServerDisconnected("Server not connected")
 
         if timeout is _default:
             timeout = self.timeout
 
-        response = await self.protocol.execute_command(*args, timeout=timeout)
+        response = await self.protocol.execute_command_parts(parts, timeout=timeout)
 
         # If the server is unavailable, be nice and close the connection
         if response.code == SMTPStatus.domain_unavailable:
@@ -452,31 +966,25 @@ class SMTPConnection:
 
     def _get_tls_context(self) -> ssl.SSLContext:
         """
-        Build an SSLContext object from the options we've been given.
+        Get an SSLContext object for the options we've been given. Contexts
+        built from options are cached, and shared between connections.
         """
         if self.tls_context is not None:
-            context = self.tls_context
-        else:
-            # SERVER_AUTH is what we want for a client side socket
-            context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
-            context.check_hostname = bool(self.validate_certs)
-            if self.validate_certs:
-                context.verify_mode = ssl.CERT_REQUIRED
-            else:
-                context.verify_mode = ssl.CERT_NONE
+            return self.tls_context
 
-            if self.cert_bundle is not None:
-                context.load_verify_locations(cafile=self.cert_bundle)
-
-            if self.client_cert is not None:
-                context.load_cert_chain(self.client_cert, keyfile=self.client_key)
-
-        return context
+        return get_tls_context(
+            self.validate_certs,
+            cert_bundle=self.cert_bundle,
+            client_cert=self.client_cert,
+            client_key=self.client_key,
+        )
 
     def close(self) -> None:
         """
         Closes the connection.
         """
+        self._store_tls_session()
+
         if self.transport is not None and not self.transport.is_closing():
             self.transport.close()
 
@@ -71,26 +71,75 @@ def formataddr(pair: Tuple[str, str]) -> str:
     return address
 
 
+class BinaryBytesGenerator(email.generator.BytesGenerator):
+    """
+    Generator that writes non-text, base64 encoded parts as raw binary data
+    (for use with BINARYMIME, RFC 3030).
+    """
+
+    def _write(self, msg: email.message.Message) -> None:
+        if (
+            not msg.is_multipart()
+            and msg.get_content_maintype() != "text"
+            and msg.get("Content-Transfer-Encoding", "").lower() == "base64"
+        ):
+            payload = msg.get_payload(decode=True)
+            # Shallow copy, but deleting a header replaces the header list
+            msg = copy.copy(msg)
+            del msg["Content-Transfer-Encoding"]
+            msg["Content-Transfer-Encoding"] = "binary"
+            msg.set_payload(payload)
+
+        super()._write(msg)  # type: ignore
+
+    def _dispatch(self, msg: email.message.Message) -> None:
+        if (
+            not msg.is_multipart()
+            and msg.get("Content-Transfer-Encoding", "").lower() == "binary"
+        ):
+            payload = msg.get_payload(decode=True)
+            if payload is not None:
+                self._fp.write(payload)  # type: ignore
+            return
+
+        super()._dispatch(msg)  # type: ignore
+
+
 def flatten_message(
     message: email.message.Message, utf8: bool = False, cte_type: str = "8bit"
 ) -> bytes:
+    """
+    Serialize a message to bytes, suitable for sending over SMTP.
+
+    ``cte_type`` may be "7bit", "8bit", or "binary". If "binary", non-text
+    parts are written without base64 encoding; the result must be sent with
+    ``BODY=BINARYMIME``, and line endings must not be altered.
+    """
     # Make a local copy so we can delete the bcc headers.
     message_copy = copy.copy(message)
     del message_copy["Bcc"]
     del message_copy["Resent-Bcc"]
 
+    # The policy only knows about 7bit and 8bit; binary is handled by the generator
+    policy_cte_type = "8bit" if cte_type == "binary" else cte_type
+
     if isinstance(message.policy, email.policy.Compat32):  # type: ignore
         # Compat32 cannot use UTF8
         policy = message.policy.clone(  # type: ignore
-            linesep=LINE_SEP, cte_type=cte_type
+            linesep=LINE_SEP, cte_type=policy_cte_type
         )
     else:
         policy = message.policy.clone(  # type: ignore
-            linesep=LINE_SEP, utf8=utf8, cte_type=cte_type
+            linesep=LINE_SEP, utf8=utf8, cte_type=policy_cte_type
         )
 
     with io.BytesIO() as messageio:
-        generator = email.generator.BytesGenerator(messageio, policy=policy)
+        if cte_type == "binary":
+            generator = BinaryBytesGenerator(
+                messageio, policy=policy
+            )  # type: email.generator.BytesGenerator
+        else:
+            generator = email.generator.BytesGenerator(messageio, policy=policy)
         generator.flatten(message_copy)
         flat_message = messageio.getvalue()
 
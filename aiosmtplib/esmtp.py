@@ -1,11 +1,12 @@
 """
 Low level ESMTP command API.
 """
+import functools
 import re
 import ssl
-from typing import Dict, Iterable, List, Optional, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union, cast
 
-from .connection import SMTPConnection
+from .connection import DEFAULT_CHUNK_SIZE, SMTPConnection
 from .default import Default, _default
 from .email import parse_address, quote_address
 from .errors import (
@@ -17,8 +18,10 @@ from .errors import (
     SMTPSenderRefused,
     SMTPServerDisconnected,
 )
+from .protocol import CRLF, SPACE
 from .response import SMTPResponse
 from .status import SMTPStatus
+from .streams import MessageContent, MessageStream, message_chunks, open_message_file
 
 
 __all__ = ("ESMTP",)
@@ -26,6 +29,22 @@ __all__ = ("ESMTP",)
 
 OLDSTYLE_AUTH_REGEX = re.compile(r"auth=(?P<auth>.*)", flags=re.I)
 EXTENSIONS_REGEX = re.compile(r"(?P<ext>[A-Za-z0-9][A-Za-z0-9\-]*) ?")
+MAIL_FROM = b"MAIL FROM:"
+RCPT_TO = b"RCPT TO:"
+
+
+@functools.lru_cache(maxsize=128)
+def option_parts(options: Tuple[str, ...]) -> Tuple[bytes, ...]:
+    """
+    Encode MAIL/RCPT options as command parts, each preceded by a space.
+    The same options are usually sent with every RCPT, so results are cached.
+    """
+    parts = []  # type: List[bytes]
+    for option in options:
+        parts.append(SPACE)
+        parts.append(option.encode("ascii"))
+
+    return tuple(parts)
 
 
 class ESMTP(SMTPConnection):
@@ -85,7 +104,7 @@ class ESMTP(SMTPConnection):
         :raises SMTPHeloError: on unexpected server response code
         """
         if hostname is None:
-            hostname = self.source_address
+            hostname = await self._get_source_address()
         response = await self.execute_command(
             b"HELO", hostname.encode("ascii"), timeout=timeout
         )
@@ -261,10 +280,10 @@ class ESMTP(SMTPConnection):
 
         quoted_sender = quote_address(sender)
         addr_bytes = quoted_sender.encode(encoding)
-        options_bytes = [option.encode("ascii") for option in options]
 
-        response = await self.execute_command(
-            b"MAIL", b"FROM:" + addr_bytes, *options_bytes, timeout=timeout
+        response = await self._execute_command_parts(
+            [MAIL_FROM, addr_bytes, *option_parts(tuple(options)), CRLF],
+            timeout=timeout,
         )
 
         if response.code != SMTPStatus.completed:
@@ -293,10 +312,9 @@ class ESMTP(SMTPConnection):
 
         quoted_recipient = quote_address(recipient)
         addr_bytes = quoted_recipient.encode(encoding)
-        options_bytes = [option.encode("ascii") for option in options]
 
-        response = await self.execute_command(
-            b"RCPT", b"TO:" + addr_bytes, *options_bytes, timeout=timeout
+        response = await self._execute_command_parts(
+            [RCPT_TO, addr_bytes, *option_parts(tuple(options)), CRLF], timeout=timeout,
         )
 
         if response.code not in (SMTPStatus.completed, SMTPStatus.will_forward):
@@ -306,16 +324,30 @@ class ESMTP(SMTPConnection):
 
     async def data(
         self,
-        message: Union[str, bytes],
+        message: MessageContent,
         timeout: Optional[Union[float, Default]] = _default,
+        prenormalized: bool = False,
     ) -> SMTPResponse:
         """
         Send an SMTP DATA command, followed by the message given.
         This method transfers the actual email content to the server.
 
+        The message may be a string, bytes, a file object, an async iterable of
+        string or bytes chunks, or a path to a file. Anything other than a string
+        or bytes is streamed to the server one chunk at a time.
+
+        If ``prenormalized`` is True, the message line endings are assumed to
+        be \\\\r\\\\n already, and are not checked or converted.
+
         :raises SMTPDataError: on unexpected server response code
         :raises SMTPServerDisconnected: connection lost
         """
+        if hasattr(message, "__fspath__"):
+            with await open_message_file(message) as message_file:
+                return await self.data(
+                    message_file, timeout=timeout, prenormalized=prenormalized
+                )
+
         await self._ehlo_or_helo_if_needed()
 
         # As data accesses protocol directly, some handling is required
@@ -327,11 +359,69 @@ class ESMTP(SMTPConnection):
 
         if isinstance(message, str):
             message = message.encode("ascii")
+        elif not isinstance(message, bytes):
+            # Paths are opened above
+            message = message_chunks(cast(MessageStream, message))
 
-        return await self.protocol.execute_data_command(message, timeout=timeout)
+        return await self.protocol.execute_data_command(
+            message, timeout=timeout, prenormalized=prenormalized
+        )
 
     # ESMTP commands #
 
+    async def bdat(
+        self,
+        message: MessageContent,
+        chunk_size: Optional[int] = None,
+        timeout: Optional[Union[float, Default]] = _default,
+    ) -> SMTPResponse:
+        """
+        Send the message given using SMTP BDAT commands (RFC 3030), as an
+        alternative to DATA. The message is split into chunks of at most
+        ``chunk_size`` bytes, which defaults to the ``chunk_size`` option (or
+        1MB, if that isn't set).
+
+        The message may be given in any of the forms accepted by :meth:`.data`.
+        Message content is sent as is; line endings are not converted, and lines
+        beginning with a period are not quoted.
+
+        :raises SMTPNotSupported: server does not support CHUNKING
+        :raises SMTPDataError: on unexpected server response code
+        :raises SMTPServerDisconnected: connection lost
+        """
+        if hasattr(message, "__fspath__"):
+            with await open_message_file(message) as message_file:
+                return await self.bdat(
+                    message_file, chunk_size=chunk_size, timeout=timeout
+                )
+
+        await self._ehlo_or_helo_if_needed()
+
+        if not self.supports_extension("chunking"):
+            raise SMTPNotSupported("CHUNKING is not supported by this server")
+
+        # As bdat accesses protocol directly, some handling is required
+        if self.protocol is None:
+            raise SMTPServerDisconnected("Connection lost")
+
+        if timeout is _default:
+            timeout = self.timeout
+
+        if chunk_size is None:
+            chunk_size = self.chunk_size or DEFAULT_CHUNK_SIZE
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        if isinstance(message, str):
+            message = message.encode("ascii")
+        elif not isinstance(message, bytes):
+            # Paths are opened above
+            message = message_chunks(cast(MessageStream, message))
+
+        return await self.protocol.execute_bdat_command(
+            message, chunk_size, timeout=timeout
+        )
+
     async def ehlo(
         self,
         hostname: Optional[str] = None,
@@ -345,7 +435,7 @@ class ESMTP(SMTPConnection):
         :raises SMTPHeloError: on unexpected server response code
         """
         if hostname is None:
-            hostname = self.source_address
+            hostname = await self._get_source_address()
 
         response = await self.execute_command(
             b"EHLO", hostname.encode("ascii"), timeout=timeout
@@ -446,6 +536,8 @@ class ESMTP(SMTPConnection):
             raise SMTPServerDisconnected("Connection lost")
         # Update our transport reference
         self.transport = self.protocol.transport
+        self._set_write_buffer_limits()
+        self._record_tls_handshake(tls_context, server_hostname)
 
         # RFC 3207 part 4.2:
         # The client MUST discard any knowledge obtained from the server, such
@@ -0,0 +1,100 @@
+"""
+Lookup of the local host's fully qualified domain name (used by default for
+EHLO and HELO), without blocking the event loop.
+"""
+import asyncio
+import socket
+import time
+from typing import TYPE_CHECKING, cast
+
+from .compat import get_running_loop
+
+
+if TYPE_CHECKING:
+    from typing import Optional  # noqa: F401
+
+
+__all__ = ("FQDNCache", "fqdn_cache")
+
+
+FQDN_REFRESH_INTERVAL = 3600.0
+
+
+class FQDNCache:
+    """
+    Caches the result of :py:func:`socket.getfqdn`, which can block for
+    seconds if reverse DNS is slow. Lookups run in the default executor, and
+    once a value is known, it is refreshed in the background every
+    ``refresh_interval`` seconds.
+
+    To look up the FQDN at startup, rather than on the first connection:
+
+        >>> fqdn_cache.refresh()
+
+    """
+
+    def __init__(self, refresh_interval: float = FQDN_REFRESH_INTERVAL) -> None:
+        self.refresh_interval = refresh_interval
+        self.value = None  # type: Optional[str]
+        self._updated_at = None  # type: Optional[float]
+        self._lookup = None  # type: Optional[asyncio.Future]
+        self._lookup_loop = None  # type: Optional[asyncio.AbstractEventLoop]
+
+    @property
+    def is_stale(self) -> bool:
+        """
+        Check if the FQDN is unknown or due to be refreshed.
+        """
+        return (
+            self._updated_at is None
+            or time.monotonic() - self._updated_at >= self.refresh_interval
+        )
+
+    def set(self, value: str) -> None:
+        self.value = value
+        self._updated_at = time.monotonic()
+
+    def clear(self) -> None:
+        self.value = None
+        self._updated_at = None
+
+    def refresh(self) -> "asyncio.Future[str]":
+        """
+        Start looking up the FQDN in the default executor of the running loop,
+        unless a lookup is already in progress. Returns a future for the
+        result.
+        """
+        loop = get_running_loop()
+        if self._lookup is None or self._lookup_loop is not loop:
+            lookup = loop.run_in_executor(None, socket.getfqdn)
+            lookup.add_done_callback(self._lookup_done)
+            self._lookup = lookup
+            self._lookup_loop = loop
+
+        return self._lookup
+
+    def _lookup_done(self, lookup: asyncio.Future) -> None:
+        if lookup is self._lookup:
+            self._lookup = None
+            self._lookup_loop = None
+
+        # On error, keep any previous value
+        if not lookup.cancelled() and lookup.exception() is None:
+            self.set(lookup.result())
+
+    async def get(self) -> str:
+        """
+        Get the FQDN. Only the first lookup is waited for; after that, the
+        cached value is returned while any refresh runs in the background.
+        """
+        value = self.value
+        if self.is_stale:
+            lookup = self.refresh()
+            if value is None:
+                # Don't cancel a lookup other connections might be waiting on
+                value = await asyncio.shield(lookup)
+
+        return cast(str, value)
+
+
+fqdn_cache = FQDNCache()
@@ -0,0 +1,122 @@
+"""
+Happy Eyeballs (RFC 8305) connection racing. Connection attempts to each
+address of a host are started in turn, a short delay apart (or as soon as the
+previous attempt fails), and the first socket to connect is used.
+"""
+import asyncio
+import collections
+import itertools
+import socket
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple, cast
+
+
+if TYPE_CHECKING:
+    from typing import Deque, Dict, Set  # noqa: F401
+
+
+__all__ = ("interleave_addresses", "staggered_connect")
+
+
+DEFAULT_HAPPY_EYEBALLS_DELAY = 0.25
+
+# As returned by getaddrinfo: (family, type, proto, canonname, sockaddr)
+AddressInfo = Tuple[int, int, int, str, Tuple[Any, ...]]
+# Arguments to socket.setsockopt: (level, option, value)
+SocketOption = Tuple[int, int, int]
+
+
+def interleave_addresses(infos: Sequence[AddressInfo]) -> List[AddressInfo]:
+    """
+    Reorder addresses to alternate between address families, starting with
+    the family of the first address (RFC 8305 section 4).
+    """
+    by_family = collections.OrderedDict()  # type: Dict[int, Deque[AddressInfo]]
+    for info in infos:
+        by_family.setdefault(info[0], collections.deque()).append(info)
+
+    interleaved = []  # type: List[AddressInfo]
+    for round_infos in itertools.zip_longest(*by_family.values()):
+        interleaved.extend(info for info in round_infos if info is not None)
+
+    return interleaved
+
+
+async def connect_socket(
+    loop: asyncio.AbstractEventLoop,
+    info: AddressInfo,
+    socket_options: Sequence[SocketOption] = (),
+) -> socket.socket:
+    """
+    Create a non-blocking socket, and connect it to the address given.
+    ``socket_options`` are set before connecting, so that options negotiated
+    during the handshake (e.g. ``SO_RCVBUF``, which determines the TCP window
+    scale) take effect.
+    """
+    family, type_, proto, _, address = info
+    sock = socket.socket(family=family, type=type_, proto=proto)
+    try:
+        sock.setblocking(False)
+        for level, option, value in socket_options:
+            sock.setsockopt(level, option, value)
+        await loop.sock_connect(sock, address)
+    except BaseException:
+        sock.close()
+        raise
+
+    return sock
+
+
+async def staggered_connect(
+    loop: asyncio.AbstractEventLoop,
+    infos: Sequence[AddressInfo],
+    delay: Optional[float],
+    socket_options: Sequence[SocketOption] = (),
+) -> socket.socket:
+    """
+    Connect to the first address in ``infos`` that accepts. A new attempt is
+    started every ``delay`` seconds, or when the previous attempt fails.
+    Once one attempt succeeds, the rest are cancelled. If ``delay`` is None,
+    addresses are tried one at a time. ``socket_options`` are set on each
+    socket before it connects.
+
+    :raises OSError: all attempts failed
+    """
+    if not infos:
+        raise OSError("getaddrinfo() returned empty list")
+
+    remaining = collections.deque(interleave_addresses(infos))
+    pending = set()  # type: Set[asyncio.Future]
+    errors = []  # type: List[BaseException]
+    try:
+        while remaining or pending:
+            timeout = None
+            if remaining:
+                attempt = connect_socket(loop, remaining.popleft(), socket_options)
+                pending.add(loop.create_task(attempt))
+                if remaining:
+                    timeout = delay
+
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            connected = [task for task in done if task.exception() is None]
+            if connected:
+                for task in connected[1:]:
+                    task.result().close()
+                return connected[0].result()
+
+            errors.extend(cast(BaseException, task.exception()) for task in done)
+    finally:
+        for task in pending:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None:
+                task.result().close()
+
+    if len(errors) == 1 or len(set(str(error) for error in errors)) == 1:
+        raise errors[0]
+
+    raise OSError(
+        "Multiple exceptions: {}".format(", ".join(str(error) for error in errors))
+    )
@@ -0,0 +1,350 @@
+"""
+Direct delivery to the mail exchangers (MX hosts) of each recipient's domain,
+rather than via a smarthost.
+"""
+import asyncio
+import email.message
+import random
+import socket
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .email import extract_recipients, extract_sender, parse_address
+from .errors import (
+    SMTPException,
+    SMTPRecipientRefused,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+)
+from .pool import SMTPConnectionPool
+
+
+if TYPE_CHECKING:
+    from .response import SMTPResponse  # noqa: F401
+
+
+__all__ = (
+    "AiodnsMXResolver",
+    "MXDelivery",
+    "MXRecord",
+    "MXResolver",
+    "StubMXResolver",
+)
+
+
+MX_PORT = 25
+
+MXRecord = NamedTuple("MXRecord", [("preference", int), ("host", str)])
+MXRecord.__doc__ = """
+A mail exchanger for a domain. Lower preference values are tried first.
+"""
+
+# Recipient to server response for accepted recipients, and recipient to
+# exception for failed ones
+DeliveryResult = Tuple[Dict[str, str], Dict[str, Exception]]
+
+
+def recipient_domain(recipient: str) -> str:
+    """
+    Get the (lowercased) domain part of an email address.
+
+    :raises ValueError: the address has no domain
+    """
+    _, at, domain = parse_address(recipient).rpartition("@")
+    if not at or not domain:
+        raise ValueError("Recipient {!r} has no domain".format(recipient))
+
+    return domain.lower()
+
+
+def order_mx_hosts(domain: str, records: Sequence[MXRecord]) -> List[str]:
+    """
+    Get the hosts to try for ``domain``, in order of preference. Hosts with
+    equal preference are shuffled to spread load between them (RFC 5321
+    section 5.1). If there are no MX records, the domain itself is used.
+    Records with a null target (``"."``) are skipped.
+
+    :raises SMTPException: the domain has a null MX record (RFC 7505), or no
+        records with a usable target, so doesn't accept mail
+    """
+    if not records:
+        return [domain]
+
+    shuffled = sorted(
+        records, key=lambda record: (record.preference, random.random())  # nosec
+    )
+
+    ordered = []  # type: List[str]
+    for record in shuffled:
+        host = record.host.rstrip(".").lower()
+        if host and host not in ordered:
+            ordered.append(host)
+
+    if not ordered:
+        raise SMTPException("Domain {} does not accept mail".format(domain))
+
+    return ordered
+
+
+class MXResolver:
+    """
+    Base class for MX resolvers. Subclasses must implement :meth:`resolve_mx`.
+    """
+
+    async def resolve_mx(self, domain: str) -> List[MXRecord]:
+        """
+        Look up the MX records for ``domain``. An empty list means the domain
+        exists, but has no MX records.
+
+        :raises OSError: the domain could not be resolved
+        """
+        raise NotImplementedError
+
+
+class StubMXResolver(MXResolver):
+    """
+    Resolves MX records from a fixed mapping of domain to records, without
+    any network access. Intended for tests.
+    """
+
+    def __init__(self, records: Dict[str, Iterable[Tuple[int, str]]]) -> None:
+        self.records = {
+            domain.lower(): [MXRecord(*record) for record in domain_records]
+            for domain, domain_records in records.items()
+        }
+        self.lookups = []  # type: List[str]
+
+    async def resolve_mx(self, domain: str) -> List[MXRecord]:
+        self.lookups.append(domain)
+        try:
+            return list(self.records[domain.lower()])
+        except KeyError:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+
+class AiodnsMXResolver(MXResolver):
+    """
+    Looks up MX records with `aiodns`_, which must be installed separately
+    (e.g. with the ``aiodns`` extra, ``pip install aiosmtplib[aiodns]``).
+
+    .. _aiodns: https://github.com/saghul/aiodns
+    """
+
+    def __init__(self, nameservers: Optional[Sequence[str]] = None) -> None:
+        self.nameservers = nameservers
+        self._resolver = None  # type: Any
+
+    async def resolve_mx(self, domain: str) -> List[MXRecord]:
+        import aiodns  # type: ignore
+
+        if self._resolver is None:
+            self._resolver = aiodns.DNSResolver(nameservers=self.nameservers)
+
+        try:
+            answers = await self._resolver.query(domain, "MX")
+        except aiodns.error.DNSError as exc:
+            code = exc.args[0] if exc.args else None
+            if code == getattr(aiodns.error, "ARES_ENODATA", 1):
+                return []
+            raise socket.gaierror(code, "MX lookup for {} failed".format(domain))
+
+        return [MXRecord(answer.priority, answer.host) for answer in answers]
+
+
+class MXDelivery:
+    """
+    Delivers messages directly to the MX hosts of each recipient's domain.
+
+        >>> delivery = MXDelivery(AiodnsMXResolver())
+        >>> delivered, failed = await delivery.send(message)
+
+    Recipients are grouped by domain, and each domain is delivered to in
+    parallel, trying its MX hosts in order of preference. Connections are
+    pooled per MX host, so a single session is reused for all recipients and
+    messages sent to the same host.
+
+    Keyword arguments are passed to :class:`.SMTP` for each connection (for
+    example, ``start_tls=True`` or ``timeout``).
+    """
+
+    def __init__(
+        self,
+        mx_resolver: MXResolver,
+        pool: Optional[SMTPConnectionPool] = None,
+        port: int = MX_PORT,
+        **kwargs
+    ) -> None:
+        """
+        :param mx_resolver: Used to look up the MX records of each domain.
+        :keyword pool: Connection pool to use. Defaults to a pool keeping one
+            connection per MX host.
+        :keyword port: Port to connect to on MX hosts. Defaults to 25.
+        """
+        if "hostname" in kwargs or "sock" in kwargs or "socket_path" in kwargs:
+            raise ValueError("Connection targets are taken from MX records")
+
+        self.mx_resolver = mx_resolver
+        self.pool = pool if pool is not None else SMTPConnectionPool(max_size=1)
+        self.port = port
+        self.connection_kwargs = kwargs
+
+    async def __aenter__(self) -> "MXDelivery":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Close pooled connections.
+        """
+        await self.pool.close()
+
+    async def mx_hosts(self, domain: str) -> List[str]:
+        """
+        Look up the hosts to deliver to for ``domain``, in the order to try
+        them.
+        """
+        records = await self.mx_resolver.resolve_mx(domain)
+
+        return order_mx_hosts(domain, records)
+
+    async def send(
+        self,
+        message: Union[email.message.Message, str, bytes],
+        sender: Optional[str] = None,
+        recipients: Optional[Union[str, Sequence[str]]] = None,
+    ) -> DeliveryResult:
+        """
+        Deliver ``message`` to each recipient's MX hosts.
+
+        If ``message`` is a :py:class:`email.message.Message`, ``sender`` and
+        ``recipients`` default to those in its headers, as for
+        :meth:`.SMTP.send_message`. Otherwise, they are required.
+
+        Returns a dict of accepted recipients to the server's response, and a
+        dict of failed recipients to the exception that caused the failure
+        (:exc:`.SMTPRecipientRefused` for recipients refused by the server).
+
+        :raises ValueError: no sender or recipients
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+
+        if isinstance(message, email.message.Message):
+            if sender is None:
+                sender = extract_sender(message)
+            if recipients is None:
+                recipients = extract_recipients(message)
+
+        if not sender:
+            raise ValueError("No sender provided")
+        if not recipients:
+            raise ValueError("No recipients provided")
+
+        delivered = {}  # type: Dict[str, str]
+        failed = {}  # type: Dict[str, Exception]
+
+        by_domain = {}  # type: Dict[str, List[str]]
+        for recipient in recipients:
+            try:
+                domain = recipient_domain(recipient)
+            except ValueError as exc:
+                failed[recipient] = exc
+            else:
+                by_domain.setdefault(domain, []).append(recipient)
+
+        results = await asyncio.gather(
+            *(
+                self._deliver_to_domain(domain, message, sender, domain_recipients)
+                for domain, domain_recipients in by_domain.items()
+            )
+        )
+        for domain_delivered, domain_failed in results:
+            delivered.update(domain_delivered)
+            failed.update(domain_failed)
+
+        return delivered, failed
+
+    async def _deliver_to_domain(
+        self,
+        domain: str,
+        message: Union[email.message.Message, str, bytes],
+        sender: str,
+        recipients: List[str],
+    ) -> DeliveryResult:
+        try:
+            hosts = await self.mx_hosts(domain)
+        except (OSError, SMTPException) as exc:
+            return {}, {recipient: exc for recipient in recipients}
+
+        error = SMTPException(
+            "No MX hosts to deliver to for {}".format(domain)
+        )  # type: Exception
+        for host in hosts:
+            try:
+                errors, response = await self._deliver_to_host(
+                    host, message, sender, recipients
+                )
+            except SMTPRecipientsRefused as exc:
+                if any(refused.code >= 500 for refused in exc.recipients):
+                    return (
+                        {},
+                        {refused.recipient: refused for refused in exc.recipients},
+                    )
+                # Only transient failures; try the next MX host (RFC 5321
+                # section 5.1)
+                error = exc
+            except SMTPResponseException as exc:
+                error = exc
+                if exc.code >= 500:
+                    # Permanent failure; other MX hosts would refuse it too
+                    break
+            except (OSError, SMTPException) as exc:
+                # Includes connection errors, timeouts and disconnects
+                error = exc
+            else:
+                refused = {
+                    recipient: SMTPRecipientRefused(
+                        error_response.code, error_response.message, recipient
+                    )
+                    for recipient, error_response in errors.items()
+                }  # type: Dict[str, Exception]
+                accepted = {
+                    recipient: response
+                    for recipient in recipients
+                    if recipient not in refused
+                }
+                return accepted, refused
+
+        if isinstance(error, SMTPRecipientsRefused):
+            return {}, {refused.recipient: refused for refused in error.recipients}
+
+        return {}, {recipient: error for recipient in recipients}
+
+    async def _deliver_to_host(
+        self,
+        host: str,
+        message: Union[email.message.Message, str, bytes],
+        sender: str,
+        recipients: List[str],
+    ) -> Tuple[Dict[str, "SMTPResponse"], str]:
+        async with self.pool.connection(
+            hostname=host, port=self.port, **self.connection_kwargs
+        ) as client:
+            if isinstance(message, email.message.Message):
+                return await client.send_message(
+                    message, sender=sender, recipients=recipients
+                )
+
+            return await client.sendmail(sender, recipients, message)
@@ -0,0 +1,586 @@
+"""
+Connection pooling, to reuse connections (and their EHLO, STARTTLS and AUTH
+negotiation) across messages.
+"""
+import asyncio
+import collections
+import datetime
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Optional, Tuple, Type
+
+from .compat import get_running_loop
+from .connection import DeadlineType, absolute_deadline
+from .errors import (
+    SMTPConnectTimeoutError,
+    SMTPException,
+    SMTPServerDisconnected,
+    SMTPTimeoutError,
+)
+from .smtp import SMTP
+
+
+if TYPE_CHECKING:
+    from typing import ContextManager, Deque, List, MutableMapping  # noqa: F401
+
+
+__all__ = ("SMTPConnectionPool", "default_pool")
+
+
+PoolKey = Tuple[Tuple[str, Hashable], ...]
+
+
+def pool_key(kwargs: Dict[str, Any]) -> PoolKey:
+    """
+    Build the key that connections created with the kwargs given are pooled
+    under. All connection options are included, so connections are only shared
+    between callers that would have made identical connections (same server,
+    TLS settings and credentials).
+    """
+    if kwargs.get("sock") is not None:
+        raise ValueError("Connections using an existing socket cannot be pooled")
+
+    return tuple(sorted(kwargs.items()))
+
+
+class _HostPool:
+    """
+    Connections for a single pool key.
+    """
+
+    def __init__(self, kwargs: Dict[str, Any]) -> None:
+        self.kwargs = kwargs
+        # Idle connections, with the loop time they were last used
+        self.idle = []  # type: List[Tuple[SMTP, float]]
+        # Total connections, including those in use or being established
+        self.size = 0
+        self.waiters = collections.deque()  # type: Deque[asyncio.Future]
+        # Connections being opened in the background to refill the pool
+        self.warming = 0
+        self.refill = None  # type: Optional[asyncio.Task]
+
+    def wake_waiter(self) -> None:
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+
+class SMTPConnectionPool:
+    """
+    Keeps connections to SMTP servers open for reuse.
+
+    Connections are pooled by their connection options (server, TLS settings
+    and credentials), which are the same keyword arguments accepted by
+    :class:`.SMTP`.
+
+        >>> pool = SMTPConnectionPool(max_size=5)
+        >>> async with pool.connection(hostname="localhost", port=1025) as smtp:
+        ...     await smtp.sendmail(sender, recipients, message)
+
+    Idle connections are checked with ``NOOP`` before being handed out, and
+    closed once they have been idle for longer than ``max_idle_time`` (apart
+    from ``min_idle`` connections per server, which are kept alive instead).
+
+    With ``prewarm``, the pool keeps that many connections per server
+    connected and negotiated (EHLO, STARTTLS and AUTH) ahead of time,
+    opening replacements in the background as they are checked out, so that
+    sending doesn't wait on session setup:
+
+        >>> pool = SMTPConnectionPool(prewarm=2)
+        >>> await pool.warm_up(hostname="localhost", port=1025)
+
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10,
+        max_idle_time: Optional[float] = 60.0,
+        min_idle: int = 0,
+        health_check: bool = True,
+        prewarm: int = 0,
+    ) -> None:
+        """
+        :keyword max_size: Maximum number of connections per server (in use or
+            idle). Further requests wait for a connection to be returned.
+            Defaults to 10.
+        :keyword max_idle_time: Time, in seconds, after which idle connections
+            are closed. If None, idle connections are kept until the pool is
+            closed. Defaults to 60.
+        :keyword min_idle: Number of idle connections per server to keep open,
+            with periodic ``NOOP`` commands, past ``max_idle_time``.
+            Defaults to 0.
+        :keyword health_check: If True, idle connections are checked with a
+            ``NOOP`` command before being reused. Defaults to True.
+        :keyword prewarm: Number of idle, fully negotiated connections per
+            server to keep ready. Once a server has been connected to (or
+            :meth:`warm_up` is called), connections are opened in the
+            background to keep this many available. Defaults to 0.
+
+        :raises ValueError: invalid pool size options provided
+        """
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.min_idle = min_idle
+        self.health_check = health_check
+        self.prewarm = prewarm
+
+        self._host_pools = {}  # type: Dict[PoolKey, _HostPool]
+        self._in_use = {}  # type: Dict[SMTP, _HostPool]
+        self._reaper = None  # type: Optional[asyncio.Task]
+        self._closed = False
+
+        self._validate_config()
+
+    def _validate_config(self) -> None:
+        if self.max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if self.min_idle < 0 or self.min_idle > self.max_size:
+            raise ValueError("min_idle must be between 0 and max_size")
+        if self.prewarm < 0 or self.prewarm > self.max_size:
+            raise ValueError("prewarm must be between 0 and max_size")
+        if self.max_idle_time is not None and self.max_idle_time <= 0:
+            raise ValueError("max_idle_time must be greater than 0")
+
+    async def __aenter__(self) -> "SMTPConnectionPool":
+        return self
+
+    async def __aexit__(
+        self, exc_type: Type[Exception], exc: Exception, traceback: Any
+    ) -> None:
+        await self.close()
+
+    @property
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def connection(
+        self, deadline: Optional[DeadlineType] = None, **kwargs
+    ) -> "PooledConnection":
+        """
+        Async context manager that acquires a connection with the options
+        given, and returns it to the pool afterwards. If a ``deadline`` is
+        given (see :meth:`.SMTP.sendmail`), it applies to acquiring the
+        connection and to all commands sent until the block exits.
+
+        If the block raises an SMTP error, the connection is reset with
+        ``RSET`` before being returned. Otherwise, if the block raises
+        (e.g. a timeout or disconnect), the connection is closed.
+        """
+        return PooledConnection(self, absolute_deadline(deadline), kwargs)
+
+    async def acquire(self, deadline: Optional[DeadlineType] = None, **kwargs) -> SMTP:
+        """
+        Get a connected client with the options given, reusing an idle
+        connection if one is available. If ``max_size`` connections to the
+        server are already open, wait for one to be released.
+
+        Clients must be returned with :meth:`release`.
+
+        :raises ValueError: an existing socket was provided
+        :raises RuntimeError: the pool is closed
+        :raises SMTPConnectTimeoutError: the deadline given passed
+        """
+        deadline = absolute_deadline(deadline)
+        host_pool = self._get_host_pool(kwargs)
+        self._start_reaper()
+
+        while True:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+
+            while host_pool.idle:
+                client, _ = host_pool.idle.pop()
+                try:
+                    with client._deadline_scope(deadline):
+                        healthy = await self._check_health(client)
+                except asyncio.CancelledError:
+                    self._discard(host_pool, client)
+                    raise
+
+                if healthy:
+                    self._in_use[client] = host_pool
+                    self._schedule_refill(host_pool)
+                    return client
+
+                self._discard(host_pool, client)
+
+            if host_pool.size < self.max_size:
+                client = await self._connect(host_pool, deadline)
+                self._schedule_refill(host_pool)
+                return client
+
+            timeout = None
+            if deadline is not None:
+                timeout = deadline.timestamp() - time.time()
+                if timeout <= 0:
+                    raise SMTPConnectTimeoutError(
+                        "Timed out waiting for a pooled connection"
+                    )
+
+            waiter = get_running_loop().create_future()
+            host_pool.waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                raise SMTPConnectTimeoutError(
+                    "Timed out waiting for a pooled connection"
+                )
+            except asyncio.CancelledError:
+                # Pass on a wake up we can no longer use
+                if waiter.done() and not waiter.cancelled():
+                    host_pool.wake_waiter()
+                raise
+
+    async def release(self, client: SMTP, discard: bool = False) -> None:
+        """
+        Return a client to the pool. Clients that are no longer connected (or
+        if ``discard`` is True) are closed instead.
+
+        :raises ValueError: the client is not in use from this pool
+        """
+        try:
+            host_pool = self._in_use.pop(client)
+        except KeyError:
+            raise ValueError("Client was not acquired from this pool")
+
+        if discard or not client.is_connected:
+            self._discard(host_pool, client)
+            self._schedule_refill(host_pool)
+        elif self._closed:
+            host_pool.size -= 1
+            await self._quit(client)
+        else:
+            host_pool.idle.append((client, get_running_loop().time()))
+            host_pool.wake_waiter()
+
+    async def warm_up(self, **kwargs) -> None:
+        """
+        Open connections with the options given until ``prewarm`` of them
+        are ready, e.g. on startup, before the first message is sent. The
+        pool keeps them topped up after that.
+
+        :raises ValueError: an existing socket was provided
+        :raises RuntimeError: the pool is closed
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        host_pool = self._get_host_pool(kwargs)
+        self._start_reaper()
+        await self._fill(host_pool)
+
+    async def close(self) -> None:
+        """
+        Close all idle connections, and stop handing out new ones. Connections
+        in use are closed when they are released.
+        """
+        self._closed = True
+
+        background_tasks = [
+            host_pool.refill
+            for host_pool in self._host_pools.values()
+            if host_pool.refill is not None
+        ]
+        if self._reaper is not None:
+            background_tasks.append(self._reaper)
+            self._reaper = None
+
+        for task in background_tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        clients = []  # type: List[SMTP]
+        for host_pool in self._host_pools.values():
+            clients.extend(client for client, _ in host_pool.idle)
+            host_pool.size -= len(host_pool.idle)
+            host_pool.idle.clear()
+            # Waiters will raise RuntimeError
+            while host_pool.waiters:
+                host_pool.wake_waiter()
+
+        if clients:
+            await asyncio.gather(*(self._quit(client) for client in clients))
+
+    def _get_host_pool(self, kwargs: Dict[str, Any]) -> _HostPool:
+        key = pool_key(kwargs)
+        host_pool = self._host_pools.get(key)
+        if host_pool is None:
+            host_pool = self._host_pools[key] = _HostPool(kwargs)
+
+        return host_pool
+
+    async def _connect(
+        self, host_pool: _HostPool, deadline: Optional[datetime.datetime]
+    ) -> SMTP:
+        client = await self._open(host_pool, deadline)
+        self._in_use[client] = host_pool
+
+        return client
+
+    async def _open(
+        self, host_pool: _HostPool, deadline: Optional[datetime.datetime] = None
+    ) -> SMTP:
+        host_pool.size += 1
+        client = None  # type: Optional[SMTP]
+        try:
+            client = SMTP(**host_pool.kwargs)
+            with client._deadline_scope(deadline):
+                await client.connect()
+        except BaseException:
+            if client is not None:
+                client.close()
+            host_pool.size -= 1
+            host_pool.wake_waiter()
+            raise
+
+        return client
+
+    def _schedule_refill(self, host_pool: _HostPool) -> None:
+        """
+        Start opening connections in the background, if fewer than
+        ``prewarm`` are ready or on their way.
+        """
+        if (
+            self._closed
+            or len(host_pool.idle) + host_pool.warming >= self.prewarm
+            or (host_pool.refill is not None and not host_pool.refill.done())
+        ):
+            return
+
+        host_pool.refill = get_running_loop().create_task(self._refill(host_pool))
+
+    async def _refill(self, host_pool: _HostPool) -> None:
+        try:
+            await self._fill(host_pool)
+        except (OSError, SMTPException):
+            # Retried on the next checkout, or by the reaper
+            pass
+
+    async def _fill(self, host_pool: _HostPool) -> None:
+        """
+        Open connections until ``prewarm`` are ready (within ``max_size``).
+        """
+        needed = min(
+            self.prewarm - len(host_pool.idle) - host_pool.warming,
+            self.max_size - host_pool.size,
+        )
+        if needed <= 0:
+            return
+
+        results = await asyncio.gather(
+            *(self._warm(host_pool) for _ in range(needed)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _warm(self, host_pool: _HostPool) -> None:
+        """
+        Open a connection, complete its negotiation, and add it to the idle
+        connections.
+        """
+        host_pool.warming += 1
+        try:
+            client = await self._open(host_pool)
+            try:
+                # Login and STARTTLS do this as part of connect, if configured
+                await client._ehlo_or_helo_if_needed()
+            except BaseException:
+                self._discard(host_pool, client)
+                raise
+        finally:
+            host_pool.warming -= 1
+
+        if self._closed:
+            host_pool.size -= 1
+            await self._quit(client)
+        else:
+            host_pool.idle.append((client, get_running_loop().time()))
+            host_pool.wake_waiter()
+
+    async def _check_health(self, client: SMTP, noop: Optional[bool] = None) -> bool:
+        if noop is None:
+            noop = self.health_check
+
+        if not client.is_connected:
+            return False
+        if not noop:
+            return True
+
+        try:
+            await client.noop()
+        except SMTPException:
+            return False
+
+        return client.is_connected
+
+    def _discard(self, host_pool: _HostPool, client: SMTP) -> None:
+        client.close()
+        host_pool.size -= 1
+        host_pool.wake_waiter()
+
+    async def _quit(self, client: SMTP) -> None:
+        try:
+            await client.quit()
+        except SMTPException:
+            pass
+        finally:
+            client.close()
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None and self.max_idle_time is not None:
+            self._reaper = get_running_loop().create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        """
+        Periodically close connections idle for longer than ``max_idle_time``,
+        keeping ``min_idle`` (or ``prewarm``) connections alive with ``NOOP``,
+        and refill prewarmed connections that have been lost.
+        """
+        max_idle_time = self.max_idle_time
+        if max_idle_time is None:
+            return
+
+        loop = get_running_loop()
+        min_idle = max(self.min_idle, self.prewarm)
+
+        while True:
+            await asyncio.sleep(max_idle_time / 2)
+
+            cutoff = loop.time() - max_idle_time
+            for key, host_pool in list(self._host_pools.items()):
+                # Idle connections are usually in order of release, oldest
+                # first, but don't rely on it
+                expired = [client for client, used in host_pool.idle if used <= cutoff]
+                if not expired:
+                    if host_pool.size == 0 and not host_pool.waiters:
+                        del self._host_pools[key]
+                    else:
+                        self._schedule_refill(host_pool)
+                    continue
+
+                host_pool.idle = [
+                    (client, used) for client, used in host_pool.idle if used > cutoff
+                ]
+                keep = max(min_idle - len(host_pool.idle), 0)
+                keepalive = expired[len(expired) - keep :]
+                expired = expired[: len(expired) - keep]
+
+                host_pool.size -= len(expired)
+                for _ in expired:
+                    host_pool.wake_waiter()
+                try:
+                    await asyncio.gather(*(self._quit(client) for client in expired))
+                except asyncio.CancelledError:
+                    # Kept alive connections are out of the idle list, so
+                    # would otherwise never be closed or counted down
+                    for client in keepalive:
+                        self._discard(host_pool, client)
+                    raise
+                finally:
+                    # Quits cancelled before they started don't close
+                    for client in expired:
+                        client.close()
+
+                for index, client in enumerate(keepalive):
+                    try:
+                        healthy = await self._check_health(client, noop=True)
+                    except asyncio.CancelledError:
+                        for unchecked in keepalive[index:]:
+                            self._discard(host_pool, unchecked)
+                        raise
+
+                    if healthy:
+                        host_pool.idle.append((client, loop.time()))
+                    else:
+                        self._discard(host_pool, client)
+
+                self._schedule_refill(host_pool)
+
+
+class PooledConnection:
+    """
+    Async context manager returned by :meth:`SMTPConnectionPool.connection`.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        deadline: Optional[datetime.datetime],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        self.pool = pool
+        self.deadline = deadline
+        self.kwargs = kwargs
+        self.client = None  # type: Optional[SMTP]
+        self._deadline_scope = None  # type: Optional[ContextManager[None]]
+
+    async def __aenter__(self) -> SMTP:
+        client = await self.pool.acquire(deadline=self.deadline, **self.kwargs)
+        self._deadline_scope = client._deadline_scope(self.deadline)
+        self._deadline_scope.__enter__()
+        self.client = client
+
+        return client
+
+    async def __aexit__(
+        self, exc_type: Type[Exception], exc: Exception, traceback: Any
+    ) -> None:
+        client = self.client
+        self.client = None
+        if client is None:
+            return
+
+        discard = exc is not None
+        try:
+            if isinstance(exc, SMTPException) and not isinstance(
+                exc, (SMTPServerDisconnected, SMTPTimeoutError)
+            ):
+                # The server refused something; clear any transaction in progress
+                try:
+                    await client.rset()
+                except SMTPException:
+                    pass
+                else:
+                    discard = False
+        finally:
+            # Whatever happened, the client goes back to the pool (or is
+            # discarded), so that its slot isn't lost
+            if self._deadline_scope is not None:
+                self._deadline_scope.__exit__(None, None, None)
+                self._deadline_scope = None
+
+            await self.pool.release(client, discard=discard)
+
+
+_default_pools = (
+    weakref.WeakKeyDictionary()
+)  # type: MutableMapping[asyncio.AbstractEventLoop, SMTPConnectionPool]
+
+
+def default_pool() -> SMTPConnectionPool:
+    """
+    Get the process-wide connection pool for the running event loop, as used by
+    :func:`.send` when called with ``pool=True``. A new pool is created if
+    there isn't one yet, or if it was closed.
+
+    To close pooled connections on shutdown:
+
+        >>> await default_pool().close()
+
+    """
+    loop = get_running_loop()
+    closed_loops = [pool_loop for pool_loop in _default_pools if pool_loop.is_closed()]
+    for closed_loop in closed_loops:
+        del _default_pools[closed_loop]
+
+    pool = _default_pools.get(loop)
+    if pool is None or pool.is_closed:
+        pool = _default_pools[loop] = SMTPConnectionPool()
+
+    return pool
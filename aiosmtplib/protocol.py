@@ -2,11 +2,23 @@
 An ``asyncio.Protocol`` subclass for lower level IO handling.
 """
 import asyncio
-import re
+import collections
+import itertools
 import ssl
-from typing import Callable, Optional, cast
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
-from .compat import start_tls
+from .compat import BufferedProtocol, start_tls
 from .errors import (
     SMTPDataError,
     SMTPReadTimeoutError,
@@ -18,12 +30,153 @@ from .response import SMTPResponse
 from .status import SMTPStatus
 
 
+if TYPE_CHECKING:
+    from typing import Deque, OrderedDict  # noqa: F401
+
+
 __all__ = ("SMTPProtocol",)
 
 
 MAX_LINE_LENGTH = 8192
-LINE_ENDINGS_REGEX = re.compile(rb"(?:\r\n|\n|\r(?!\n))")
-PERIOD_REGEX = re.compile(rb"(?m)^\.")
+MAX_RESPONSE_SIZE = 64 * 1024
+MAX_RESPONSE_LINES = 512
+RECEIVE_BUFFER_SIZE = 16 * 1024
+WRITE_SLICE_SIZE = 64 * 1024
+RESPONSE_CACHE_SIZE = 32
+RESPONSE_CACHE_MAX_LINE_LENGTH = 128
+MIN_RECEIVE_SIZE = 4 * 1024
+END_OF_DATA = b".\r\n"
+WHITESPACE = b" \t\r\n"
+HYPHEN = ord("-")
+# Command fragments, written with transport.writelines rather than joined
+SPACE = b" "
+CRLF = b"\r\n"
+CRLF_END_OF_DATA = CRLF + END_OF_DATA
+DATA_COMMAND = b"DATA\r\n"
+STARTTLS_COMMAND = b"STARTTLS\r\n"
+
+
+def command_parts(*args: bytes) -> List[bytes]:
+    """
+    Frame an SMTP command for :meth:`SMTPProtocol.writelines`: the arguments
+    given, separated by spaces and followed by \\r\\n, without joining them.
+    """
+    if not args:
+        return [CRLF]
+
+    parts = [SPACE] * (len(args) * 2)
+    parts[::2] = args
+    parts[-1] = CRLF
+
+    return parts
+
+
+def has_crlf_line_endings(data: bytes) -> bool:
+    """
+    Check if all line endings in the data given are already \\\\r\\\\n.
+    Counting doesn't allocate, so this is much cheaper than a substitution.
+    """
+    crlf_count = data.count(b"\r\n")
+
+    return data.count(b"\n") == crlf_count and data.count(b"\r") == crlf_count
+
+
+def normalize_line_endings(data: bytes, prenormalized: bool = False) -> bytes:
+    """
+    Convert lone \\\\r and \\\\n characters to \\\\r\\\\n.
+    Chained ``bytes.replace`` calls are several times faster than a regex here.
+    """
+    if prenormalized or has_crlf_line_endings(data):
+        return data
+
+    return data.replace(b"\r\n", b"\n").replace(b"\r", b"\n").replace(b"\n", b"\r\n")
+
+
+def quote_data(
+    data: bytes, at_line_start: bool = True, prenormalized: bool = False
+) -> bytes:
+    """
+    Encode message content for transfer after the DATA command: lone \\\\r
+    and \\\\n characters are converted to \\\\r\\\\n, and lines beginning
+    with a period are quoted per RFC 821.
+
+    If line endings are already \\\\r\\\\n (or ``prenormalized`` is True), only
+    periods need quoting, which is a single ``bytes.replace``.
+    """
+    data = normalize_line_endings(data, prenormalized=prenormalized)
+    data = data.replace(b"\n.", b"\n..")
+
+    if at_line_start and data[:1] == b".":
+        data = b"." + data
+
+    return data
+
+
+def envelope_accepted(responses: Sequence[SMTPResponse]) -> bool:
+    """
+    Check the responses to a MAIL command followed by RCPT commands (in that
+    order), returning True if the sender and at least one recipient were
+    accepted.
+    """
+    if not responses or responses[0].code != SMTPStatus.completed:
+        return False
+
+    return any(
+        response.code in (SMTPStatus.completed, SMTPStatus.will_forward)
+        for response in responses[1:]
+    )
+
+
+class DataEncoder:
+    """
+    Incrementally encodes message content that arrives in chunks, converting
+    lone \\\\r and \\\\n characters to \\\\r\\\\n and (optionally) quoting
+    lines beginning with a period. State is kept across chunk boundaries, so a
+    \\\\r\\\\n or a leading period split between chunks is handled correctly.
+
+    If ``prenormalized`` is True, line endings are assumed to be \\\\r\\\\n
+    already, and are not checked.
+    """
+
+    def __init__(self, quote_periods: bool = True, prenormalized: bool = False) -> None:
+        self.quote_periods = quote_periods
+        self.prenormalized = prenormalized
+        self.at_line_start = True
+        self._pending_cr = False
+
+    def encode(self, data: bytes) -> bytes:
+        if not self.prenormalized:
+            if self._pending_cr:
+                data = b"\r" + data
+                self._pending_cr = False
+            # A trailing \r may be the first half of a \r\n, so hold it back
+            if data[-1:] == b"\r":
+                data = data[:-1]
+                self._pending_cr = True
+        if not data:
+            return b""
+
+        if self.quote_periods:
+            data = quote_data(
+                data, at_line_start=self.at_line_start, prenormalized=self.prenormalized
+            )
+        else:
+            data = normalize_line_endings(data, prenormalized=self.prenormalized)
+        self.at_line_start = data[-1:] == b"\n"
+
+        return data
+
+    def flush(self) -> bytes:
+        """
+        Return any content held back at the end of the last chunk.
+        """
+        if not self._pending_cr:
+            return b""
+
+        self._pending_cr = False
+        self.at_line_start = True
+
+        return b"\r\n"
 
 
 class FlowControlMixin(asyncio.Protocol):
@@ -89,16 +242,48 @@ class FlowControlMixin(asyncio.Protocol):
         raise NotImplementedError
 
 
-class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
+class SMTPProtocol(FlowControlMixin, BufferedProtocol):
     def __init__(
         self,
         loop: Optional[asyncio.AbstractEventLoop] = None,
         connection_lost_callback: Optional[Callable] = None,
+        max_response_size: int = MAX_RESPONSE_SIZE,
+        max_response_lines: int = MAX_RESPONSE_LINES,
     ) -> None:
         super().__init__(loop=loop)
+        self.max_response_size = max_response_size
+        self.max_response_lines = max_response_lines
+        # Loop time after which reads time out, regardless of the timeout given
+        self.deadline = None  # type: Optional[float]
         self._over_ssl = False
-        self._buffer = bytearray()
-        self._response_waiter = None  # type: Optional[asyncio.Future[SMTPResponse]]
+        # Received data is read directly into a reusable buffer; unparsed data
+        # is between the start and end offsets.
+        self._buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self._buffer_view = memoryview(self._buffer)
+        self._buffer_start = 0
+        self._buffer_end = 0
+        # Response parser state, kept between reads so that data is only
+        # scanned once: the position to continue searching for a line ending
+        # from, and the lines of a multi-line response received so far.
+        self._scan_offset = 0
+        self._response_lines = []  # type: List[bytearray]
+        self._response_line_count = 0
+        self._response_size = 0
+        # Short single line responses, keyed by the raw line (including the
+        # code), so that repeated replies (e.g. to RCPT) share one object.
+        # This relies on SMTPResponse being immutable.
+        self._response_cache = (
+            collections.OrderedDict()
+        )  # type: OrderedDict[bytes, SMTPResponse]
+        self.response_cache_hits = 0
+        self.response_cache_misses = 0
+        # Futures for responses, in the order they are read: one for each
+        # command written, followed by any responses that arrived when no
+        # command was waiting (the last ``_unsolicited_response_count``).
+        self._responses = collections.deque()  # type: Deque[asyncio.Future]
+        self._unsolicited_response_count = 0
+        # Futures for commands still awaiting a response, oldest first.
+        self._response_waiters = collections.deque()  # type: Deque[asyncio.Future]
         self._connection_lost_callback = connection_lost_callback
         self._connection_lost_waiter = None  # type: Optional[asyncio.Future[None]]
 
@@ -107,7 +292,9 @@ class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
         self._closed = self._loop.create_future()  # type: asyncio.Future[None]
 
     def __del__(self):
-        waiters = (self._response_waiter, self._connection_lost_waiter)
+        waiters = itertools.chain(
+            self._response_waiters, self._responses, (self._connection_lost_waiter,)
+        )
         for waiter in filter(None, waiters):
             if waiter.done() and not waiter.cancelled():
                 # Avoid 'Future exception was never retrieved' warnings
@@ -124,9 +311,11 @@ class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
         return bool(self.transport is not None and not self.transport.is_closing())
 
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        if self.transport is None:
+            # The server greeting is sent without a command
+            self._expect_response()
         self.transport = cast(asyncio.Transport, transport)
         self._over_ssl = transport.get_extra_info("sslcontext") is not None
-        self._response_waiter = self._loop.create_future()
         self._command_lock = asyncio.Lock()
 
         if self._connection_lost_callback is not None:
@@ -142,139 +331,349 @@ class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
             smtp_exc = SMTPServerDisconnected("Connection lost")
             smtp_exc.__cause__ = exc
 
-        if self._response_waiter and not self._response_waiter.done():
-            if exc:
-                self._response_waiter.set_exception(smtp_exc)
-            else:
-                self._response_waiter.cancel()
-
+        # Resolve the connection lost waiter first, so that its callbacks run
+        # before any tasks waiting on a response are woken up.
         if self._connection_lost_waiter and not self._connection_lost_waiter.done():
             if exc:
                 self._connection_lost_waiter.set_exception(smtp_exc)
             else:
                 self._connection_lost_waiter.set_result(None)
 
+        while self._response_waiters:
+            waiter = self._response_waiters.popleft()
+            if waiter.done():
+                continue
+            if exc:
+                waiter.set_exception(smtp_exc)
+            else:
+                waiter.cancel()
+
         self.transport = None
         self._command_lock = None
 
-    def data_received(self, data: bytes) -> None:
-        if self._response_waiter is None:
-            raise RuntimeError(
-                "data_received called without a response waiter set: {!r}".format(data)
-            )
-        elif self._response_waiter.done():
-            # We got a response without issuing a command; ignore it.
-            return
-
-        self._buffer.extend(data)
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """
+        Return the free space at the end of the receive buffer, for the
+        transport to read into. Unparsed data is moved to the start of the
+        buffer to make room, and the buffer only grows if that isn't enough.
+        """
+        unparsed_length = self._buffer_end - self._buffer_start
+        required_size = unparsed_length + max(sizehint, MIN_RECEIVE_SIZE)
 
-        # If we got an obvious partial message, don't try to parse the buffer
-        last_linebreak = data.rfind(b"\n")
-        if (
-            last_linebreak == -1
-            or data[last_linebreak + 3 : last_linebreak + 4] == b"-"
+        if self._buffer_start and len(self._buffer) - self._buffer_end < max(
+            sizehint, MIN_RECEIVE_SIZE
         ):
-            return
+            self._buffer_view[:unparsed_length] = self._buffer_view[
+                self._buffer_start : self._buffer_end
+            ]
+            self._scan_offset -= self._buffer_start
+            self._buffer_start = 0
+            self._buffer_end = unparsed_length
 
-        try:
-            response = self._read_response_from_buffer()
-        except Exception as exc:
-            self._response_waiter.set_exception(exc)
-        else:
-            if response is not None:
-                self._response_waiter.set_result(response)
+        if required_size > len(self._buffer):
+            new_buffer = bytearray(max(required_size, len(self._buffer) * 2))
+            new_buffer[:unparsed_length] = self._buffer_view[
+                self._buffer_start : self._buffer_end
+            ]
+            self._buffer = new_buffer
+            self._buffer_view = memoryview(new_buffer)
+            self._scan_offset -= self._buffer_start
+            self._buffer_start = 0
+            self._buffer_end = unparsed_length
+
+        return self._buffer_view[self._buffer_end :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._buffer_end += nbytes
+
+        # Multiple responses may have arrived at once (e.g. when pipelining), so
+        # keep reading until the buffer is exhausted.
+        while True:
+            try:
+                response = self._read_response_from_buffer()
+            except Exception as exc:
+                # Whatever is left in the buffer can't be trusted
+                self._reset_parser()
+                self._get_response_waiter().set_exception(exc)
+                break
+
+            if response is None:
+                break
+
+            self._get_response_waiter().set_result(response)
+
+        if self._buffer_start == self._buffer_end:
+            self._buffer_start = self._buffer_end = self._scan_offset = 0
+
+    def data_received(self, data: bytes) -> None:
+        """
+        Used instead of :meth:`.get_buffer` and :meth:`.buffer_updated` when
+        ``asyncio.BufferedProtocol`` isn't available (Python < 3.7).
+        """
+        buffer = self.get_buffer(len(data))
+        buffer[: len(data)] = data
+        self.buffer_updated(len(data))
 
     def eof_received(self) -> bool:
         exc = SMTPServerDisconnected("Unexpected EOF received")
-        if self._response_waiter and not self._response_waiter.done():
-            self._response_waiter.set_exception(exc)
+        # Replies that no command is waiting for (e.g. a 221 sent before the
+        # server closed the connection) mustn't be read by the next command.
+        self._discard_unsolicited_responses()
+        waiters = [waiter for waiter in self._response_waiters if not waiter.done()]
+        self._response_waiters.clear()
+        if not waiters:
+            # Make sure the next read fails, even if no command is waiting yet
+            waiter = self._loop.create_future()
+            self._responses.append(waiter)
+            waiters.append(waiter)
         if self._connection_lost_waiter and not self._connection_lost_waiter.done():
             self._connection_lost_waiter.set_exception(exc)
+        for waiter in waiters:
+            waiter.set_exception(exc)
 
         # Returning false closes the transport
         return False
 
+    def _expect_response(self) -> None:
+        """
+        Register a future for the response to a command that has just been
+        written, to be returned by :meth:`read_response` in order.
+
+        A response received before the command was written can't be a reply
+        to it, so any unsolicited responses still queued are discarded.
+        """
+        self._discard_unsolicited_responses()
+        waiter = self._loop.create_future()
+        self._responses.append(waiter)
+        self._response_waiters.append(waiter)
+
+    def _discard_unsolicited_responses(self) -> None:
+        while self._unsolicited_response_count:
+            waiter = self._responses.pop()
+            self._unsolicited_response_count -= 1
+            if not waiter.cancelled():
+                # Avoid 'Future exception was never retrieved' warnings
+                waiter.exception()
+
+    def _get_response_waiter(self) -> "asyncio.Future[SMTPResponse]":
+        """
+        Get the future for the next response received, in FIFO order.
+
+        If no command is waiting on a response, the future is queued as an
+        unsolicited response until :meth:`read_response` is called, or
+        another command is written.
+        """
+        while self._response_waiters:
+            waiter = self._response_waiters.popleft()
+            # Skip waiters that have been cancelled (e.g. on timeout)
+            if not waiter.done():
+                return waiter
+
+        waiter = self._loop.create_future()
+        self._responses.append(waiter)
+        self._unsolicited_response_count += 1
+
+        return waiter
+
     def _read_response_from_buffer(self) -> Optional[SMTPResponse]:
-        """Parse the actual response (if any) from the data buffer
         """
-        code = -1
-        message = bytearray()
-        offset = 0
-        message_complete = False
+        Parse the next response (if complete) from the data buffer.
+
+        Each complete line is parsed once, and removed from the buffer; lines
+        of a multi-line response are kept until the last one arrives.
+        """
+        buffer = self._buffer
 
         while True:
-            line_end_index = self._buffer.find(b"\n", offset)
+            line_start = self._buffer_start
+            line_end_index = buffer.find(b"\n", self._scan_offset, self._buffer_end)
             if line_end_index == -1:
-                break
+                # Don't scan this partial line again
+                self._scan_offset = self._buffer_end
+                self._check_response_limits(self._buffer_end - line_start)
+                return None
 
-            line = bytes(self._buffer[offset : line_end_index + 1])
+            line_length = line_end_index + 1 - line_start
+            self._check_response_limits(line_length)
 
-            if len(line) > MAX_LINE_LENGTH:
-                raise SMTPResponseException(
-                    SMTPStatus.unrecognized_command, "Response too long"
-                )
+            cache_key = None
+            if (
+                self._response_line_count == 0
+                and line_length <= RESPONSE_CACHE_MAX_LINE_LENGTH
+            ):
+                cache_key = bytes(self._buffer_view[line_start : line_end_index + 1])
+                cached_response = self._response_cache.get(cache_key)
+                if cached_response is not None:
+                    self._response_cache.move_to_end(cache_key)
+                    self.response_cache_hits += 1
+                    self._buffer_start = self._scan_offset = line_end_index + 1
+                    return cached_response
 
             try:
-                code = int(line[:3])
+                code = int(buffer[line_start : min(line_start + 3, line_end_index)])
             except ValueError:
+                line = bytes(self._buffer_view[line_start : line_end_index + 1])
                 raise SMTPResponseException(
                     SMTPStatus.invalid_response.value,
                     "Malformed SMTP response line: {!r}".format(line),
                 ) from None
 
-            offset += len(line)
-            if len(message):
-                message.extend(b"\n")
-            message.extend(line[4:].strip(b" \t\r\n"))
-            if line[3:4] != b"-":
-                message_complete = True
-                break
-
-        if message_complete:
-            response = SMTPResponse(
-                code, bytes(message).decode("utf-8", "surrogateescape")
+            # A single small copy is cheaper than stripping via a memoryview
+            text = buffer[line_start + 4 : line_end_index + 1].strip(WHITESPACE)
+            is_last_line = (
+                line_start + 3 >= line_end_index or buffer[line_start + 3] != HYPHEN
             )
-            del self._buffer[:offset]
-            return response
+            self._buffer_start = self._scan_offset = line_end_index + 1
+            self._response_size += line_length
+            self._response_line_count += 1
+            # Leading empty lines are dropped
+            if self._response_lines or text:
+                self._response_lines.append(text)
+
+            if is_last_line:
+                lines = self._response_lines
+                self._response_lines = []
+                self._response_line_count = 0
+                self._response_size = 0
+                if len(lines) == 1:
+                    raw = bytes(lines[0])
+                else:
+                    raw = b"\n".join(lines)
+
+                response = SMTPResponse(code, raw=raw)
+                if cache_key is not None:
+                    self._cache_response(cache_key, response)
+
+                return response
+
+    def _cache_response(self, key: bytes, response: SMTPResponse) -> None:
+        """
+        Add a single line response to the cache, evicting the least recently
+        used response if it's full.
+        """
+        self.response_cache_misses += 1
+        if len(self._response_cache) >= RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+        self._response_cache[key] = response
+
+    def _check_response_limits(self, line_length: int) -> None:
+        """
+        Check the current line (complete or not) against the line length limit,
+        and the response so far against the response size and line count limits.
+
+        A server exceeding these limits is broken (or worse), so the connection
+        is closed, rather than buffering an unbounded amount of data.
+        """
+        if line_length > MAX_LINE_LENGTH:
+            message = "Response too long"
+        elif self._response_size + line_length > self.max_response_size:
+            message = "Response exceeded {} bytes".format(self.max_response_size)
+        elif self._response_line_count >= self.max_response_lines:
+            message = "Response exceeded {} lines".format(self.max_response_lines)
         else:
-            return None
+            return
+
+        if self.transport is not None:
+            self.transport.close()
+
+        raise SMTPResponseException(SMTPStatus.unrecognized_command, message)
+
+    def _reset_parser(self) -> None:
+        """
+        Discard any unparsed data, and partial response.
+        """
+        self._buffer_start = self._buffer_end = self._scan_offset = 0
+        self._response_lines = []
+        self._response_line_count = 0
+        self._response_size = 0
 
     async def read_response(self, timeout: Optional[float] = None) -> SMTPResponse:
         """
         Get a status response from the server.
 
-        This method must be awaited once per command sent; if multiple commands
-        are written to the transport without awaiting, response data will be lost.
+        This method must be awaited once per command sent. Responses are
+        returned in the order the commands were written (see
+        :meth:`_expect_response`), so multiple commands can be written to the
+        transport before awaiting (e.g. when pipelining).
 
         Returns an :class:`.response.SMTPResponse` namedtuple consisting of:
           - server response code (e.g. 250, or such, if all goes well)
           - server response string (multiline responses are converted to a
             single, multiline string).
         """
-        if self._response_waiter is None:
+        if self._responses:
+            waiter = self._responses.popleft()
+            self._unsolicited_response_count = min(
+                self._unsolicited_response_count, len(self._responses)
+            )
+        elif self.transport is None:
             raise SMTPServerDisconnected("Connection lost")
+        else:
+            waiter = self._loop.create_future()
+            self._response_waiters.append(waiter)
+
+        # A timer handle is much cheaper than asyncio.wait_for, which wraps the
+        # waiter in another future (or task, on older Pythons).
+        timeout_handle = None
+        if not waiter.done():
+            when = self._timeout_when(timeout)
+            if when is not None:
+                timeout_handle = self._loop.call_at(
+                    when, self._timeout_response_waiter, waiter
+                )
 
         try:
-            result = await asyncio.wait_for(
-                self._response_waiter, timeout
-            )  # type: SMTPResponse
-        except asyncio.TimeoutError as exc:
-            raise SMTPReadTimeoutError("Timed out waiting for server response") from exc
+            result = await waiter  # type: SMTPResponse
         finally:
-            # If we were disconnected, don't create a new waiter
-            if self.transport is None:
-                self._response_waiter = None
-            else:
-                self._response_waiter = self._loop.create_future()
+            if timeout_handle is not None:
+                timeout_handle.cancel()
 
         return result
 
-    def write(self, data: bytes) -> None:
+    def _timeout_when(self, timeout: Optional[float]) -> Optional[float]:
+        """
+        Get the loop time at which an operation started now times out, given
+        the timeout and any deadline set. Returns None if there's no limit.
+        """
+        when = self.deadline
+        if timeout is not None:
+            timeout_when = self._loop.time() + timeout
+            if when is None or timeout_when < when:
+                when = timeout_when
+
+        return when
+
+    def _timeout_response_waiter(self, waiter: "asyncio.Future[SMTPResponse]") -> None:
+        if not waiter.done():
+            waiter.set_exception(
+                SMTPReadTimeoutError("Timed out waiting for server response")
+            )
+
+    def _timeout_drain_waiter(self, waiter: "asyncio.Future[None]") -> None:
+        if not waiter.done():
+            waiter.set_exception(
+                SMTPTimeoutError("Timed out waiting for server to read data")
+            )
+        # Content was only partly written, so the connection can't be reused
+        if self.transport is not None:
+            self.transport.abort()
+
+    def write(self, data: Union[bytes, memoryview]) -> None:
         if self.transport is None or self.transport.is_closing():
             raise SMTPServerDisconnected("Connection lost")
 
         self.transport.write(data)
 
+    def writelines(self, parts: Iterable[Union[bytes, memoryview]]) -> None:
+        """
+        Write the parts given in one call, which the transport can pass to a
+        single (vectored, where supported) send.
+        """
+        if self.transport is None or self.transport.is_closing():
+            raise SMTPServerDisconnected("Connection lost")
+
+        self.transport.writelines(parts)
+
     async def execute_command(
         self, *args: bytes, timeout: Optional[float] = None
     ) -> SMTPResponse:
@@ -282,48 +681,327 @@ class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
         Sends an SMTP command along with any args to the server, and returns
         a response.
         """
+        return await self.execute_command_parts(command_parts(*args), timeout=timeout)
+
+    async def execute_command_parts(
+        self, parts: Sequence[bytes], timeout: Optional[float] = None
+    ) -> SMTPResponse:
+        """
+        Sends an SMTP command that has already been split into parts (see
+        :func:`command_parts`), including the trailing \\r\\n, and returns a
+        response.
+        """
         if self._command_lock is None:
             raise SMTPServerDisconnected("Server not connected")
-        command = b" ".join(args) + b"\r\n"
 
         async with self._command_lock:
-            self.write(command)
+            self.writelines(parts)
+            self._expect_response()
             response = await self.read_response(timeout=timeout)
 
         return response
 
     async def execute_data_command(
-        self, message: bytes, timeout: Optional[float] = None
+        self,
+        message: Union[bytes, AsyncIterable[bytes]],
+        timeout: Optional[float] = None,
+        prenormalized: bool = False,
     ) -> SMTPResponse:
         """
         Sends an SMTP DATA command to the server, followed by encoded message content.
+        The message may be given as bytes, or as an async iterable of bytes chunks,
+        which are encoded and written one at a time.
 
         Automatically quotes lines beginning with a period per RFC821.
         Lone \\\\r and \\\\n characters are converted to \\\\r\\\\n
-        characters.
+        characters, unless ``prenormalized`` is True, in which case line endings
+        are assumed to be \\\\r\\\\n already.
         """
         if self._command_lock is None:
             raise SMTPServerDisconnected("Server not connected")
 
-        message = LINE_ENDINGS_REGEX.sub(b"\r\n", message)
-        message = PERIOD_REGEX.sub(b"..", message)
-        if not message.endswith(b"\r\n"):
-            message += b"\r\n"
-        message += b".\r\n"
-
         async with self._command_lock:
-            self.write(b"DATA\r\n")
+            self.write(DATA_COMMAND)
+            self._expect_response()
             start_response = await self.read_response(timeout=timeout)
             if start_response.code != SMTPStatus.start_input:
                 raise SMTPDataError(start_response.code, start_response.message)
 
-            self.write(message)
+            await self._write_data(
+                message, prenormalized=prenormalized, timeout=timeout
+            )
+            self._expect_response()
             response = await self.read_response(timeout=timeout)
             if response.code != SMTPStatus.completed:
                 raise SMTPDataError(response.code, response.message)
 
         return response
 
+    async def execute_pipelined_commands(
+        self, commands: Sequence[Sequence[bytes]], timeout: Optional[float] = None
+    ) -> List[SMTPResponse]:
+        """
+        Sends the SMTP commands given as a single batch per RFC 2920, then reads
+        a response to each, in order. Response codes are not checked.
+
+        Each command is given as a sequence of parts, including the trailing
+        \\r\\n (see :func:`command_parts`).
+        """
+        if self._command_lock is None:
+            raise SMTPServerDisconnected("Server not connected")
+
+        batch = [part for command in commands for part in command]
+
+        async with self._command_lock:
+            self.writelines(batch)
+            for _ in commands:
+                self._expect_response()
+            responses = []  # type: List[SMTPResponse]
+            for _ in commands:
+                responses.append(await self.read_response(timeout=timeout))
+
+        return responses
+
+    async def execute_pipelined_data_command(
+        self,
+        commands: Sequence[Sequence[bytes]],
+        message: Union[bytes, AsyncIterable[bytes]],
+        timeout: Optional[float] = None,
+        prenormalized: bool = False,
+    ) -> Tuple[List[SMTPResponse], SMTPResponse]:
+        """
+        Sends the SMTP commands given (usually MAIL and RCPT), followed by DATA,
+        as a single batch per RFC 2920. Responses are then read in order, and if
+        the DATA command was accepted, the message content is sent.
+
+        Commands are given as for :meth:`execute_pipelined_commands`.
+
+        The first command is taken to be MAIL, and the rest RCPT. If MAIL was
+        refused, or every RCPT was, the server may still accept DATA; in that
+        case only the end of data marker is sent, not the message (RFC 2920
+        section 3.1).
+
+        Returns a tuple of the responses to each command given, and either the
+        response to the message content, or the response to DATA if it was
+        refused. Response codes are not checked; that is left to the caller.
+        """
+        if self._command_lock is None:
+            raise SMTPServerDisconnected("Server not connected")
+
+        batch = [part for command in commands for part in command]
+        batch.append(DATA_COMMAND)
+
+        async with self._command_lock:
+            self.writelines(batch)
+            # One response for each command, plus DATA
+            for _ in range(len(commands) + 1):
+                self._expect_response()
+            responses = []  # type: List[SMTPResponse]
+            for _ in commands:
+                responses.append(await self.read_response(timeout=timeout))
+
+            response = await self.read_response(timeout=timeout)
+            if response.code == SMTPStatus.start_input:
+                if envelope_accepted(responses):
+                    await self._write_data(
+                        message, prenormalized=prenormalized, timeout=timeout
+                    )
+                else:
+                    self.write(END_OF_DATA)
+                self._expect_response()
+                response = await self.read_response(timeout=timeout)
+
+        return responses, response
+
+    async def execute_bdat_command(
+        self,
+        message: Union[bytes, AsyncIterable[bytes]],
+        chunk_size: int,
+        timeout: Optional[float] = None,
+    ) -> SMTPResponse:
+        """
+        Sends message content to the server as a series of BDAT commands
+        (RFC 3030), each followed by a chunk of at most ``chunk_size`` bytes.
+        The message may be given as bytes, or as an async iterable of bytes.
+
+        Unlike DATA, content is sent as is, with no quoting of lines beginning
+        with a period, and no end of data marker. As the server doesn't need to
+        reply before accepting the next chunk, all chunks are written before any
+        responses are read.
+        """
+        if self._command_lock is None:
+            raise SMTPServerDisconnected("Server not connected")
+
+        if not isinstance(message, bytes):
+            return await self._execute_bdat_stream(message, chunk_size, timeout)
+
+        message_view = memoryview(message)
+        offsets = range(0, max(len(message), 1), chunk_size)
+
+        async with self._command_lock:
+            for offset in offsets:
+                chunk = message_view[offset : offset + chunk_size]
+                if offset + chunk_size >= len(message):
+                    command = "BDAT {} LAST\r\n".format(len(chunk))
+                else:
+                    command = "BDAT {}\r\n".format(len(chunk))
+                self.write(command.encode("ascii"))
+                self._expect_response()
+                await self._write_slices(chunk, timeout=timeout)
+
+            responses = []  # type: List[SMTPResponse]
+            for _ in offsets:
+                responses.append(await self.read_response(timeout=timeout))
+
+        for response in responses:
+            if response.code != SMTPStatus.completed:
+                raise SMTPDataError(response.code, response.message)
+
+        return responses[-1]
+
+    async def _execute_bdat_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        chunk_size: int,
+        timeout: Optional[float] = None,
+    ) -> SMTPResponse:
+        """
+        Streaming version of :meth:`.execute_bdat_command`. At most one BDAT
+        chunk (plus whatever was last read from the iterable) is held in memory.
+
+        Data read is kept as views of the (immutable) bytes received, and each
+        chunk is written as slices of those views, so content isn't copied,
+        and views handed to the transport can't change under it.
+        """
+        if self._command_lock is None:
+            raise SMTPServerDisconnected("Server not connected")
+
+        pending = collections.deque()  # type: Deque[memoryview]
+        pending_size = 0
+        command_count = 0
+        command = "BDAT {}\r\n".format(chunk_size).encode("ascii")
+
+        async with self._command_lock:
+            async for data in chunks:
+                if not data:
+                    continue
+                if not isinstance(data, bytes):
+                    data = bytes(data)
+                pending.append(memoryview(data))
+                pending_size += len(data)
+                # Always keep something back for the final (LAST) chunk
+                while pending_size > chunk_size:
+                    self.write(command)
+                    self._expect_response()
+                    remaining = chunk_size
+                    while remaining:
+                        view = pending[0]
+                        if len(view) > remaining:
+                            pending[0] = view[remaining:]
+                            view = view[:remaining]
+                        else:
+                            pending.popleft()
+                        await self._write_slices(view, timeout=timeout)
+                        remaining -= len(view)
+                    pending_size -= chunk_size
+                    command_count += 1
+
+            self.write("BDAT {} LAST\r\n".format(pending_size).encode("ascii"))
+            self._expect_response()
+            for view in pending:
+                await self._write_slices(view, timeout=timeout)
+            command_count += 1
+
+            responses = []  # type: List[SMTPResponse]
+            for _ in range(command_count):
+                responses.append(await self.read_response(timeout=timeout))
+
+        for response in responses:
+            if response.code != SMTPStatus.completed:
+                raise SMTPDataError(response.code, response.message)
+
+        return responses[-1]
+
+    async def _write_data(
+        self,
+        message: Union[bytes, AsyncIterable[bytes]],
+        prenormalized: bool = False,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Write message content following a DATA command, including the end of
+        data marker. Async iterables are encoded and written a chunk at a time.
+        Either way, content is written in slices, waiting for the transport's
+        write buffer to drain in between (see :meth:`_write_slices`).
+        """
+        if isinstance(message, bytes):
+            data = quote_data(message, prenormalized=prenormalized)
+            # Written separately, as joining would copy the whole message
+            await self._write_slices(data, timeout=timeout)
+            if data[-2:] == CRLF:
+                self.write(END_OF_DATA)
+            else:
+                self.write(CRLF_END_OF_DATA)
+            return
+
+        encoder = DataEncoder(prenormalized=prenormalized)
+        async for chunk in message:
+            data = encoder.encode(chunk)
+            if data:
+                await self._write_slices(data, timeout=timeout)
+
+        end_of_data = encoder.flush()
+        if encoder.at_line_start:
+            self.write(end_of_data + END_OF_DATA)
+        else:
+            self.write(end_of_data + CRLF_END_OF_DATA)
+
+    async def _write_slices(
+        self, data: Union[bytes, memoryview], timeout: Optional[float] = None
+    ) -> None:
+        """
+        Write the data given in slices of ``WRITE_SLICE_SIZE`` bytes, waiting
+        for the transport's write buffer to drain below its low water mark
+        whenever it goes over the high water mark. This keeps the memory held
+        in the write buffer bounded, however large the message is.
+        """
+        data_view = memoryview(data)
+        for offset in range(0, len(data_view), WRITE_SLICE_SIZE):
+            self.write(data_view[offset : offset + WRITE_SLICE_SIZE])
+            await self._drain_writer(timeout=timeout)
+
+    async def _drain_writer(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the transport's write buffer to drain, if writing is paused.
+
+        As for :meth:`read_response`, each wait is limited by the timeout given
+        and any deadline set, so a server that stops reading can't stall the
+        send indefinitely.
+        """
+        if self._connection_lost:
+            raise SMTPServerDisconnected("Connection lost")
+        if not self._paused:
+            return
+
+        waiter = self._loop.create_future()  # type: asyncio.Future[None]
+        self._drain_waiter = waiter
+        timeout_handle = None
+        when = self._timeout_when(timeout)
+        if when is not None:
+            timeout_handle = self._loop.call_at(
+                when, self._timeout_drain_waiter, waiter
+            )
+
+        try:
+            await waiter
+        except ConnectionError as exc:
+            raise SMTPServerDisconnected("Connection lost") from exc
+        finally:
+            if timeout_handle is not None:
+                timeout_handle.cancel()
+            if self._drain_waiter is waiter:
+                self._drain_waiter = None
+
     async def start_tls(
         self,
         tls_context: ssl.SSLContext,
@@ -339,7 +1017,8 @@ class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
             raise SMTPServerDisconnected("Server not connected")
 
         async with self._command_lock:
-            self.write(b"STARTTLS\r\n")
+            self.write(STARTTLS_COMMAND)
+            self._expect_response()
             response = await self.read_response(timeout=timeout)
             if response.code != SMTPStatus.ready:
                 raise SMTPResponseException(response.code, response.message)
@@ -348,6 +1027,13 @@ class SMTPProtocol(FlowControlMixin, asyncio.Protocol):
             if self.transport is None or self.transport.is_closing():
                 raise SMTPServerDisconnected("Connection lost")
 
+            if self.deadline is not None:
+                remaining = self.deadline - self._loop.time()
+                if remaining <= 0:
+                    raise SMTPTimeoutError("Timed out while upgrading transport")
+                if timeout is None or remaining < timeout:
+                    timeout = remaining
+
             try:
                 tls_transport = await start_tls(
                     self._loop,
@@ -0,0 +1,227 @@
+"""
+Hostname resolvers, for use with the ``resolver`` option.
+"""
+import asyncio
+import collections
+import ipaddress
+import socket
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .compat import get_running_loop
+from .happy_eyeballs import AddressInfo
+
+
+if TYPE_CHECKING:
+    from typing import OrderedDict  # noqa: F401
+
+
+__all__ = (
+    "CachingResolver",
+    "GetaddrinfoResolver",
+    "Resolution",
+    "Resolver",
+    "StubResolver",
+)
+
+
+DEFAULT_TTL = 60.0
+RESOLVER_CACHE_SIZE = 1024
+
+
+Resolution = NamedTuple(
+    "Resolution", [("addresses", Tuple[str, ...]), ("ttl", Optional[float])]
+)
+Resolution.__doc__ = """
+IP addresses for a hostname, and the time in seconds they can be cached for
+(None if unknown).
+"""
+
+
+def is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+
+    return True
+
+
+def address_infos(addresses: Iterable[str], port: int) -> List[AddressInfo]:
+    """
+    Build getaddrinfo style results for connecting to ``addresses`` on ``port``.
+    """
+    infos = []  # type: List[AddressInfo]
+    for address in addresses:
+        if ":" in address:
+            info = (
+                socket.AF_INET6,
+                socket.SOCK_STREAM,
+                socket.IPPROTO_TCP,
+                "",
+                (address, port, 0, 0),
+            )  # type: AddressInfo
+        else:
+            info = (
+                socket.AF_INET,
+                socket.SOCK_STREAM,
+                socket.IPPROTO_TCP,
+                "",
+                (address, port),
+            )
+        infos.append(info)
+
+    return infos
+
+
+class Resolver:
+    """
+    Base class for resolvers. Subclasses must implement :meth:`resolve`.
+    """
+
+    async def resolve(self, host: str) -> Resolution:
+        """
+        Look up the IP addresses of ``host``, in order of preference.
+
+        :raises OSError: the host could not be resolved
+        """
+        raise NotImplementedError
+
+
+class GetaddrinfoResolver(Resolver):
+    """
+    Resolves hostnames with the event loop's ``getaddrinfo`` (which usually
+    runs :py:func:`socket.getaddrinfo` in the default executor). TTLs aren't
+    available.
+    """
+
+    async def resolve(self, host: str) -> Resolution:
+        loop = get_running_loop()
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses = []  # type: List[str]
+        for info in infos:
+            address = str(info[4][0])
+            if address not in addresses:
+                addresses.append(address)
+
+        return Resolution(tuple(addresses), None)
+
+
+class StubResolver(Resolver):
+    """
+    Resolves hostnames from a fixed mapping of hostname to addresses, without
+    any network access. Intended for tests.
+    """
+
+    def __init__(
+        self, hosts: Dict[str, Iterable[str]], ttl: Optional[float] = None
+    ) -> None:
+        self.hosts = {
+            host.lower(): tuple(addresses) for host, addresses in hosts.items()
+        }
+        self.ttl = ttl
+        self.lookups = []  # type: List[str]
+
+    async def resolve(self, host: str) -> Resolution:
+        self.lookups.append(host)
+        try:
+            addresses = self.hosts[host.lower()]
+        except KeyError:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+        return Resolution(addresses, self.ttl)
+
+
+class CachingResolver(Resolver):
+    """
+    Caches the results of another resolver (by default,
+    :class:`GetaddrinfoResolver`) in memory.
+
+    Results are kept for their TTL, or ``default_ttl`` seconds if the resolver
+    doesn't provide one, limited to between ``min_ttl`` and ``max_ttl``.
+    Concurrent lookups of the same hostname share a single query. Static
+    addresses can be set for hostnames with :meth:`preload`; those never
+    expire.
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[Resolver] = None,
+        default_ttl: float = DEFAULT_TTL,
+        min_ttl: float = 0.0,
+        max_ttl: Optional[float] = None,
+        max_size: int = RESOLVER_CACHE_SIZE,
+        static: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> None:
+        self.resolver = resolver if resolver is not None else GetaddrinfoResolver()
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._static = {}  # type: Dict[str, Tuple[str, ...]]
+        # Hostname to (expiry time, addresses)
+        self._cache = (
+            collections.OrderedDict()
+        )  # type: OrderedDict[str, Tuple[float, Tuple[str, ...]]]
+        self._lookups = {}  # type: Dict[str, asyncio.Future]
+
+        for host, addresses in (static or {}).items():
+            self.preload(host, addresses)
+
+    def preload(self, host: str, addresses: Iterable[str]) -> None:
+        """
+        Always resolve ``host`` to the addresses given.
+        """
+        self._static[host.lower()] = tuple(addresses)
+
+    def clear(self) -> None:
+        """
+        Clear cached results (but not preloaded addresses).
+        """
+        self._cache.clear()
+
+    async def resolve(self, host: str) -> Resolution:
+        key = host.lower()
+        static = self._static.get(key)
+        if static is not None:
+            self.hits += 1
+            return Resolution(static, None)
+
+        cached = self._cache.get(key)
+        now = time.monotonic()
+        if cached is not None:
+            expires_at, addresses = cached
+            if expires_at > now:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return Resolution(addresses, expires_at - now)
+
+            del self._cache[key]
+
+        self.misses += 1
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = self._lookups[key] = asyncio.ensure_future(self._lookup(key))
+            lookup.add_done_callback(lambda _: self._lookups.pop(key, None))
+
+        # Don't cancel a lookup others might be waiting on
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, key: str) -> Resolution:
+        resolution = await self.resolver.resolve(key)
+
+        ttl = self.default_ttl if resolution.ttl is None else resolution.ttl
+        ttl = max(ttl, self.min_ttl)
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+
+        if ttl > 0 and resolution.addresses:
+            self._cache[key] = (time.monotonic() + ttl, resolution.addresses)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return Resolution(resolution.addresses, ttl)
@@ -1,10 +1,62 @@
 """
-SMTPResponse class, a simple namedtuple of (code, message).
+SMTPResponse class, a (code, message) pair that also gives the raw response
+text and any enhanced status code.
 """
-from typing import NamedTuple
+import re
+from typing import NamedTuple, Optional, cast
 
 
-__all__ = ("SMTPResponse",)
+__all__ = ("EnhancedStatusCode", "SMTPResponse", "parse_enhanced_status_code")
+
+
+ENHANCED_STATUS_CODE_REGEX = re.compile(
+    br"(?P<class>[245])\.(?P<subject>[0-9]{1,3})\.(?P<detail>[0-9]{1,3})(?:[ \t]|$)"
+)
+
+
+BaseEnhancedStatusCode = NamedTuple(
+    "EnhancedStatusCode", [("status_class", int), ("subject", int), ("detail", int)],
+)
+
+
+class EnhancedStatusCode(BaseEnhancedStatusCode):
+    """
+    NamedTuple of an enhanced mail system status code (RFC 3463), e.g.
+    ``4.7.0``, which is made up of a class (2, 4 or 5), subject and detail.
+
+        >>> code = EnhancedStatusCode(4, 7, 0)
+        >>> code.status_class
+        4
+        >>> str(code)
+        '4.7.0'
+
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return "{self.status_class}.{self.subject}.{self.detail}".format(self=self)
+
+
+def parse_enhanced_status_code(code: int, text: bytes) -> Optional[EnhancedStatusCode]:
+    """
+    Parse the enhanced status code (RFC 3463) from the start of the response
+    text given, if there is one. The class must match the first digit of the
+    reply code.
+    """
+    # Check the first character before bothering with a regex
+    if text[:1] not in (b"2", b"4", b"5") or text[0] - 48 != code // 100:
+        return None
+
+    match = ENHANCED_STATUS_CODE_REGEX.match(text)
+    if match is None:
+        return None
+
+    return EnhancedStatusCode(
+        int(match.group("class")),
+        int(match.group("subject")),
+        int(match.group("detail")),
+    )
 
 
 BaseResponse = NamedTuple("SMTPResponse", [("code", int), ("message", str)])
@@ -24,10 +76,41 @@ class SMTPResponse(BaseResponse):
         >>> response.code
         200
 
+    ``raw`` gives the message as bytes, as received from the server, and
+    ``enhanced_status_code`` the enhanced status code (RFC 3463) from the
+    start of the message, if any. Both are derived from the message when
+    accessed, so responses take no more memory than a plain tuple. Like
+    ``code`` and ``message``, they are read only.
     """
 
     __slots__ = ()
 
+    def __new__(
+        cls, code: int, message: Optional[str] = None, raw: Optional[bytes] = None
+    ) -> "SMTPResponse":
+        if message is None:
+            if raw is None:
+                raise ValueError("Either message or raw must be provided")
+            message = str(raw, "utf-8", "surrogateescape")
+
+        return cast(SMTPResponse, super().__new__(cls, code, message))  # type: ignore
+
+    @property
+    def raw(self) -> bytes:
+        """
+        The response text, as received. Messages are decoded with
+        ``surrogateescape``, so this is exactly the bytes received.
+        """
+        return self.message.encode("utf-8", "surrogateescape")
+
+    @property
+    def enhanced_status_code(self) -> Optional[EnhancedStatusCode]:
+        """
+        The enhanced status code (RFC 3463) given at the start of the response
+        text, or None if there isn't one.
+        """
+        return parse_enhanced_status_code(self.code, self.raw)
+
     def __repr__(self) -> str:
         return "({self.code}, {self.message})".format(self=self)
 
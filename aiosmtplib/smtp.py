@@ -9,19 +9,49 @@ Implementation is split into the following parent classes:
 """
 import asyncio
 from email.message import Message
-from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+from typing import (
+    AsyncIterable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 from .auth import SMTPAuth
-from .connection import SMTPConnection
+from .connection import DeadlineType, SMTPConnection, absolute_deadline
 from .default import Default, _default
-from .email import extract_recipients, extract_sender, flatten_message
+from .email import (
+    extract_recipients,
+    extract_sender,
+    flatten_message,
+    quote_address,
+)
 from .errors import (
+    SMTPDataError,
     SMTPNotSupported,
     SMTPRecipientRefused,
     SMTPRecipientsRefused,
     SMTPResponseException,
+    SMTPSenderRefused,
+    SMTPServerDisconnected,
+    SMTPTimeoutError,
 )
+from .esmtp import MAIL_FROM, RCPT_TO, option_parts
+from .protocol import CRLF, DataEncoder, normalize_line_endings
 from .response import SMTPResponse
+from .status import SMTPStatus
+from .streams import (
+    EncodedChunks,
+    MessageContent,
+    OpenMessageContent,
+    message_chunks,
+    message_size,
+    open_message_file,
+)
 from .sync import async_to_sync
 
 
@@ -58,10 +88,12 @@ class SMTP(SMTPAuth):
         self,
         sender: str,
         recipients: Union[str, Sequence[str]],
-        message: Union[str, bytes],
+        message: MessageContent,
         mail_options: Optional[Iterable[str]] = None,
         rcpt_options: Optional[Iterable[str]] = None,
         timeout: Optional[Union[float, Default]] = _default,
+        prenormalized: bool = False,
+        deadline: Optional[DeadlineType] = None,
     ) -> Tuple[Dict[str, SMTPResponse], str]:
         """
         This command performs an entire mail transaction.
@@ -80,9 +112,29 @@ class SMTP(SMTPAuth):
         The string is encoded to bytes using the ascii codec, and lone \\\\r
         and \\\\n characters are converted to \\\\r\\\\n characters.
 
+        message may also be given as a binary file object, an async iterable of
+        bytes chunks, or a path to a file, in which case it is streamed to the
+        server a chunk at a time rather than loaded into memory.
+
+        If ``prenormalized`` is True, the message line endings are assumed to be
+        \\\\r\\\\n already, and are not checked or converted.
+
         If there has been no previous HELO or EHLO command this session, this
         method tries EHLO first.
 
+        ``timeout`` applies to each command sent. To limit the time taken by the
+        whole transaction, pass a ``deadline``, either as a number of seconds from
+        now or as a :py:class:`datetime.datetime`. Every command shares the time
+        remaining, and :exc:`.SMTPTimeoutError` is raised once it runs out.
+
+        If the server supports the PIPELINING extension (RFC 2920), the MAIL,
+        RCPT and DATA commands are sent in a single batch, rather than waiting
+        for a response to each one.
+
+        If the server supports the CHUNKING extension (RFC 3030), and the
+        ``chunk_size`` option is set, the message is sent using BDAT rather than
+        DATA, so lines beginning with a period don't need to be quoted.
+
         This method will return normally if the mail is accepted for at least
         one recipient.  It returns a tuple consisting of:
 
@@ -127,6 +179,19 @@ class SMTP(SMTPAuth):
         :raises SMTPRecipientsRefused: delivery to all recipients failed
         :raises SMTPResponseException: on invalid response
         """
+        if hasattr(message, "__fspath__"):
+            with await open_message_file(message) as message_file:
+                return await self.sendmail(
+                    sender,
+                    recipients,
+                    message_file,
+                    mail_options=mail_options,
+                    rcpt_options=rcpt_options,
+                    timeout=timeout,
+                    prenormalized=prenormalized,
+                    deadline=deadline,
+                )
+
         if isinstance(recipients, str):
             recipients = [recipients]
         if mail_options is None:
@@ -138,26 +203,90 @@ class SMTP(SMTPAuth):
         else:
             rcpt_options = list(rcpt_options)
 
+        if self._sendmail_lock is None:
+            self._sendmail_lock = asyncio.Lock()
+
+        # Converted now, so that time spent waiting for the lock counts, but
+        # only applied once the lock is held, as it affects the whole client.
+        deadline = absolute_deadline(deadline)
+        async with self._sendmail_lock:
+            with self._deadline_scope(deadline):
+                return await self._sendmail(
+                    sender,
+                    recipients,
+                    cast(OpenMessageContent, message),  # Paths are opened above
+                    mail_options,
+                    rcpt_options,
+                    timeout=timeout,
+                    prenormalized=prenormalized,
+                )
+
+    async def _sendmail(
+        self,
+        sender: str,
+        recipients: Sequence[str],
+        message: OpenMessageContent,
+        mail_options: List[str],
+        rcpt_options: List[str],
+        timeout: Optional[Union[float, Default]] = _default,
+        prenormalized: bool = False,
+    ) -> Tuple[Dict[str, SMTPResponse], str]:
+        """
+        Perform a mail transaction, as for :meth:`.sendmail`. The caller must
+        hold the sendmail lock.
+        """
         if any(option.lower() == "smtputf8" for option in mail_options):
             mailbox_encoding = "utf-8"
         else:
             mailbox_encoding = "ascii"
 
-        if self._sendmail_lock is None:
-            self._sendmail_lock = asyncio.Lock()
+        # Make sure we've done an EHLO for extension checks
+        await self._ehlo_or_helo_if_needed()
 
-        async with self._sendmail_lock:
-            # Make sure we've done an EHLO for extension checks
-            await self._ehlo_or_helo_if_needed()
+        if mailbox_encoding == "utf-8" and not self.supports_extension("smtputf8"):
+            raise SMTPNotSupported("SMTPUTF8 is not supported by this server")
 
-            if mailbox_encoding == "utf-8" and not self.supports_extension("smtputf8"):
-                raise SMTPNotSupported("SMTPUTF8 is not supported by this server")
+        message_length = message_size(message)
+        if message_length is not None and self.supports_extension("size"):
+            size_option = "size={}".format(message_length)
+            mail_options.insert(0, size_option)
 
-            if self.supports_extension("size"):
-                size_option = "size={}".format(len(message))
-                mail_options.insert(0, size_option)
+        if isinstance(message, str):
+            message = message.encode("ascii")
+        elif not isinstance(message, bytes):
+            message = message_chunks(message)
 
-            try:
+        chunked = self.chunk_size is not None and self.supports_extension("chunking")
+        binarymime = any(option.lower() == "body=binarymime" for option in mail_options)
+        if binarymime and not chunked:
+            raise SMTPNotSupported(
+                "BODY=BINARYMIME requires CHUNKING, which is not available"
+            )
+        # BDAT sends content as is, so line endings must be fixed here
+        # (unless the message contains binary data)
+        if chunked and not binarymime:
+            if isinstance(message, bytes):
+                message = normalize_line_endings(message, prenormalized=prenormalized)
+            else:
+                message = EncodedChunks(
+                    message,
+                    DataEncoder(quote_periods=False, prenormalized=prenormalized),
+                )
+
+        try:
+            if self.supports_extension("pipelining"):
+                recipient_errors, response = await self._send_pipelined(
+                    sender,
+                    recipients,
+                    message,
+                    mail_options,
+                    rcpt_options,
+                    encoding=mailbox_encoding,
+                    chunked=chunked,
+                    timeout=timeout,
+                    prenormalized=prenormalized,
+                )
+            else:
                 await self.mail(
                     sender,
                     options=mail_options,
@@ -167,16 +296,21 @@ class SMTP(SMTPAuth):
                 recipient_errors = await self._send_recipients(
                     recipients, rcpt_options, encoding=mailbox_encoding, timeout=timeout
                 )
-                response = await self.data(message, timeout=timeout)
-            except (SMTPResponseException, SMTPRecipientsRefused) as exc:
-                # If we got an error, reset the envelope.
-                try:
-                    await self.rset(timeout=timeout)
-                except (ConnectionError, SMTPResponseException):
-                    # If we're disconnected on the reset, or we get a bad
-                    # status, don't raise that as it's confusing
-                    pass
-                raise exc
+                if chunked:
+                    response = await self.bdat(message, timeout=timeout)
+                else:
+                    response = await self.data(
+                        message, timeout=timeout, prenormalized=prenormalized
+                    )
+        except (SMTPResponseException, SMTPRecipientsRefused) as exc:
+            # If we got an error, reset the envelope.
+            try:
+                await self.rset(timeout=timeout)
+            except (ConnectionError, SMTPResponseException, SMTPTimeoutError):
+                # If we're disconnected on the reset, we get a bad status, or
+                # we're out of time, don't raise that as it's confusing
+                pass
+            raise exc
 
         return recipient_errors, response.message
 
@@ -210,6 +344,104 @@ class SMTP(SMTPAuth):
 
         return formatted_errors
 
+    async def _send_pipelined(
+        self,
+        sender: str,
+        recipients: Sequence[str],
+        message: Union[bytes, AsyncIterable[bytes]],
+        mail_options: Iterable[str],
+        rcpt_options: Iterable[str],
+        encoding: str = "ascii",
+        chunked: bool = False,
+        timeout: Optional[Union[float, Default]] = _default,
+        prenormalized: bool = False,
+    ) -> Tuple[Dict[str, SMTPResponse], SMTPResponse]:
+        """
+        Send the MAIL and RCPT commands as a single batch (RFC 2920), followed
+        by the message. Used as part of :meth:`.sendmail`.
+
+        When sending with DATA, the DATA command is included in the batch. When
+        sending with BDAT, the message chunks are sent as a second batch.
+
+        Responses are checked in the order the commands were sent, so errors are
+        raised the same way as they would be without pipelining.
+        """
+        # As pipelining accesses protocol directly, some handling is required
+        if self.protocol is None:
+            raise SMTPServerDisconnected("Connection lost")
+
+        if timeout is _default:
+            timeout = self.timeout
+
+        rcpt_options_parts = option_parts(tuple(rcpt_options))
+        commands = [
+            [
+                MAIL_FROM,
+                quote_address(sender).encode(encoding),
+                *option_parts(tuple(mail_options)),
+                CRLF,
+            ]
+        ]
+        for address in recipients:
+            commands.append(
+                [
+                    RCPT_TO,
+                    quote_address(address).encode(encoding),
+                    *rcpt_options_parts,
+                    CRLF,
+                ]
+            )
+
+        if chunked:
+            responses = await self.protocol.execute_pipelined_commands(
+                commands, timeout=timeout
+            )
+            recipient_errors = self._check_pipelined_responses(
+                sender, recipients, responses
+            )
+            response = await self.bdat(message, timeout=timeout)
+        else:
+            responses, response = await self.protocol.execute_pipelined_data_command(
+                commands, message, timeout=timeout, prenormalized=prenormalized
+            )
+            recipient_errors = self._check_pipelined_responses(
+                sender, recipients, responses + [response]
+            )
+            if response.code != SMTPStatus.completed:
+                raise SMTPDataError(response.code, response.message)
+
+        return recipient_errors, response
+
+    def _check_pipelined_responses(
+        self, sender: str, recipients: Sequence[str], responses: Sequence[SMTPResponse],
+    ) -> Dict[str, SMTPResponse]:
+        """
+        Check the responses to a pipelined MAIL command and RCPT commands
+        (in that order), and return any recipient errors.
+        """
+        # If the server is unavailable, be nice and close the connection
+        if any(resp.code == SMTPStatus.domain_unavailable for resp in responses):
+            self.close()
+
+        mail_response = responses[0]
+        if mail_response.code != SMTPStatus.completed:
+            raise SMTPSenderRefused(mail_response.code, mail_response.message, sender)
+
+        recipient_errors = [
+            SMTPRecipientRefused(rcpt_response.code, rcpt_response.message, address)
+            for address, rcpt_response in zip(recipients, responses[1:])
+            if rcpt_response.code not in (SMTPStatus.completed, SMTPStatus.will_forward)
+        ]
+        if len(recipient_errors) == len(recipients):
+            raise SMTPRecipientsRefused(recipient_errors)
+
+        formatted_errors = {
+            err.recipient: SMTPResponse(err.code, err.message)
+            for err in recipient_errors
+        }
+
+        return formatted_errors
+
     async def send_message(
         self,
         message: Message,
@@ -218,6 +450,7 @@ class SMTP(SMTPAuth):
         mail_options: Optional[Iterable[str]] = None,
         rcpt_options: Optional[Iterable[str]] = None,
         timeout: Optional[Union[float, Default]] = _default,
+        deadline: Optional[DeadlineType] = None,
     ) -> Tuple[Dict[str, SMTPResponse], str]:
         r"""
         Sends an :py:class:`email.message.EmailMessage` object.
@@ -231,6 +464,15 @@ class SMTP(SMTPAuth):
         object is then serialized using :py:class:`email.generator.Generator` and
         :meth:`.sendmail` is called to transmit the message.
 
+        If a ``deadline`` is given, it applies to the whole transaction, as
+        described for :meth:`.sendmail`.
+
+        If the ``chunk_size`` option is set, and the server supports both
+        BINARYMIME and CHUNKING (RFC 3030), the message is sent with
+        ``BODY=BINARYMIME``, and non-text parts are sent as raw binary data rather
+        than base64 encoded. Otherwise, the message is generated for 8BITMIME (if
+        supported) or 7bit transport, as usual.
+
         'Resent-Date' is a mandatory field if the message is resent (RFC 2822
         Section 3.6.6). In such a case, we use the 'Resent-\*' fields.
         However, if there is more than one 'Resent-' block there's no way to
@@ -261,6 +503,39 @@ class SMTP(SMTPAuth):
         if not recipients:
             raise ValueError("No recipient headers provided in message")
 
+        if rcpt_options is None:
+            rcpt_options = []
+        else:
+            rcpt_options = list(rcpt_options)
+
+        if self._sendmail_lock is None:
+            self._sendmail_lock = asyncio.Lock()
+
+        deadline = absolute_deadline(deadline)
+        async with self._sendmail_lock:
+            with self._deadline_scope(deadline):
+                return await self._send_message(
+                    message,
+                    sender,
+                    recipients,
+                    mail_options,
+                    rcpt_options,
+                    timeout=timeout,
+                )
+
+    async def _send_message(
+        self,
+        message: Message,
+        sender: str,
+        recipients: Sequence[str],
+        mail_options: List[str],
+        rcpt_options: List[str],
+        timeout: Optional[Union[float, Default]] = _default,
+    ) -> Tuple[Dict[str, SMTPResponse], str]:
+        """
+        Flatten and send a message, as for :meth:`.send_message`. The caller must
+        hold the sendmail lock.
+        """
         # Make sure we've done an EHLO for extension checks
         await self._ehlo_or_helo_if_needed()
 
@@ -281,7 +556,19 @@ class SMTP(SMTPAuth):
             elif "smtputf8" not in [option.lower() for option in mail_options]:
                 mail_options.append("SMTPUTF8")
 
-        if self.supports_extension("8BITMIME"):
+        body_options = [
+            option.lower() for option in mail_options if option.lower()[:5] == "body="
+        ]
+        if (
+            self.chunk_size is not None
+            and self.supports_extension("chunking")
+            and self.supports_extension("binarymime")
+            and body_options in ([], ["body=binarymime"])
+        ):
+            if not body_options:
+                mail_options.append("BODY=BINARYMIME")
+            cte_type = "binary"
+        elif self.supports_extension("8BITMIME"):
             if "body=8bitmime" not in [option.lower() for option in mail_options]:
                 mail_options.append("BODY=8BITMIME")
             cte_type = "8bit"
@@ -290,12 +577,12 @@ class SMTP(SMTPAuth):
 
         flat_message = flatten_message(message, utf8=utf8_required, cte_type=cte_type)
 
-        return await self.sendmail(
+        return await self._sendmail(
             sender,
             recipients,
             flat_message,
-            mail_options=mail_options,
-            rcpt_options=rcpt_options,
+            mail_options,
+            rcpt_options,
             timeout=timeout,
         )
 
@@ -0,0 +1,143 @@
+"""
+Helpers for sending message content from files and async iterables, without
+loading the whole message into memory.
+"""
+import asyncio
+import io
+import os
+import sys
+from typing import IO, Any, AsyncIterable, Optional, Union, cast
+
+from .protocol import DataEncoder
+
+
+__all__ = (
+    "EncodedChunks",
+    "FileChunks",
+    "MessageContent",
+    "MessageStream",
+    "OpenMessageContent",
+    "message_chunks",
+    "message_size",
+    "open_message_file",
+)
+
+
+READ_SIZE = 64 * 1024
+
+
+# Message content that is read a chunk at a time
+MessageStream = Union[IO[Any], AsyncIterable[Any]]
+
+# Message content other than a path, i.e. once any path has been opened
+OpenMessageContent = Union[
+    str, bytes, IO[Any], AsyncIterable[bytes], AsyncIterable[str]
+]
+
+# Mypy special cases sys.version checks
+if sys.version_info >= (3, 6):
+    MessageContent = Union[OpenMessageContent, os.PathLike]
+else:
+    MessageContent = OpenMessageContent
+
+
+class FileChunks:
+    """
+    Async iterator over the contents of a file object, read in chunks of
+    ``read_size`` in the default executor. Text is encoded as ASCII.
+    """
+
+    def __init__(self, file: IO[Any], read_size: int = READ_SIZE) -> None:
+        self.file = file
+        self.read_size = read_size
+
+    def __aiter__(self) -> "FileChunks":
+        return self
+
+    async def __anext__(self) -> bytes:
+        loop = asyncio.get_event_loop()
+        chunk = await loop.run_in_executor(None, self.file.read, self.read_size)
+        if not chunk:
+            raise StopAsyncIteration
+
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii")
+
+        return chunk
+
+
+class EncodedChunks:
+    """
+    Async iterator that passes chunks from another async iterable through a
+    :class:`.protocol.DataEncoder`. Text is encoded as ASCII.
+    """
+
+    def __init__(
+        self,
+        chunks: Union[AsyncIterable[bytes], AsyncIterable[str]],
+        encoder: Optional[DataEncoder] = None,
+    ) -> None:
+        self._iterator = chunks.__aiter__()
+        self.encoder = encoder
+        self._flushed = False
+
+    def __aiter__(self) -> "EncodedChunks":
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            if self.encoder is None or self._flushed:
+                raise
+            self._flushed = True
+            remainder = self.encoder.flush()
+            if not remainder:
+                raise
+            return remainder
+
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii")
+        if self.encoder is not None:
+            chunk = self.encoder.encode(chunk)
+
+        return chunk
+
+
+def message_chunks(message: MessageStream) -> EncodedChunks:
+    """
+    Wrap a file object or async iterable as an async iterator of bytes.
+    """
+    if isinstance(message, EncodedChunks):
+        return message
+    if hasattr(message, "read"):
+        return EncodedChunks(FileChunks(message))  # type: ignore
+
+    return EncodedChunks(cast(AsyncIterable[Any], message))
+
+
+async def open_message_file(path: Any) -> IO[bytes]:
+    """
+    Open the message file at ``path`` for reading, in the default executor,
+    so a slow filesystem doesn't block the event loop.
+    """
+    loop = asyncio.get_event_loop()
+
+    return await loop.run_in_executor(None, open, path, "rb")
+
+
+def message_size(message: Any) -> Optional[int]:
+    """
+    Return the size of the message given, if it can be determined without
+    reading it (e.g. for bytes, or a file on disk).
+    """
+    if isinstance(message, (str, bytes)):
+        return len(message)
+
+    try:
+        fileno = message.fileno()
+        position = message.tell()
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+    return max(os.fstat(fileno).st_size - position, 0)
@@ -0,0 +1,224 @@
+"""
+TLS helpers.
+"""
+import collections
+import functools
+import os
+import ssl
+import weakref
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+
+if TYPE_CHECKING:
+    from typing import MutableMapping, OrderedDict  # noqa: F401
+
+
+__all__ = (
+    "TLSSessionCache",
+    "enable_session_resumption",
+    "get_session_cache",
+    "get_tls_context",
+)
+
+
+TLS_CONTEXT_CACHE_SIZE = 32
+TLS_SESSION_CACHE_SIZE = 256
+# Session resumption requires SSLObject.session, added in 3.6
+SUPPORTS_SESSIONS = hasattr(ssl, "SSLSession")
+
+# Modification time, size and inode of a file
+FileStamp = Tuple[int, int, int]
+
+
+def file_stamp(path: Optional[str]) -> Optional[FileStamp]:
+    """
+    Identify the current version of the file at ``path``, so that contexts
+    built from it can be rebuilt when it changes.
+    """
+    if path is None:
+        return None
+
+    stat = os.stat(path)
+
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def get_tls_context(
+    validate_certs: bool,
+    cert_bundle: Optional[str] = None,
+    client_cert: Optional[str] = None,
+    client_key: Optional[str] = None,
+) -> ssl.SSLContext:
+    """
+    Get a client side :py:class:`ssl.SSLContext` for the options given.
+
+    Contexts are cached, as loading certificates (in particular the CA
+    bundle) is expensive. Cached contexts are shared, and rebuilt if any of
+    the certificate or key files have changed since.
+    """
+    try:
+        stamps = (
+            file_stamp(cert_bundle),
+            file_stamp(client_cert),
+            file_stamp(client_key),
+        )
+    except OSError:
+        # Let loading the files raise the appropriate error
+        return create_tls_context(validate_certs, cert_bundle, client_cert, client_key)
+
+    return _cached_tls_context(
+        bool(validate_certs), cert_bundle, client_cert, client_key, stamps
+    )
+
+
+@functools.lru_cache(maxsize=TLS_CONTEXT_CACHE_SIZE)
+def _cached_tls_context(
+    validate_certs: bool,
+    cert_bundle: Optional[str],
+    client_cert: Optional[str],
+    client_key: Optional[str],
+    stamps: Tuple[Optional[FileStamp], ...],
+) -> ssl.SSLContext:
+    context = create_tls_context(validate_certs, cert_bundle, client_cert, client_key)
+    enable_session_resumption(context)
+
+    return context
+
+
+def create_tls_context(
+    validate_certs: bool,
+    cert_bundle: Optional[str] = None,
+    client_cert: Optional[str] = None,
+    client_key: Optional[str] = None,
+) -> ssl.SSLContext:
+    """
+    Build an SSLContext object from the options given.
+    """
+    # SERVER_AUTH is what we want for a client side socket
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    context.check_hostname = bool(validate_certs)
+    if validate_certs:
+        context.verify_mode = ssl.CERT_REQUIRED
+    else:
+        context.verify_mode = ssl.CERT_NONE
+
+    if cert_bundle is not None:
+        context.load_verify_locations(cafile=cert_bundle)
+
+    if client_cert is not None:
+        context.load_cert_chain(client_cert, keyfile=client_key)
+
+    return context
+
+
+class TLSSessionCache:
+    """
+    TLS sessions to resume, by server hostname, for a single
+    :py:class:`ssl.SSLContext` (sessions can only be resumed with the context
+    they were created with).
+
+    ``hits`` and ``misses`` count handshakes that did, and did not, resume a
+    session.
+    """
+
+    def __init__(self, max_size: int = TLS_SESSION_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._sessions = (
+            collections.OrderedDict()
+        )  # type: OrderedDict[str, ssl.SSLSession]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, server_hostname: str) -> Optional[ssl.SSLSession]:
+        """
+        Get the session to offer when connecting to ``server_hostname``.
+        """
+        return self._sessions.get(server_hostname)
+
+    def store(self, server_hostname: str, ssl_object: Any) -> None:
+        """
+        Keep the current session of ``ssl_object`` (an
+        :py:class:`ssl.SSLObject`) to offer on the next connection. With TLS
+        1.3, the session ticket arrives after the handshake, so this should be
+        repeated before closing the connection.
+        """
+        session = getattr(ssl_object, "session", None)
+        if session is None:
+            return
+
+        self._sessions[server_hostname] = session
+        self._sessions.move_to_end(server_hostname)
+        if len(self._sessions) > self.max_size:
+            self._sessions.popitem(last=False)
+
+    def record_handshake(self, server_hostname: str, ssl_object: Any) -> None:
+        """
+        Count a completed handshake as a hit or miss, and keep its session.
+        """
+        if getattr(ssl_object, "session_reused", False):
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        self.store(server_hostname, ssl_object)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+
+_session_caches = (
+    weakref.WeakKeyDictionary()
+)  # type: MutableMapping[ssl.SSLContext, TLSSessionCache]
+
+
+def enable_session_resumption(context: ssl.SSLContext) -> TLSSessionCache:
+    """
+    Offer previous sessions for the same server hostname on new client
+    connections using ``context``, for abbreviated handshakes. Contexts built
+    from connection options have this enabled already; it can be enabled on
+    a context passed as ``tls_context`` by calling this function first.
+
+    Returns the session cache for the context.
+    """
+    session_cache = _session_caches.get(context)
+    if session_cache is not None:
+        return session_cache
+
+    session_cache = _session_caches[context] = TLSSessionCache()
+    if not SUPPORTS_SESSIONS:
+        return session_cache
+
+    wrap_bio = context.wrap_bio
+
+    def resuming_wrap_bio(
+        incoming: ssl.MemoryBIO,
+        outgoing: ssl.MemoryBIO,
+        server_side: bool = False,
+        server_hostname: Optional[str] = None,
+        session: Optional[ssl.SSLSession] = None,
+    ) -> ssl.SSLObject:
+        # Called by asyncio to create the SSLObject for each connection
+        if session is None and not server_side and server_hostname is not None:
+            session = session_cache.get(server_hostname)
+
+        return wrap_bio(
+            incoming,
+            outgoing,
+            server_side=server_side,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+    context.wrap_bio = resuming_wrap_bio  # type: ignore
+
+    return session_cache
+
+
+def get_session_cache(context: ssl.SSLContext) -> Optional[TLSSessionCache]:
+    """
+    Get the session cache for ``context``, if session resumption is enabled.
+    """
+    return _session_caches.get(context)
@@ -51,6 +51,16 @@ class TestSMTPD(SMTPD):
         except HeaderParseError:
             return None, ""
 
+    def _getparams(self, params):
+        """
+        Accept BODY=BINARYMIME (RFC 3030), which aiosmtpd rejects.
+        """
+        result = super()._getparams(params)
+        if result is not None and result.get("BODY") == "BINARYMIME":
+            del result["BODY"]
+
+        return result
+
     async def _call_handler_hook(self, command, *args):
         self.event_handler.record_command(command, *args)
         return await super()._call_handler_hook(command, *args)
@@ -104,6 +114,35 @@ class TestSMTPD(SMTPD):
         self.transport = self._tls_protocol._app_transport
         self._tls_protocol.connection_made(self._original_transport)
 
+    async def smtp_BDAT(self, arg):
+        """
+        Minimal CHUNKING (RFC 3030) support.
+        """
+        self.event_handler.record_command("BDAT", arg)
+
+        args = arg.split() if arg else []
+        if not args or not args[0].isdigit():
+            await self.push("501 Syntax: BDAT chunk-size [LAST]")
+            return
+
+        chunk = await self._reader.readexactly(int(args[0]))
+        if not self.envelope.rcpt_tos:
+            await self.push("503 Error: need RCPT command")
+            return
+
+        chunks = getattr(self.envelope, "chunks", [])
+        chunks.append(chunk)
+        self.envelope.chunks = chunks
+        if len(args) == 1 or args[1].upper() != "LAST":
+            await self.push("250 {} octets received".format(len(chunk)))
+            return
+
+        self.envelope.content = self.envelope.original_content = b"".join(chunks)
+        # Skip recording this as a DATA command
+        status = await super()._call_handler_hook("DATA")
+        self._set_post_data_state()
+        await self.push("250 OK" if status is MISSING else status)
+
     async def smtp_AUTH(self, arg):
         self.event_handler.record_command("AUTH", arg)
         if not self._tls_protocol:
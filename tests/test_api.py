@@ -3,7 +3,8 @@ send coroutine testing.
 """
 import pytest
 
-from aiosmtplib import send
+from aiosmtplib import SMTPConnectionPool, send
+from aiosmtplib.pool import default_pool
 
 
 pytestmark = pytest.mark.asyncio()
@@ -114,3 +115,63 @@ async def test_send_with_login(
     assert not errors
     assert "AUTH" in [command[0] for command in received_commands]
     assert len(received_messages) == 1
+
+
+async def test_send_with_pool(
+    hostname, smtpd_server_port, message, received_messages, received_commands
+):
+    async with SMTPConnectionPool() as pool:
+        for _ in range(2):
+            errors, response = await send(  # nosec
+                message,
+                hostname=hostname,
+                port=smtpd_server_port,
+                start_tls=True,
+                validate_certs=False,
+                username="test",
+                password="test",
+                pool=pool,
+            )
+
+            assert not errors
+
+    commands = [command[0] for command in received_commands]
+    assert commands.count("STARTTLS") == 1
+    assert commands.count("AUTH") == 1
+    assert len(received_messages) == 2
+
+
+async def test_send_with_default_pool(
+    hostname, smtpd_server_port, message, received_messages, received_commands
+):
+    pool = default_pool()
+    try:
+        for _ in range(2):
+            errors, response = await send(
+                message, hostname=hostname, port=smtpd_server_port, pool=True
+            )
+
+            assert not errors
+    finally:
+        await pool.close()
+
+    commands = [command[0] for command in received_commands]
+    assert commands.count("EHLO") == 1
+    assert len(received_messages) == 2
+    assert default_pool() is not pool
+
+
+async def test_send_with_pool_and_deadline(
+    hostname, smtpd_server_port, message, received_messages
+):
+    async with SMTPConnectionPool() as pool:
+        errors, response = await send(
+            message, hostname=hostname, port=smtpd_server_port, pool=pool, deadline=1.0
+        )
+
+        assert not errors
+        # The deadline doesn't apply to the pooled connection after sending
+        async with pool.connection(hostname=hostname, port=smtpd_server_port) as client:
+            assert client._deadline is None
+
+    assert len(received_messages) == 1
@@ -565,6 +565,15 @@ async def test_data_complete_error(
         assert exception_info.value.code == error_code
 
 
+async def test_bdat_not_supported(smtp_client, smtpd_server):
+    async with smtp_client:
+        await smtp_client.ehlo()
+        await smtp_client.mail("j@example.com")
+        await smtp_client.rcpt("test@example.com")
+        with pytest.raises(SMTPNotSupported):
+            await smtp_client.bdat(b"HELLO WORLD")
+
+
 async def test_gibberish_raises_exception(
     smtp_client, smtpd_server, smtpd_class, smtpd_response_handler_factory, monkeypatch
 ):
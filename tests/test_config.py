@@ -67,6 +67,151 @@ async def test_port_and_socket_path_raises():
         SMTP(port=1, socket_path="/tmp/test")  # nosec
 
 
+async def test_chunk_size_zero_raises():
+    with pytest.raises(ValueError):
+        SMTP(chunk_size=0)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    ({"max_response_size": 0}, {"max_response_lines": 0}),
+    ids=("max_response_size", "max_response_lines"),
+)
+async def test_response_limits_zero_raises(kwargs):
+    with pytest.raises(ValueError):
+        SMTP(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        {"write_buffer_high_water": -1},
+        {"write_buffer_low_water": -1},
+        {"write_buffer_high_water": 1024, "write_buffer_low_water": 2048},
+    ),
+    ids=("negative_high_water", "negative_low_water", "low_above_high"),
+)
+async def test_write_buffer_limits_invalid_raises(kwargs):
+    with pytest.raises(ValueError):
+        SMTP(**kwargs)
+
+
+async def test_write_buffer_limits_set_on_transport(hostname, smtpd_server_port):
+    client = SMTP(
+        hostname=hostname,
+        port=smtpd_server_port,
+        write_buffer_high_water=32768,
+        write_buffer_low_water=4096,
+    )
+
+    async with client:
+        assert client.transport.get_write_buffer_limits() == (4096, 32768)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        {"keepalive_idle": 30},
+        {"keepalive": True, "keepalive_interval": 0},
+        {"keepalive": True, "keepalive_count": -1},
+        {"send_buffer_size": 0},
+        {"receive_buffer_size": -1},
+    ),
+    ids=(
+        "keepalive_idle_without_keepalive",
+        "zero_keepalive_interval",
+        "negative_keepalive_count",
+        "zero_send_buffer_size",
+        "negative_receive_buffer_size",
+    ),
+)
+async def test_socket_options_invalid_raises(kwargs):
+    with pytest.raises(ValueError):
+        SMTP(**kwargs)
+
+
+async def test_socket_options_set_on_socket(hostname, smtpd_server_port):
+    client = SMTP(
+        hostname=hostname,
+        port=smtpd_server_port,
+        keepalive=True,
+        keepalive_idle=30,
+        keepalive_interval=10,
+        keepalive_count=3,
+        send_buffer_size=32768,
+        receive_buffer_size=32768,
+    )
+
+    async with client:
+        sock = client.transport.get_extra_info("socket")
+
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+        # Linux doubles the requested buffer sizes
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) >= 32768
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) >= 32768
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE) == 30
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL) == 10
+        if hasattr(socket, "TCP_KEEPCNT"):
+            assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT) == 3
+
+
+@pytest.mark.parametrize(
+    "happy_eyeballs_delay", [0.25, None], ids=["happy_eyeballs", "sequential"]
+)
+async def test_buffer_sizes_set_before_connect(
+    event_loop, monkeypatch, hostname, smtpd_server_port, happy_eyeballs_delay
+):
+    # The kernel may adjust the size requested, so check against a probe socket
+    with socket.socket() as probe:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        expected_size = probe.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+    buffer_sizes = []
+    original_sock_connect = event_loop.sock_connect
+
+    async def sock_connect(sock, address):
+        buffer_sizes.append(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
+        return await original_sock_connect(sock, address)
+
+    monkeypatch.setattr(event_loop, "sock_connect", sock_connect)
+    client = SMTP(
+        hostname=hostname,
+        port=smtpd_server_port,
+        happy_eyeballs_delay=happy_eyeballs_delay,
+        receive_buffer_size=4096,
+    )
+
+    async with client:
+        pass
+
+    assert buffer_sizes
+    assert all(size == expected_size for size in buffer_sizes)
+
+
+async def test_tcp_nodelay_disabled(hostname, smtpd_server_port):
+    client = SMTP(hostname=hostname, port=smtpd_server_port, tcp_nodelay=False)
+
+    async with client:
+        sock = client.transport.get_extra_info("socket")
+
+        assert not sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        assert not sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+
+
+async def test_socket_options_unix_socket(smtpd_server_socket_path, socket_path):
+    client = SMTP(
+        hostname=None, socket_path=socket_path, keepalive=True, send_buffer_size=32768
+    )
+
+    async with client:
+        sock = client.transport.get_extra_info("socket")
+
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) >= 32768
+
+
 async def test_config_via_connect_kwargs(hostname, smtpd_server_port):
     client = SMTP(
         hostname="",
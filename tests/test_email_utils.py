@@ -113,6 +113,22 @@ def test_flatten_message_removes_bcc_from_message_text():
     assert flat_message == b"\r\n"  # empty message
 
 
+def test_flatten_message_binary_cte_type():
+    attachment = bytes(range(256)) + b"\r\n.\n\r"
+    message = EmailMessage()
+    message["To"] = "bob@example.com"
+    message.set_content("This is a test")
+    message.add_attachment(attachment, maintype="application", subtype="pdf")
+
+    flat_message = flatten_message(message, cte_type="binary")
+
+    assert attachment in flat_message
+    assert b"Content-Transfer-Encoding: binary" in flat_message
+    assert b"Content-Transfer-Encoding: 7bit" in flat_message
+    # The original message should not be modified
+    assert message.get_payload()[1]["Content-Transfer-Encoding"] == "base64"
+
+
 def test_flatten_resent_message():
     message = EmailMessage()
     message["To"] = "bob@example.com"
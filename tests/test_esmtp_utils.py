@@ -2,7 +2,7 @@
 Tests for ESMTP extension parsing.
 """
 
-from aiosmtplib.esmtp import parse_esmtp_extensions
+from aiosmtplib.esmtp import option_parts, parse_esmtp_extensions
 
 
 def test_basic_extension_parsing():
@@ -71,3 +71,11 @@ AUTH CRAM-MD5
 
     assert "plain" in auth_types
     assert "cram-md5" in auth_types
+
+
+def test_option_parts():
+    parts = option_parts(("SIZE=100", "BODY=8BITMIME"))
+
+    assert b"".join(parts) == b" SIZE=100 BODY=8BITMIME"
+    assert option_parts(("SIZE=100", "BODY=8BITMIME")) is parts
+    assert option_parts(()) == ()
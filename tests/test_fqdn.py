@@ -0,0 +1,113 @@
+"""
+FQDN lookup tests.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from aiosmtplib import SMTP
+from aiosmtplib.fqdn import FQDNCache, fqdn_cache
+
+
+pytestmark = pytest.mark.asyncio()
+
+
+@pytest.fixture(scope="function")
+def lookups(request, monkeypatch):
+    """
+    Replace socket.getfqdn, recording the thread of each call.
+    """
+    threads = []
+
+    def getfqdn():
+        threads.append(threading.current_thread())
+        return "client{}.example.com".format(len(threads))
+
+    monkeypatch.setattr("aiosmtplib.fqdn.socket.getfqdn", getfqdn)
+    monkeypatch.setattr("aiosmtplib.connection.socket.getfqdn", getfqdn)
+
+    fqdn_cache.clear()
+    request.addfinalizer(fqdn_cache.clear)
+
+    return threads
+
+
+async def test_lookup_in_executor(lookups):
+    cache = FQDNCache()
+
+    assert cache.is_stale
+    assert await cache.get() == "client1.example.com"
+    assert not cache.is_stale
+    assert lookups[0] is not threading.current_thread()
+
+
+async def test_concurrent_lookups_coalesced(lookups):
+    cache = FQDNCache()
+
+    results = await asyncio.gather(*(cache.get() for _ in range(5)))
+
+    assert results == ["client1.example.com"] * 5
+    assert len(lookups) == 1
+
+
+async def test_stale_value_refreshed_in_background(lookups):
+    cache = FQDNCache(refresh_interval=0.0)
+    cache.set("old.example.com")
+
+    assert await cache.get() == "old.example.com"
+
+    await cache.refresh()
+
+    assert cache.value == "client1.example.com"
+    assert len(lookups) == 1
+
+
+async def test_failed_refresh_keeps_value(monkeypatch):
+    def getfqdn():
+        raise OSError("Lookup failed")
+
+    monkeypatch.setattr("aiosmtplib.fqdn.socket.getfqdn", getfqdn)
+    cache = FQDNCache(refresh_interval=0.0)
+    cache.set("old.example.com")
+
+    with pytest.raises(OSError):
+        await cache.refresh()
+
+    assert cache.value == "old.example.com"
+
+
+async def test_ehlo_uses_cached_fqdn(
+    hostname, smtpd_server_port, lookups, received_commands
+):
+    for _ in range(2):
+        client = SMTP(hostname=hostname, port=smtpd_server_port)
+        async with client:
+            await client.ehlo()
+
+    ehlo_hostnames = [
+        command[1] for command in received_commands if command[0] == "EHLO"
+    ]
+    assert ehlo_hostnames == ["client1.example.com"] * 2
+    assert len(lookups) == 1
+    assert lookups[0] is not threading.current_thread()
+
+
+async def test_source_address_property_uses_cache(hostname, lookups):
+    fqdn_cache.set("cached.example.com")
+    client = SMTP(hostname=hostname)
+
+    assert client.source_address == "cached.example.com"
+    assert not lookups
+
+
+async def test_explicit_source_address_skips_lookup(
+    hostname, smtpd_server_port, lookups
+):
+    client = SMTP(
+        hostname=hostname, port=smtpd_server_port, source_address="example.com"
+    )
+    async with client:
+        await client.ehlo()
+
+    assert not lookups
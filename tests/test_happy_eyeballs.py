@@ -0,0 +1,133 @@
+"""
+Happy Eyeballs (RFC 8305) connection tests.
+"""
+import asyncio
+import socket
+
+import pytest
+
+from aiosmtplib import SMTP, SMTPConnectError
+from aiosmtplib.happy_eyeballs import connect_socket, interleave_addresses
+
+
+pytestmark = pytest.mark.asyncio()
+
+
+BLACKHOLE_ADDRESS = "192.0.2.1"
+
+
+def address_info(host, port, family=socket.AF_INET):
+    return (family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (host, port))
+
+
+@pytest.fixture(scope="function")
+def connect_attempts(request, monkeypatch):
+    """
+    Record connection attempts, and never connect to ``BLACKHOLE_ADDRESS``.
+    """
+    attempts = []
+
+    async def mock_connect_socket(loop, info, socket_options=()):
+        address = info[4][0]
+        attempts.append(address)
+        if address == BLACKHOLE_ADDRESS:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                attempts.append("cancelled")
+                raise
+
+        return await connect_socket(loop, info, socket_options)
+
+    monkeypatch.setattr("aiosmtplib.happy_eyeballs.connect_socket", mock_connect_socket)
+
+    return attempts
+
+
+@pytest.fixture(scope="function")
+def resolve_to(request, event_loop, monkeypatch):
+    def set_addresses(*infos):
+        async def getaddrinfo(host, port, **kwargs):
+            return list(infos)
+
+        monkeypatch.setattr(event_loop, "getaddrinfo", getaddrinfo)
+
+    return set_addresses
+
+
+async def test_interleave_addresses():
+    infos = [
+        address_info("::1", 25, family=socket.AF_INET6),
+        address_info("::2", 25, family=socket.AF_INET6),
+        address_info("::3", 25, family=socket.AF_INET6),
+        address_info("127.0.0.1", 25),
+        address_info("127.0.0.2", 25),
+    ]
+
+    addresses = [info[4][0] for info in interleave_addresses(infos)]
+
+    assert addresses == ["::1", "127.0.0.1", "::2", "127.0.0.2", "::3"]
+
+
+async def test_blackholed_address_skipped(
+    bind_address, smtpd_server_port, resolve_to, connect_attempts
+):
+    resolve_to(
+        address_info(BLACKHOLE_ADDRESS, smtpd_server_port),
+        address_info(bind_address, smtpd_server_port),
+    )
+    client = SMTP(
+        hostname="mail.example.com",
+        port=smtpd_server_port,
+        timeout=1.0,
+        happy_eyeballs_delay=0.05,
+    )
+
+    async with client:
+        response = await client.noop()
+        await asyncio.sleep(0)
+
+    assert response.code == 250
+    assert connect_attempts == [BLACKHOLE_ADDRESS, bind_address, "cancelled"]
+
+
+async def test_failed_attempt_starts_next_immediately(
+    bind_address, smtpd_server_port, unused_tcp_port, resolve_to, connect_attempts
+):
+    resolve_to(
+        address_info(bind_address, unused_tcp_port),
+        address_info(bind_address, smtpd_server_port),
+    )
+    client = SMTP(
+        hostname="mail.example.com",
+        port=smtpd_server_port,
+        timeout=1.0,
+        happy_eyeballs_delay=10.0,
+    )
+
+    async with client:
+        response = await client.noop()
+
+    assert response.code == 250
+    assert len(connect_attempts) == 2
+
+
+async def test_all_attempts_failed(
+    bind_address, unused_tcp_port_factory, resolve_to, connect_attempts
+):
+    resolve_to(
+        address_info(bind_address, unused_tcp_port_factory()),
+        address_info(bind_address, unused_tcp_port_factory()),
+    )
+    client = SMTP(hostname="mail.example.com", port=25, timeout=1.0)
+
+    with pytest.raises(SMTPConnectError):
+        await client.connect()
+
+    assert len(connect_attempts) == 2
+    assert not client.is_connected
+
+
+async def test_invalid_happy_eyeballs_delay():
+    with pytest.raises(ValueError):
+        SMTP(happy_eyeballs_delay=-1.0)
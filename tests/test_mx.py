@@ -0,0 +1,296 @@
+"""
+Direct to MX delivery tests.
+"""
+import socket
+from collections import namedtuple
+
+import pytest
+
+from aiosmtplib import SMTPException, SMTPRecipientRefused
+from aiosmtplib.mx import (
+    AiodnsMXResolver,
+    MXDelivery,
+    MXRecord,
+    StubMXResolver,
+    order_mx_hosts,
+)
+from aiosmtplib.resolver import StubResolver
+
+
+pytestmark = pytest.mark.asyncio()
+
+
+@pytest.fixture(scope="function")
+def mx_resolver(request):
+    return StubMXResolver(
+        {
+            "example.com": [(10, "mx.example.net.")],
+            "example.org": [(10, "mx.example.net.")],
+            "backup.example.com": [(10, "down.example.net"), (20, "mx.example.net")],
+            "retry.example.com": [(10, "mx.example.net"), (20, "mx2.example.net")],
+            "implicit.example.net": [],
+            "null.example.com": [(0, ".")],
+            "nulls.example.com": [(10, "."), (20, ".")],
+        }
+    )
+
+
+@pytest.fixture(scope="function")
+def delivery(request, event_loop, mx_resolver, bind_address, smtpd_server_port):
+    # down.example.net is left out, so connecting to it fails
+    resolver = StubResolver(
+        {
+            "mx.example.net": [bind_address],
+            "mx2.example.net": [bind_address],
+            "implicit.example.net": [bind_address],
+        }
+    )
+    delivery = MXDelivery(
+        mx_resolver, port=smtpd_server_port, resolver=resolver, timeout=1.0
+    )
+    yield delivery
+
+    event_loop.run_until_complete(delivery.close())
+
+
+async def test_order_mx_hosts_by_preference():
+    records = [
+        MXRecord(20, "b.example.net."),
+        MXRecord(10, "A.example.net."),
+        MXRecord(30, "c.example.net"),
+    ]
+
+    hosts = order_mx_hosts("example.com", records)
+
+    assert hosts == ["a.example.net", "b.example.net", "c.example.net"]
+
+
+async def test_order_mx_hosts_shuffles_equal_preference():
+    records = [MXRecord(10, "a.example.net"), MXRecord(10, "b.example.net")]
+
+    orders = {tuple(order_mx_hosts("example.com", records)) for _ in range(100)}
+
+    assert orders == {
+        ("a.example.net", "b.example.net"),
+        ("b.example.net", "a.example.net"),
+    }
+
+
+async def test_order_mx_hosts_implicit_mx():
+    assert order_mx_hosts("example.com", []) == ["example.com"]
+
+
+async def test_order_mx_hosts_null_mx():
+    with pytest.raises(SMTPException):
+        order_mx_hosts("example.com", [MXRecord(0, ".")])
+
+
+async def test_order_mx_hosts_skips_null_targets():
+    records = [MXRecord(10, "."), MXRecord(20, "mx.example.net.")]
+
+    assert order_mx_hosts("example.com", records) == ["mx.example.net"]
+
+
+async def test_order_mx_hosts_only_null_targets():
+    with pytest.raises(SMTPException):
+        order_mx_hosts("example.com", [MXRecord(10, "."), MXRecord(20, ".")])
+
+
+async def test_stub_mx_resolver(mx_resolver):
+    records = await mx_resolver.resolve_mx("Example.COM")
+
+    assert records == [MXRecord(10, "mx.example.net.")]
+    assert mx_resolver.lookups == ["Example.COM"]
+
+    with pytest.raises(socket.gaierror):
+        await mx_resolver.resolve_mx("missing.example.com")
+
+
+async def test_aiodns_mx_resolver(monkeypatch):
+    aiodns = pytest.importorskip("aiodns")
+    MXAnswer = namedtuple("MXAnswer", ["host", "priority"])
+    queries = []
+
+    async def query(self, host, qtype):
+        queries.append((host, qtype))
+        return [MXAnswer("mx1.example.net", 10), MXAnswer("mx2.example.net", 20)]
+
+    monkeypatch.setattr(aiodns.DNSResolver, "query", query)
+    mx_resolver = AiodnsMXResolver()
+
+    records = await mx_resolver.resolve_mx("example.com")
+
+    assert records == [MXRecord(10, "mx1.example.net"), MXRecord(20, "mx2.example.net")]
+    assert queries == [("example.com", "MX")]
+
+
+@pytest.mark.parametrize(
+    "error_code,expected", [("ARES_ENODATA", []), ("ARES_ENOTFOUND", socket.gaierror)]
+)
+async def test_aiodns_mx_resolver_errors(monkeypatch, error_code, expected):
+    aiodns = pytest.importorskip("aiodns")
+
+    async def query(self, host, qtype):
+        raise aiodns.error.DNSError(getattr(aiodns.error, error_code), "DNS error")
+
+    monkeypatch.setattr(aiodns.DNSResolver, "query", query)
+    mx_resolver = AiodnsMXResolver()
+
+    if expected is socket.gaierror:
+        with pytest.raises(socket.gaierror):
+            await mx_resolver.resolve_mx("example.com")
+    else:
+        assert await mx_resolver.resolve_mx("example.com") == expected
+
+
+async def test_delivery_groups_recipients_by_domain(
+    delivery, mx_resolver, sender_str, message_str, received_commands
+):
+    recipients = ["a@example.com", "b@example.org", "c@EXAMPLE.com"]
+
+    delivered, failed = await delivery.send(message_str, sender_str, recipients)
+
+    assert sorted(delivered) == sorted(recipients)
+    assert failed == {}
+    assert sorted(mx_resolver.lookups) == ["example.com", "example.org"]
+
+    commands = [command[0] for command in received_commands]
+    assert commands.count("MAIL") == 2
+    assert commands.count("RCPT") == 3
+
+
+async def test_delivery_reuses_session_per_mx_host(
+    delivery, sender_str, message_str, received_commands
+):
+    await delivery.send(message_str, sender_str, ["a@example.com", "b@example.org"])
+    await delivery.send(message_str, sender_str, ["c@example.com"])
+
+    commands = [command[0] for command in received_commands]
+    assert commands.count("EHLO") == 1
+    assert commands.count("DATA") == 3
+
+
+async def test_delivery_message_object(delivery, message, received_messages):
+    del message["To"]
+    message["To"] = "recipient@example.com"
+
+    delivered, failed = await delivery.send(message)
+
+    assert list(delivered) == ["recipient@example.com"]
+    assert failed == {}
+    assert len(received_messages) == 1
+
+
+async def test_delivery_falls_back_to_next_mx(delivery, sender_str, message_str):
+    delivered, failed = await delivery.send(
+        message_str, sender_str, ["recipient@backup.example.com"]
+    )
+
+    assert list(delivered) == ["recipient@backup.example.com"]
+    assert failed == {}
+
+
+async def test_delivery_implicit_mx(delivery, sender_str, message_str):
+    delivered, failed = await delivery.send(
+        message_str, sender_str, ["recipient@implicit.example.net"]
+    )
+
+    assert list(delivered) == ["recipient@implicit.example.net"]
+
+
+async def test_delivery_failures(delivery, sender_str, message_str):
+    recipients = [
+        "good@example.com",
+        "missing@missing.example.com",
+        "null@null.example.com",
+        "null@nulls.example.com",
+        "nodomain",
+    ]
+
+    delivered, failed = await delivery.send(message_str, sender_str, recipients)
+
+    assert list(delivered) == ["good@example.com"]
+    assert isinstance(failed["missing@missing.example.com"], socket.gaierror)
+    assert isinstance(failed["null@null.example.com"], SMTPException)
+    assert isinstance(failed["null@nulls.example.com"], SMTPException)
+    assert isinstance(failed["nodomain"], ValueError)
+
+
+async def test_delivery_recipient_refused(
+    delivery,
+    sender_str,
+    message_str,
+    smtpd_class,
+    smtpd_response_handler_factory,
+    monkeypatch,
+):
+    response_handler = smtpd_response_handler_factory("550 No such user")
+    monkeypatch.setattr(smtpd_class, "smtp_RCPT", response_handler)
+
+    delivered, failed = await delivery.send(
+        message_str, sender_str, ["missing@example.com"]
+    )
+
+    assert delivered == {}
+    error = failed["missing@example.com"]
+    assert isinstance(error, SMTPRecipientRefused)
+    assert error.code == 550
+
+
+async def test_delivery_transient_refusal_tries_next_mx(
+    delivery, sender_str, message_str, smtpd_class, monkeypatch, received_commands
+):
+    original_rcpt = smtpd_class.smtp_RCPT
+    refusals = []
+
+    async def refuse_once(smtpd, arg):
+        if not refusals:
+            refusals.append(arg)
+            await smtpd.push("450 Mailbox busy")
+        else:
+            await original_rcpt(smtpd, arg)
+
+    monkeypatch.setattr(smtpd_class, "smtp_RCPT", refuse_once)
+
+    delivered, failed = await delivery.send(
+        message_str, sender_str, ["recipient@retry.example.com"]
+    )
+
+    assert list(delivered) == ["recipient@retry.example.com"]
+    assert failed == {}
+    assert [command[0] for command in received_commands].count("EHLO") == 2
+
+
+async def test_delivery_transient_refusal_on_every_mx(
+    delivery, sender_str, message_str, smtpd_class, monkeypatch
+):
+    refusals = []
+
+    async def refuse(smtpd, arg):
+        refusals.append(arg)
+        await smtpd.push("450 Mailbox busy")
+
+    monkeypatch.setattr(smtpd_class, "smtp_RCPT", refuse)
+
+    delivered, failed = await delivery.send(
+        message_str, sender_str, ["recipient@retry.example.com"]
+    )
+
+    assert delivered == {}
+    error = failed["recipient@retry.example.com"]
+    assert isinstance(error, SMTPRecipientRefused)
+    assert error.code == 450
+    assert len(refusals) == 2
+
+
+async def test_delivery_requires_sender_and_recipients(delivery, message_str):
+    with pytest.raises(ValueError):
+        await delivery.send(message_str, recipients=["a@example.com"])
+
+    with pytest.raises(ValueError):
+        await delivery.send(message_str, sender="a@example.com")
+
+
+async def test_delivery_rejects_connection_target(mx_resolver):
+    with pytest.raises(ValueError):
+        MXDelivery(mx_resolver, hostname="smtp.example.com")
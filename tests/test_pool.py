@@ -0,0 +1,448 @@
+"""
+Connection pool tests.
+"""
+import asyncio
+import socket
+
+import pytest
+
+from aiosmtplib import (
+    SMTPConnectionPool,
+    SMTPConnectTimeoutError,
+    SMTPResponseException,
+    SMTPStatus,
+)
+
+
+pytestmark = pytest.mark.asyncio()
+
+
+@pytest.fixture(scope="function")
+def pool_kwargs(request, hostname, smtpd_server_port):
+    return {"hostname": hostname, "port": smtpd_server_port, "timeout": 1.0}
+
+
+def command_names(received_commands):
+    return [command[0] for command in received_commands]
+
+
+async def test_connection_reused(
+    smtpd_server,
+    pool_kwargs,
+    sender_str,
+    recipient_str,
+    message_str,
+    received_messages,
+    received_commands,
+):
+    async with SMTPConnectionPool() as pool:
+        async with pool.connection(**pool_kwargs) as client:
+            await client.sendmail(sender_str, [recipient_str], message_str)
+        async with pool.connection(**pool_kwargs) as second_client:
+            await second_client.sendmail(sender_str, [recipient_str], message_str)
+
+    assert second_client is client
+    assert len(received_messages) == 2
+    commands = command_names(received_commands)
+    assert commands.count("EHLO") == 1
+    assert commands.count("NOOP") == 1
+    assert "RSET" not in commands
+    assert not client.is_connected
+
+
+async def test_health_check_disabled(smtpd_server, pool_kwargs, received_commands):
+    async with SMTPConnectionPool(health_check=False) as pool:
+        async with pool.connection(**pool_kwargs):
+            pass
+        async with pool.connection(**pool_kwargs):
+            pass
+
+    assert "NOOP" not in command_names(received_commands)
+
+
+async def test_different_options_not_shared(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool() as pool:
+        async with pool.connection(**pool_kwargs) as client:
+            pass
+        async with pool.connection(source_address="other", **pool_kwargs) as other:
+            pass
+
+    assert other is not client
+
+
+async def test_disconnected_connection_replaced(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(health_check=False) as pool:
+        async with pool.connection(**pool_kwargs) as client:
+            pass
+
+        client.close()
+
+        async with pool.connection(**pool_kwargs) as second_client:
+            response = await second_client.noop()
+
+    assert second_client is not client
+    assert response.code == SMTPStatus.completed
+
+
+async def test_failed_health_check_replaced(
+    smtpd_server, smtpd_class, smtpd_response_handler_factory, monkeypatch, pool_kwargs,
+):
+    response_handler = smtpd_response_handler_factory(
+        "{} closing".format(SMTPStatus.domain_unavailable), close_after=True
+    )
+
+    async with SMTPConnectionPool() as pool:
+        async with pool.connection(**pool_kwargs) as client:
+            pass
+
+        monkeypatch.setattr(smtpd_class, "smtp_NOOP", response_handler)
+
+        second_client = await pool.acquire(**pool_kwargs)
+        monkeypatch.undo()
+        await pool.release(second_client)
+
+    assert second_client is not client
+
+
+async def test_max_size_waits_for_release(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(max_size=1) as pool:
+        client = await pool.acquire(**pool_kwargs)
+        waiting = asyncio.ensure_future(pool.acquire(**pool_kwargs))
+
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+
+        await pool.release(client)
+        second_client = await asyncio.wait_for(waiting, 1.0)
+        await pool.release(second_client)
+
+    assert second_client is client
+
+
+async def test_max_size_discard_wakes_waiter(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(max_size=1) as pool:
+        client = await pool.acquire(**pool_kwargs)
+        waiting = asyncio.ensure_future(pool.acquire(**pool_kwargs))
+
+        await asyncio.sleep(0.05)
+        await pool.release(client, discard=True)
+        second_client = await asyncio.wait_for(waiting, 1.0)
+        await pool.release(second_client)
+
+    assert not client.is_connected
+    assert second_client is not client
+
+
+async def test_cancelled_waiter_passes_on_release(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(max_size=1) as pool:
+        client = await pool.acquire(**pool_kwargs)
+        cancelled = asyncio.ensure_future(pool.acquire(**pool_kwargs))
+        waiting = asyncio.ensure_future(pool.acquire(**pool_kwargs))
+        await asyncio.sleep(0.05)
+
+        await pool.release(client)
+        cancelled.cancel()
+
+        second_client = await asyncio.wait_for(waiting, 1.0)
+        await pool.release(second_client)
+
+    assert cancelled.cancelled()
+    assert second_client is client
+
+
+async def test_deadline_waiting_for_connection(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(max_size=1) as pool:
+        client = await pool.acquire(**pool_kwargs)
+
+        with pytest.raises(SMTPConnectTimeoutError):
+            await pool.acquire(deadline=0.05, **pool_kwargs)
+
+        await pool.release(client)
+        async with pool.connection(deadline=1.0, **pool_kwargs) as second_client:
+            assert second_client._deadline is not None
+
+    assert second_client is client
+    assert second_client._deadline is None
+
+
+async def test_smtp_error_resets_connection(
+    smtpd_server, pool_kwargs, sender_str, received_commands
+):
+    async with SMTPConnectionPool() as pool:
+        with pytest.raises(SMTPResponseException):
+            async with pool.connection(**pool_kwargs) as client:
+                await client.mail(sender_str)
+                raise SMTPResponseException(SMTPStatus.mailbox_unavailable, "Nope")
+
+        async with pool.connection(**pool_kwargs) as second_client:
+            pass
+
+    assert second_client is client
+    assert "RSET" in command_names(received_commands)
+
+
+async def test_other_error_discards_connection(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool() as pool:
+        with pytest.raises(ZeroDivisionError):
+            async with pool.connection(**pool_kwargs) as client:
+                1 / 0
+
+        assert not client.is_connected
+
+        async with pool.connection(**pool_kwargs) as second_client:
+            pass
+
+    assert second_client is not client
+
+
+@pytest.mark.parametrize("error", [ConnectionResetError, asyncio.CancelledError])
+async def test_reset_error_discards_connection(
+    smtpd_server, pool_kwargs, monkeypatch, error
+):
+    async with SMTPConnectionPool(max_size=1) as pool:
+        with pytest.raises(error):
+            async with pool.connection(**pool_kwargs) as client:
+
+                async def rset(*args, **kwargs):
+                    raise error()
+
+                monkeypatch.setattr(client, "rset", rset)
+                raise SMTPResponseException(SMTPStatus.mailbox_unavailable, "Nope")
+
+        assert not client.is_connected
+
+        # The slot was freed
+        async with pool.connection(deadline=1.0, **pool_kwargs) as second_client:
+            pass
+
+    assert second_client is not client
+
+
+async def test_idle_connections_expire(smtpd_server, pool_kwargs, received_commands):
+    async with SMTPConnectionPool(max_idle_time=0.05) as pool:
+        async with pool.connection(**pool_kwargs) as client:
+            pass
+
+        await asyncio.sleep(0.2)
+
+        assert not client.is_connected
+        assert "QUIT" in command_names(received_commands)
+
+
+async def test_min_idle_connections_kept_alive(
+    smtpd_server, pool_kwargs, received_commands
+):
+    async with SMTPConnectionPool(max_idle_time=0.05, min_idle=1) as pool:
+        async with pool.connection(**pool_kwargs) as first_client:
+            async with pool.connection(**pool_kwargs) as second_client:
+                pass
+
+        await asyncio.sleep(0.2)
+
+        # The most recently used connection is kept
+        assert first_client.is_connected
+        assert not second_client.is_connected
+        assert "NOOP" in command_names(received_commands)
+
+
+async def test_reap_idle_connections_out_of_order(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(max_idle_time=0.1) as pool:
+        clients = [await pool.acquire(**pool_kwargs) for _ in range(3)]
+        for client in clients:
+            await pool.release(client)
+
+        # Expired and fresh connections interleaved
+        fresh = asyncio.get_event_loop().time() + 60.0
+        (host_pool,) = pool._host_pools.values()
+        host_pool.idle = [(clients[0], fresh), (clients[1], 0.0), (clients[2], fresh)]
+
+        await asyncio.sleep(0.2)
+
+        assert [client for client, _ in host_pool.idle] == [clients[0], clients[2]]
+        assert host_pool.size == 2
+        assert clients[0].is_connected
+        assert not clients[1].is_connected
+        assert clients[2].is_connected
+
+
+async def test_reaper_cancelled_while_quitting(smtpd_server, pool_kwargs, monkeypatch):
+    async def slow_quit(client):
+        await asyncio.sleep(10.0)
+
+    pool = SMTPConnectionPool(max_idle_time=0.1, min_idle=1)
+    clients = [await pool.acquire(**pool_kwargs) for _ in range(3)]
+    for client in clients:
+        await pool.release(client)
+
+    (host_pool,) = pool._host_pools.values()
+    host_pool.idle = [(client, 0.0) for client in clients]
+    for client in clients:
+        monkeypatch.setattr(client, "quit", slow_quit.__get__(client))
+
+    await asyncio.sleep(0.1)
+    await pool.close()
+
+    assert host_pool.size == 0
+    assert host_pool.idle == []
+    assert not any(client.is_connected for client in clients)
+
+
+async def test_close_quits_idle_connections(
+    smtpd_server, pool_kwargs, received_commands
+):
+    pool = SMTPConnectionPool()
+    client = await pool.acquire(**pool_kwargs)
+    in_use_client = await pool.acquire(**pool_kwargs)
+    await pool.release(client)
+
+    await pool.close()
+
+    assert pool.is_closed
+    assert not client.is_connected
+    assert in_use_client.is_connected
+
+    await pool.release(in_use_client)
+
+    assert not in_use_client.is_connected
+    assert command_names(received_commands).count("QUIT") == 2
+
+    with pytest.raises(RuntimeError):
+        await pool.acquire(**pool_kwargs)
+
+
+async def test_close_wakes_waiters(smtpd_server, pool_kwargs):
+    pool = SMTPConnectionPool(max_size=1)
+    client = await pool.acquire(**pool_kwargs)
+    waiting = asyncio.ensure_future(pool.acquire(**pool_kwargs))
+    await asyncio.sleep(0.05)
+
+    await pool.close()
+
+    with pytest.raises(RuntimeError):
+        await waiting
+
+    await pool.release(client)
+
+
+async def test_connect_error_frees_slot(hostname, unused_tcp_port):
+    async with SMTPConnectionPool(max_size=1) as pool:
+        for _ in range(2):
+            with pytest.raises(OSError):
+                await pool.acquire(hostname=hostname, port=unused_tcp_port)
+
+
+async def wait_for_idle(pool, count):
+    for _ in range(100):
+        if sum(len(host_pool.idle) for host_pool in pool._host_pools.values()) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+    raise AssertionError("Pool was not refilled")
+
+
+async def test_warm_up_negotiates_connections(
+    smtpd_server, pool_kwargs, received_commands
+):
+    async with SMTPConnectionPool(prewarm=2) as pool:
+        await pool.warm_up(**pool_kwargs)
+
+        commands = command_names(received_commands)
+        assert commands.count("EHLO") == 2
+
+        async with pool.connection(**pool_kwargs) as client:
+            assert client.is_connected
+            assert client.last_ehlo_response is not None
+
+        # No new connections were needed
+        assert command_names(received_commands).count("EHLO") == 2
+
+
+async def test_prewarm_refills_on_checkout(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(prewarm=1) as pool:
+        await pool.warm_up(**pool_kwargs)
+        client = await pool.acquire(**pool_kwargs)
+
+        await wait_for_idle(pool, 1)
+
+        await pool.release(client)
+
+
+async def test_prewarm_after_first_connection(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(prewarm=2) as pool:
+        async with pool.connection(**pool_kwargs):
+            await wait_for_idle(pool, 2)
+
+
+async def test_prewarm_within_max_size(smtpd_server, pool_kwargs):
+    async with SMTPConnectionPool(max_size=2, prewarm=2) as pool:
+        first_client = await pool.acquire(**pool_kwargs)
+        second_client = await pool.acquire(**pool_kwargs)
+        await asyncio.sleep(0.05)
+
+        host_pool = next(iter(pool._host_pools.values()))
+        assert host_pool.size == 2
+        assert not host_pool.idle
+
+        await pool.release(first_client)
+        await pool.release(second_client)
+
+
+async def test_prewarm_connect_error(hostname, unused_tcp_port):
+    async with SMTPConnectionPool(prewarm=1) as pool:
+        with pytest.raises(OSError):
+            await pool.warm_up(hostname=hostname, port=unused_tcp_port)
+
+        host_pool = next(iter(pool._host_pools.values()))
+        assert host_pool.size == 0
+        assert host_pool.warming == 0
+
+
+async def test_close_stops_refill(smtpd_server, pool_kwargs):
+    pool = SMTPConnectionPool(prewarm=2)
+    client = await pool.acquire(**pool_kwargs)
+
+    await pool.close()
+    await pool.release(client)
+
+    host_pool = next(iter(pool._host_pools.values()))
+    assert not host_pool.idle
+    assert host_pool.size == 0
+
+    with pytest.raises(RuntimeError):
+        await pool.warm_up(**pool_kwargs)
+
+
+async def test_release_unknown_client(smtp_client):
+    async with SMTPConnectionPool() as pool:
+        with pytest.raises(ValueError):
+            await pool.release(smtp_client)
+
+
+async def test_socket_not_pooled(hostname):
+    async with SMTPConnectionPool() as pool:
+        with pytest.raises(ValueError):
+            await pool.acquire(sock=socket.socket())
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        {"max_size": 0},
+        {"min_idle": -1},
+        {"max_size": 1, "min_idle": 2},
+        {"max_idle_time": 0},
+        {"prewarm": -1},
+        {"max_size": 1, "prewarm": 2},
+    ),
+    ids=[
+        "max_size",
+        "negative_min_idle",
+        "min_idle_over_max_size",
+        "idle_time",
+        "negative_prewarm",
+        "prewarm_over_max_size",
+    ],
+)
+async def test_invalid_pool_options(kwargs):
+    with pytest.raises(ValueError):
+        SMTPConnectionPool(**kwargs)
@@ -7,7 +7,7 @@ import socket
 import pytest
 
 from aiosmtplib import SMTPResponseException, SMTPServerDisconnected
-from aiosmtplib.protocol import SMTPProtocol
+from aiosmtplib.protocol import DataEncoder, SMTPProtocol, command_parts, quote_data
 
 
 pytestmark = pytest.mark.asyncio()
@@ -108,13 +108,48 @@ async def test_error_on_readline_with_partial_line(event_loop, bind_address, hos
     await server.wait_closed()
 
 
-async def test_protocol_response_waiter_unset(
-    event_loop, bind_address, hostname, monkeypatch
+async def test_protocol_multiple_responses_in_one_read(
+    event_loop, bind_address, hostname
 ):
     async def client_connected(reader, writer):
         await reader.read(1000)
+        writer.write(b"250 one\r\n250-two\r\n250 two again\r\n251 three\r\n")
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1]
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+
+    _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    response1 = await protocol.execute_command(b"TEST", timeout=1.0)
+    # All responses should be parsed when the data is received
+    assert len(protocol._responses) == 2
+    assert protocol._buffer_start == protocol._buffer_end
+
+    response2 = await protocol.read_response(timeout=1.0)
+    response3 = await protocol.read_response(timeout=1.0)
+
+    assert response1 == (250, "one")
+    assert response2 == (250, "two\ntwo again")
+    assert response3 == (251, "three")
+
+    server.close()
+    await server.wait_closed()
+
+
+async def test_protocol_read_response_after_disconnect(
+    event_loop, bind_address, hostname
+):
+    async def client_connected(reader, writer):
         writer.write(b"220 Hi\r\n")
         await writer.drain()
+        writer.close()
 
     server = await asyncio.start_server(
         client_connected, host=bind_address, port=0, family=socket.AF_INET
@@ -127,10 +162,12 @@ async def test_protocol_response_waiter_unset(
 
     _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
 
-    monkeypatch.setattr(protocol, "_response_waiter", None)
+    # Responses received before the disconnect can still be read
+    response = await protocol.read_response(timeout=1.0)
+    assert response.code == 220
 
     with pytest.raises(SMTPServerDisconnected):
-        await protocol.execute_command(b"TEST\n", timeout=1.0)
+        await protocol.read_response(timeout=1.0)
 
     server.close()
     await server.wait_closed()
@@ -183,3 +220,330 @@ async def test_protocol_eof_response(event_loop, bind_address, hostname, monkeyp
 
     server.close()
     await server.wait_closed()
+
+
+@pytest.mark.parametrize(
+    "data,expected",
+    (
+        (b"", b""),
+        (b".", b".."),
+        (b"Hello\r\n.World\r\n", b"Hello\r\n..World\r\n"),
+        (b"Hello\n.World\r", b"Hello\r\n..World\r\n"),
+        (b"\r\r\n\n.\r.\n.x", b"\r\n\r\n\r\n..\r\n..\r\n..x"),
+    ),
+    ids=("empty", "period", "crlf", "mixed", "lone_cr_and_lf"),
+)
+async def test_quote_data(data, expected):
+    assert quote_data(data) == expected
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [
+        ((), b"\r\n"),
+        ((b"NOOP",), b"NOOP\r\n"),
+        (
+            (b"MAIL", b"FROM:<a@example.com>", b"SIZE=10"),
+            b"MAIL FROM:<a@example.com> SIZE=10\r\n",
+        ),
+    ],
+    ids=["empty", "verb", "args"],
+)
+async def test_command_parts(args, expected):
+    assert b"".join(command_parts(*args)) == expected
+
+
+async def test_quote_data_prenormalized_skips_line_endings():
+    assert quote_data(b".a\nb\r\n.c", prenormalized=True) == b"..a\nb\r\n..c"
+
+
+@pytest.mark.parametrize("split_size", (1, 2, 3, 7))
+@pytest.mark.parametrize(
+    "message",
+    (
+        b".",
+        b"\r\n.\r\n",
+        b"Subject: Hi\r\n\r\n.Hello\rWorld\n..\r",
+        b"\r\r\n\n.\r.\n.x",
+    ),
+)
+async def test_data_encoder_matches_quote_data(message, split_size):
+    encoder = DataEncoder()
+
+    encoded = b"".join(
+        encoder.encode(message[i : i + split_size])
+        for i in range(0, len(message), split_size)
+    )
+    encoded += encoder.flush()
+
+    assert encoded == quote_data(message)
+
+
+async def test_protocol_response_split_across_reads(event_loop):
+    protocol = SMTPProtocol(loop=event_loop)
+    lines = [b"250-" + b"x" * 4000 + b"\r\n"] * 9 + [b"250 done\r\n"]
+    data = b"".join(lines) + b"221 bye\r\n"
+
+    # Larger than the initial receive buffer, so it will need to grow
+    for offset in range(0, len(data), 1000):
+        protocol.data_received(data[offset : offset + 1000])
+
+    response1 = await protocol.read_response(timeout=1.0)
+    response2 = await protocol.read_response(timeout=1.0)
+
+    assert response1.code == 250
+    assert response1.message == "\n".join(["x" * 4000] * 9 + ["done"])
+    assert response2 == (221, "bye")
+    assert protocol._buffer_start == protocol._buffer_end == 0
+
+
+async def test_protocol_partial_line_too_long(event_loop, monkeypatch):
+    monkeypatch.setattr("aiosmtplib.protocol.MAX_LINE_LENGTH", 128)
+    protocol = SMTPProtocol(loop=event_loop)
+
+    # No line ending yet, but already too long
+    protocol.data_received(b"250 " + b"x" * 200)
+
+    with pytest.raises(SMTPResponseException) as exc_info:
+        await protocol.read_response(timeout=1.0)
+
+    assert exc_info.value.code == 500
+    assert "Response too long" in exc_info.value.message
+
+
+async def test_protocol_multiline_response_parsed_incrementally(event_loop):
+    protocol = SMTPProtocol(loop=event_loop)
+
+    protocol.data_received(b"250-first\r\n250-sec")
+    assert protocol._response_lines == [b"first"]
+    assert protocol._scan_offset == protocol._buffer_end
+
+    protocol.data_received(b"ond\r\n250 third\r\n")
+    response = await protocol.read_response(timeout=1.0)
+
+    assert response == (250, "first\nsecond\nthird")
+    assert protocol._response_lines == []
+
+
+@pytest.mark.parametrize(
+    "response,error_message",
+    (
+        (b"250-" + b"x" * 100 + b"\r\n" + b"250-" + b"x" * 100, "bytes"),
+        (b"250-x\r\n" * 5, "lines"),
+    ),
+    ids=("size", "lines"),
+)
+async def test_protocol_response_limits(event_loop, response, error_message):
+    protocol = SMTPProtocol(
+        loop=event_loop, max_response_size=200, max_response_lines=4
+    )
+
+    protocol.data_received(response)
+
+    with pytest.raises(SMTPResponseException) as exc_info:
+        await protocol.read_response(timeout=1.0)
+
+    assert exc_info.value.code == 500
+    assert error_message in exc_info.value.message
+    assert protocol._response_lines == []
+
+
+async def test_protocol_response_limits_close_connection(
+    event_loop, bind_address, hostname
+):
+    async def client_connected(reader, writer):
+        await reader.read(1000)
+        writer.write(b"250-garbage\r\n" * 10)
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1]
+
+    connect_future = event_loop.create_connection(
+        lambda: SMTPProtocol(max_response_lines=5), host=hostname, port=server_port
+    )
+
+    _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    with pytest.raises(SMTPResponseException):
+        await protocol.execute_command(b"TEST", timeout=1.0)
+
+    await asyncio.sleep(0)
+    assert not protocol.is_connected
+
+    server.close()
+    await server.wait_closed()
+
+
+async def test_protocol_data_written_in_slices_with_backpressure(
+    event_loop, echo_server, hostname, echo_server_port, monkeypatch
+):
+    monkeypatch.setattr("aiosmtplib.protocol.WRITE_SLICE_SIZE", 1024)
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=echo_server_port
+    )
+    transport, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    writes = []
+    original_write = protocol.write
+
+    def record_write(data):
+        writes.append(bytes(data))
+        original_write(data)
+
+    monkeypatch.setattr(protocol, "write", record_write)
+
+    # Simulate the transport buffer going over the high water mark
+    protocol.pause_writing()
+    write_task = event_loop.create_task(protocol._write_data(b"x" * 4000))
+    await asyncio.sleep(0.01)
+
+    assert not write_task.done()
+    assert len(writes) == 1
+
+    protocol.resume_writing()
+    await asyncio.wait_for(write_task, timeout=1.0)
+    transport.close()
+
+    assert [len(data) for data in writes] == [1024, 1024, 1024, 928, 5]
+    assert b"".join(writes) == b"x" * 4000 + b"\r\n.\r\n"
+
+
+async def test_protocol_response_enhanced_status_code(event_loop):
+    protocol = SMTPProtocol(loop=event_loop)
+    protocol.data_received(b"451-4.7.0 Try again\r\n451 4.7.0 later\r\n")
+
+    response = await protocol.read_response(timeout=1.0)
+
+    assert response.raw == b"4.7.0 Try again\n4.7.0 later"
+    assert response.enhanced_status_code == (4, 7, 0)
+    assert response == (451, "4.7.0 Try again\n4.7.0 later")
+
+
+async def test_protocol_response_cache(event_loop):
+    protocol = SMTPProtocol(loop=event_loop)
+    protocol.data_received(
+        b"250 2.1.5 Ok\r\n250 2.1.5 Ok\r\n250-multi\r\n250 line\r\n250 2.1.5 Ok\r\n"
+    )
+
+    response1 = await protocol.read_response(timeout=1.0)
+    response2 = await protocol.read_response(timeout=1.0)
+    multiline_response = await protocol.read_response(timeout=1.0)
+    response3 = await protocol.read_response(timeout=1.0)
+
+    assert response1 == (250, "2.1.5 Ok")
+    assert response1 is response2 is response3
+    assert multiline_response == (250, "multi\nline")
+    assert protocol.response_cache_hits == 2
+    assert protocol.response_cache_misses == 1
+
+
+async def test_protocol_cached_response_cannot_be_changed(event_loop):
+    protocol = SMTPProtocol(loop=event_loop)
+    protocol.data_received(b"250 2.1.5 Ok\r\n250 2.1.5 Ok\r\n")
+
+    response1 = await protocol.read_response(timeout=1.0)
+    with pytest.raises(AttributeError):
+        response1.code = 550
+    response2 = await protocol.read_response(timeout=1.0)
+
+    assert response2 is response1
+    assert response2 == (250, "2.1.5 Ok")
+
+
+async def test_protocol_response_cache_bounded(event_loop, monkeypatch):
+    monkeypatch.setattr("aiosmtplib.protocol.RESPONSE_CACHE_SIZE", 2)
+    monkeypatch.setattr("aiosmtplib.protocol.RESPONSE_CACHE_MAX_LINE_LENGTH", 16)
+    protocol = SMTPProtocol(loop=event_loop)
+    protocol.data_received(
+        b"250 one\r\n250 two\r\n250 one\r\n250 three\r\n250 " + b"x" * 16 + b"\r\n"
+    )
+    for _ in range(5):
+        await protocol.read_response(timeout=1.0)
+
+    # "two" was least recently used; the long line isn't cached
+    assert list(protocol._response_cache) == [b"250 one\r\n", b"250 three\r\n"]
+    assert protocol.response_cache_hits == 1
+    assert protocol.response_cache_misses == 3
+
+
+async def test_protocol_pipelined_data_all_recipients_refused(
+    event_loop, bind_address, hostname
+):
+    received = []
+
+    async def client_connected(reader, writer):
+        received.append(await reader.readuntil(b"DATA\r\n"))
+        writer.write(b"250 ok\r\n550 no\r\n550 no\r\n354 go ahead\r\n")
+        await writer.drain()
+        received.append(await reader.readuntil(b".\r\n"))
+        writer.write(b"554 no valid recipients\r\n")
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1]
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+    transport, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    commands = [
+        command_parts(b"MAIL", b"FROM:<a@example.com>"),
+        command_parts(b"RCPT", b"TO:<b@example.com>"),
+        command_parts(b"RCPT", b"TO:<c@example.com>"),
+    ]
+    responses, response = await protocol.execute_pipelined_data_command(
+        commands, b"Hello World\r\n", timeout=1.0
+    )
+
+    assert [resp.code for resp in responses] == [250, 550, 550]
+    assert response.code == 554
+    # Only the end of data marker is sent, not the message
+    assert received[1] == b".\r\n"
+
+    transport.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_protocol_bdat_stream_chunks(event_loop):
+    class RecordingTransport(asyncio.Transport):
+        def __init__(self):
+            super().__init__()
+            self.writes = []
+
+        def write(self, data):
+            self.writes.append(bytes(data))
+
+        def is_closing(self):
+            return False
+
+    async def reused_buffer_chunks():
+        # Sources may reuse a buffer between chunks
+        buffer = bytearray(b"abcdef")
+        yield buffer
+        buffer[:] = b"ghijklmnopq"
+        yield buffer
+
+    transport = RecordingTransport()
+    protocol = SMTPProtocol(loop=event_loop)
+    protocol.connection_made(transport)
+    protocol.data_received(b"220 Hello\r\n")
+    await protocol.read_response(timeout=1.0)
+
+    bdat_task = event_loop.create_task(
+        protocol.execute_bdat_command(reused_buffer_chunks(), 4, timeout=1.0)
+    )
+    await asyncio.sleep(0.01)
+    protocol.data_received(b"250 Ok\r\n" * 5)
+    response = await asyncio.wait_for(bdat_task, timeout=1.0)
+
+    assert response.code == 250
+    assert b"".join(transport.writes) == (
+        b"BDAT 4\r\nabcdBDAT 4\r\nefghBDAT 4\r\nijklBDAT 4\r\nmnop" b"BDAT 1 LAST\r\nq"
+    )
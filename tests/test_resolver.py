@@ -0,0 +1,201 @@
+"""
+Resolver tests.
+"""
+import asyncio
+import socket
+
+import pytest
+
+from aiosmtplib import SMTP, SMTPConnectError
+from aiosmtplib.resolver import (
+    CachingResolver,
+    GetaddrinfoResolver,
+    Resolution,
+    Resolver,
+    StubResolver,
+)
+
+
+pytestmark = pytest.mark.asyncio()
+
+
+class SlowResolver(Resolver):
+    def __init__(self, delay):
+        self.delay = delay
+        self.lookups = 0
+
+    async def resolve(self, host):
+        self.lookups += 1
+        await asyncio.sleep(self.delay)
+
+        return Resolution(("127.0.0.1",), None)
+
+
+async def test_stub_resolver():
+    resolver = StubResolver({"Mail.example.com": ["127.0.0.1", "::1"]}, ttl=30.0)
+
+    resolution = await resolver.resolve("mail.EXAMPLE.com")
+
+    assert resolution == (("127.0.0.1", "::1"), 30.0)
+    assert resolver.lookups == ["mail.EXAMPLE.com"]
+
+    with pytest.raises(socket.gaierror):
+        await resolver.resolve("unknown.example.com")
+
+
+async def test_getaddrinfo_resolver(bind_address):
+    resolution = await GetaddrinfoResolver().resolve(bind_address)
+
+    assert resolution.addresses == (bind_address,)
+    assert resolution.ttl is None
+
+
+async def test_caching_resolver_caches_results():
+    stub = StubResolver({"mail.example.com": ["127.0.0.1"]})
+    resolver = CachingResolver(stub, default_ttl=60.0)
+
+    first = await resolver.resolve("mail.example.com")
+    second = await resolver.resolve("MAIL.example.com")
+
+    assert first.addresses == second.addresses == ("127.0.0.1",)
+    assert 0 < second.ttl <= 60.0
+    assert len(stub.lookups) == 1
+    assert (resolver.hits, resolver.misses) == (1, 1)
+
+
+async def test_caching_resolver_honors_ttl():
+    stub = StubResolver({"mail.example.com": ["127.0.0.1"]}, ttl=0.01)
+    resolver = CachingResolver(stub, default_ttl=60.0)
+
+    await resolver.resolve("mail.example.com")
+    await asyncio.sleep(0.05)
+    await resolver.resolve("mail.example.com")
+
+    assert len(stub.lookups) == 2
+
+
+@pytest.mark.parametrize(
+    "ttl,min_ttl,max_ttl,expected_ttl",
+    ((None, 0.0, None, 60.0), (1.0, 5.0, None, 5.0), (600.0, 0.0, 300.0, 300.0)),
+    ids=["default", "min_ttl", "max_ttl"],
+)
+async def test_caching_resolver_ttl_limits(ttl, min_ttl, max_ttl, expected_ttl):
+    stub = StubResolver({"mail.example.com": ["127.0.0.1"]}, ttl=ttl)
+    resolver = CachingResolver(stub, min_ttl=min_ttl, max_ttl=max_ttl)
+
+    resolution = await resolver.resolve("mail.example.com")
+
+    assert resolution.ttl == expected_ttl
+
+
+async def test_caching_resolver_zero_ttl_not_cached():
+    stub = StubResolver({"mail.example.com": ["127.0.0.1"]}, ttl=0.0)
+    resolver = CachingResolver(stub)
+
+    await resolver.resolve("mail.example.com")
+    await resolver.resolve("mail.example.com")
+
+    assert len(stub.lookups) == 2
+
+
+async def test_caching_resolver_coalesces_lookups():
+    slow_resolver = SlowResolver(0.05)
+    resolver = CachingResolver(slow_resolver)
+
+    results = await asyncio.gather(
+        *(resolver.resolve("mail.example.com") for _ in range(5))
+    )
+
+    assert all(result.addresses == ("127.0.0.1",) for result in results)
+    assert slow_resolver.lookups == 1
+
+
+async def test_caching_resolver_cancelled_waiter():
+    slow_resolver = SlowResolver(0.05)
+    resolver = CachingResolver(slow_resolver)
+
+    cancelled = asyncio.ensure_future(resolver.resolve("mail.example.com"))
+    waiting = asyncio.ensure_future(resolver.resolve("mail.example.com"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    result = await waiting
+
+    assert result.addresses == ("127.0.0.1",)
+    assert slow_resolver.lookups == 1
+
+
+async def test_caching_resolver_errors_not_cached():
+    stub = StubResolver({})
+    resolver = CachingResolver(stub)
+
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            await resolver.resolve("mail.example.com")
+
+    assert len(stub.lookups) == 2
+
+
+async def test_caching_resolver_static_addresses():
+    stub = StubResolver({})
+    resolver = CachingResolver(stub, static={"mail.example.com": ["127.0.0.1"]})
+    resolver.preload("other.example.com", ["::1"])
+
+    assert (await resolver.resolve("mail.example.com")).addresses == ("127.0.0.1",)
+    assert (await resolver.resolve("other.example.com")).addresses == ("::1",)
+    assert not stub.lookups
+
+
+async def test_caching_resolver_max_size():
+    stub = StubResolver({"a.example.com": ["127.0.0.1"], "b.example.com": ["::1"]})
+    resolver = CachingResolver(stub, max_size=1)
+
+    await resolver.resolve("a.example.com")
+    await resolver.resolve("b.example.com")
+    await resolver.resolve("a.example.com")
+
+    assert stub.lookups == ["a.example.com", "b.example.com", "a.example.com"]
+
+
+async def test_connect_with_resolver(bind_address, smtpd_server_port):
+    resolver = StubResolver({"mail.example.com": [bind_address]})
+
+    for delay in (0.25, None):
+        client = SMTP(
+            hostname="mail.example.com",
+            port=smtpd_server_port,
+            timeout=1.0,
+            resolver=resolver,
+            happy_eyeballs_delay=delay,
+        )
+        async with client:
+            response = await client.noop()
+
+        assert response.code == 250
+
+    assert resolver.lookups == ["mail.example.com"] * 2
+
+
+async def test_connect_with_resolver_ip_address(bind_address, smtpd_server_port):
+    resolver = StubResolver({})
+    client = SMTP(
+        hostname=bind_address, port=smtpd_server_port, timeout=1.0, resolver=resolver
+    )
+
+    async with client:
+        response = await client.noop()
+
+    assert response.code == 250
+    assert not resolver.lookups
+
+
+async def test_connect_with_resolver_error(smtpd_server_port):
+    client = SMTP(
+        hostname="mail.example.com",
+        port=smtpd_server_port,
+        timeout=1.0,
+        resolver=StubResolver({}),
+    )
+
+    with pytest.raises(SMTPConnectError):
+        await client.connect()
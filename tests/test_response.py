@@ -1,7 +1,10 @@
+import pickle
+
+import pytest
 from hypothesis import given
 from hypothesis.strategies import integers, text
 
-from aiosmtplib.response import SMTPResponse
+from aiosmtplib.response import EnhancedStatusCode, SMTPResponse
 
 
 @given(integers(), text())
@@ -14,3 +17,91 @@ def test_response_repr(code, message):
 def test_response_str(code, message):
     response = SMTPResponse(code, message)
     assert str(response) == "{} {}".format(response.code, response.message)
+
+
+@given(integers(), text())
+def test_response_tuple_compatible(code, message):
+    response = SMTPResponse(code, message)
+    response_code, response_message = response
+
+    assert (response_code, response_message) == (code, message)
+    assert response == (code, message)
+    assert (code, message) == response
+    assert response[1] == response[-1] == message
+    assert len(response) == 2
+    assert hash(response) == hash((code, message))
+
+
+@given(integers(), text())
+def test_response_pickle(code, message):
+    response = SMTPResponse(code, message)
+
+    assert pickle.loads(pickle.dumps(response)) == response
+
+
+def test_response_decoded_from_raw():
+    response = SMTPResponse(250, raw=b"2.1.5 Ok \xff")
+
+    assert response.message == "2.1.5 Ok \udcff"
+    assert response.raw == b"2.1.5 Ok \xff"
+    assert response == SMTPResponse(250, "2.1.5 Ok \udcff")
+
+
+def test_response_namedtuple_api():
+    response = SMTPResponse(250, raw=b"2.1.5 Ok")
+
+    assert isinstance(response, tuple)
+    assert response._asdict() == {"code": 250, "message": "2.1.5 Ok"}
+    assert response._replace(code=550) == (550, "2.1.5 Ok")
+    assert response + (1,) == (250, "2.1.5 Ok", 1)
+    assert response < SMTPResponse(550, "Nope")
+
+
+@pytest.mark.parametrize("attribute", ["code", "message", "raw", "other"])
+def test_response_immutable(attribute):
+    response = SMTPResponse(250, raw=b"2.1.5 Ok")
+
+    with pytest.raises(AttributeError):
+        setattr(response, attribute, 550)
+    with pytest.raises(AttributeError):
+        delattr(response, attribute)
+
+    assert response == (250, "2.1.5 Ok")
+    assert response.raw == b"2.1.5 Ok"
+
+
+def test_response_has_no_instance_dict():
+    response = SMTPResponse(250, raw=b"2.1.5 Ok")
+
+    assert not hasattr(response, "__dict__")
+    assert response.enhanced_status_code == (2, 1, 5)
+
+
+def test_response_requires_message_or_raw():
+    with pytest.raises(ValueError):
+        SMTPResponse(250)
+
+
+@pytest.mark.parametrize(
+    "code,message,expected",
+    [
+        (250, "2.1.5 Ok", EnhancedStatusCode(2, 1, 5)),
+        (451, "4.7.0 Try again later", EnhancedStatusCode(4, 7, 0)),
+        (550, "5.1.1", EnhancedStatusCode(5, 1, 1)),
+        (550, "5.100.999 Unknown", EnhancedStatusCode(5, 100, 999)),
+        (250, "4.7.0 Class mismatch", None),
+        (250, "2.1 Incomplete", None),
+        (250, "2.1.5000 Too long", None),
+        (250, "2.1.5Ok", None),
+        (250, "OK", None),
+        (250, "", None),
+    ],
+)
+def test_response_enhanced_status_code(code, message, expected):
+    response = SMTPResponse(code, message)
+
+    assert response.enhanced_status_code == expected
+
+
+def test_enhanced_status_code_str():
+    assert str(EnhancedStatusCode(4, 7, 0)) == "4.7.0"
@@ -2,8 +2,11 @@
 SMTP.sendmail and SMTP.send_message method testing.
 """
 import copy
+import io
 import email.generator
 import email.header
+import email.mime.application
+import threading
 
 import pytest
 
@@ -11,6 +14,7 @@ from aiosmtplib import (
     SMTPNotSupported,
     SMTPRecipientsRefused,
     SMTPResponseException,
+    SMTPSenderRefused,
     SMTPStatus,
 )
 
@@ -422,3 +426,455 @@ async def test_send_mime_message_utf8_text_without_smtputf8(
         "recipient@example.com",
         "=?utf-8?b?cmXDp2lww6/DqW50IDxyZWNpcGllbnQyQGV4YW1wbGUuY29tPg==?=",
     ]
+
+
+@pytest.fixture(scope="function")
+def smtpd_extensions(smtpd_handler, monkeypatch):
+    """
+    Returns a function that makes the test server advertise the ESMTP
+    extensions given in its EHLO response.
+    """
+
+    def advertise(*extensions):
+        ehlo_response = "".join("250-{}\r\n".format(ext) for ext in extensions)
+
+        async def handle_EHLO(server, session, envelope, hostname):
+            session.host_name = hostname
+            return ehlo_response + "250 HELP"
+
+        monkeypatch.setattr(smtpd_handler, "handle_EHLO", handle_EHLO)
+
+    return advertise
+
+
+async def test_sendmail_pipelined(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    sender_str,
+    message_str,
+    received_commands,
+    received_messages,
+):
+    smtpd_extensions("PIPELINING")
+    recipients = ["recipient1@example.com", "recipient2@example.com"]
+
+    async with smtp_client:
+        await smtp_client.ehlo()
+        assert smtp_client.supports_extension("pipelining")
+
+        writes = []
+        original_write = smtp_client.protocol.write
+        original_writelines = smtp_client.protocol.writelines
+
+        def record_write(data):
+            writes.append(data)
+            original_write(data)
+
+        def record_writelines(parts):
+            parts = list(parts)
+            writes.append(b"".join(parts))
+            original_writelines(parts)
+
+        smtp_client.protocol.write = record_write
+        smtp_client.protocol.writelines = record_writelines
+
+        errors, response = await smtp_client.sendmail(
+            sender_str, recipients, message_str
+        )
+
+        # One batch for the envelope and DATA, then the message content and
+        # end of data marker
+        assert len(writes) == 3
+
+    assert not errors
+    assert response != ""
+    assert writes[0].count(b"\r\n") == 4
+    assert [command[0] for command in received_commands[-5:-1]] == [
+        "MAIL",
+        "RCPT",
+        "RCPT",
+        "DATA",
+    ]
+    assert len(received_messages) == 1
+    assert received_messages[0]["X-RcptTo"] == ", ".join(recipients)
+
+
+async def test_sendmail_pipelined_recipient_refused(
+    smtp_client, smtpd_server, smtpd_extensions, sender_str, message_str
+):
+    smtpd_extensions("PIPELINING")
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, ["recipient@example.com", ">not an addr<"], message_str
+        )
+
+    assert response != ""
+    assert list(errors.keys()) == [">not an addr<"]
+    assert errors[">not an addr<"].code == SMTPStatus.unrecognized_parameters
+
+
+async def test_sendmail_pipelined_all_recipients_refused(
+    smtp_client, smtpd_server, smtpd_extensions, sender_str, received_commands
+):
+    smtpd_extensions("PIPELINING")
+    async with smtp_client:
+        with pytest.raises(SMTPRecipientsRefused) as excinfo:
+            await smtp_client.sendmail(sender_str, [">not an addr<"], "Hello World")
+
+        assert excinfo.value.recipients[0].code == SMTPStatus.unrecognized_parameters
+        assert received_commands[-1][0] == "RSET"
+
+
+async def test_sendmail_pipelined_sender_refused(
+    smtp_client, smtpd_server, smtpd_extensions, recipient_str, received_commands
+):
+    smtpd_extensions("PIPELINING")
+    async with smtp_client:
+        with pytest.raises(SMTPSenderRefused) as excinfo:
+            await smtp_client.sendmail(">foobar<", [recipient_str], "Hello World")
+
+        assert excinfo.value.code == SMTPStatus.unrecognized_parameters
+        assert received_commands[-1][0] == "RSET"
+
+
+async def test_sendmail_chunked(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    sender_str,
+    recipient_str,
+    received_commands,
+    received_messages,
+):
+    smtpd_extensions("CHUNKING")
+    message = "Subject: Hello\n\n.A line beginning with a period\n" + "x" * 200
+
+    await smtp_client.connect(chunk_size=1024)
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], message, timeout=1.0
+        )
+
+    assert not errors
+    assert response == "OK"
+    assert ("BDAT", "{} LAST".format(len(message) + 3)) in received_commands
+    assert "DATA" not in [command[0] for command in received_commands]
+    assert len(received_messages) == 1
+    assert received_messages[0].get_payload() == (
+        ".A line beginning with a period\r\n" + "x" * 200
+    )
+
+
+async def test_sendmail_chunked_multiple_chunks(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    sender_str,
+    recipient_str,
+    message_str,
+    received_commands,
+    received_messages,
+):
+    smtpd_extensions("PIPELINING", "CHUNKING")
+    await smtp_client.connect(chunk_size=100)
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], message_str
+        )
+
+    assert not errors
+    assert response == "OK"
+
+    bdat_args = [command[1] for command in received_commands if command[0] == "BDAT"]
+    assert len(bdat_args) > 1
+    assert all(arg == "100" for arg in bdat_args[:-1])
+    assert bdat_args[-1].endswith(" LAST")
+    assert len(received_messages) == 1
+
+
+async def test_sendmail_chunking_not_used_by_default(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    sender_str,
+    recipient_str,
+    message_str,
+    received_commands,
+):
+    smtpd_extensions("CHUNKING")
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], message_str
+        )
+
+    assert not errors
+    assert "DATA" in [command[0] for command in received_commands]
+    assert "BDAT" not in [command[0] for command in received_commands]
+
+
+async def test_sendmail_chunked_all_recipients_refused(
+    smtp_client, smtpd_server, smtpd_extensions, sender_str, received_commands,
+):
+    smtpd_extensions("PIPELINING", "CHUNKING")
+    await smtp_client.connect(chunk_size=1024)
+    async with smtp_client:
+        with pytest.raises(SMTPRecipientsRefused):
+            await smtp_client.sendmail(sender_str, [">not an addr<"], "Hello World")
+
+        assert "BDAT" not in [command[0] for command in received_commands]
+        assert received_commands[-1][0] == "RSET"
+
+
+async def test_send_message_binarymime(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    mime_message,
+    received_commands,
+    received_messages,
+):
+    smtpd_extensions("CHUNKING", "BINARYMIME", "8BITMIME")
+    attachment = bytes(range(256)) * 4 + b"\r\n.\r\n\n\r"
+    mime_message.attach(email.mime.application.MIMEApplication(attachment))
+
+    await smtp_client.connect(chunk_size=1024)
+    async with smtp_client:
+        errors, response = await smtp_client.send_message(mime_message)
+
+        assert not errors
+        mail_command = [
+            command for command in received_commands if command[0] == "MAIL"
+        ]
+        assert "BODY=BINARYMIME" in mail_command[0][2]
+        assert "DATA" not in [command[0] for command in received_commands]
+
+    assert len(received_messages) == 1
+    assert b"Content-Transfer-Encoding: binary" in received_messages[0].as_bytes()
+
+
+async def test_send_message_binarymime_attachment_not_encoded(
+    smtp_client, smtpd_server, smtpd_extensions, mime_message, monkeypatch
+):
+    smtpd_extensions("CHUNKING", "BINARYMIME", "8BITMIME")
+    attachment = bytes(range(256)) * 4 + b"\r\n.\r\n\n\r"
+    mime_message.attach(email.mime.application.MIMEApplication(attachment))
+    sent_messages = []
+    original_bdat = smtp_client.bdat
+
+    async def bdat(message, *args, **kwargs):
+        sent_messages.append(message)
+        return await original_bdat(message, *args, **kwargs)
+
+    monkeypatch.setattr(smtp_client, "bdat", bdat)
+
+    await smtp_client.connect(chunk_size=1024)
+    async with smtp_client:
+        await smtp_client.send_message(mime_message)
+
+    assert len(sent_messages) == 1
+    assert attachment in sent_messages[0]
+
+
+async def test_send_message_binarymime_not_used_by_default(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    mime_message,
+    received_commands,
+    received_messages,
+):
+    smtpd_extensions("CHUNKING", "BINARYMIME", "8BITMIME")
+    attachment = bytes(range(256)) * 4
+    mime_message.attach(email.mime.application.MIMEApplication(attachment))
+
+    async with smtp_client:
+        await smtp_client.send_message(mime_message)
+
+        mail_command = [
+            command for command in received_commands if command[0] == "MAIL"
+        ]
+        assert "BODY=8BITMIME" in mail_command[0][2]
+        assert "BDAT" not in [command[0] for command in received_commands]
+
+    assert len(received_messages) == 1
+    assert b"Content-Transfer-Encoding: base64" in received_messages[0].as_bytes()
+
+
+async def test_sendmail_binarymime_without_chunking_raises(
+    smtp_client, smtpd_server, sender_str, recipient_str, message_str
+):
+    async with smtp_client:
+        with pytest.raises(SMTPNotSupported):
+            await smtp_client.sendmail(
+                sender_str,
+                [recipient_str],
+                message_str,
+                mail_options=["BODY=BINARYMIME"],
+            )
+
+
+class AsyncChunks:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+async def test_sendmail_file_object(
+    smtp_client,
+    smtpd_server,
+    sender_str,
+    recipient_str,
+    message_str,
+    received_commands,
+    received_messages,
+):
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], io.BytesIO(message_str.encode("ascii"))
+        )
+
+        assert not errors
+        assert "DATA" in [command[0] for command in received_commands]
+
+    assert len(received_messages) == 1
+    assert received_messages[0]["X-Peer"]
+
+
+async def test_sendmail_path(
+    smtp_client,
+    smtpd_server,
+    sender_str,
+    recipient_str,
+    message_str,
+    received_commands,
+    received_messages,
+    tmp_path,
+):
+    message_path = tmp_path / "message.eml"
+    message_path.write_bytes(message_str.encode("ascii"))
+
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], message_path
+        )
+
+        assert not errors
+        mail_command = [
+            command for command in received_commands if command[0] == "MAIL"
+        ]
+        assert "SIZE={}".format(len(message_str)) in mail_command[0][2]
+
+    assert len(received_messages) == 1
+
+
+async def test_sendmail_path_opened_in_executor(
+    smtp_client,
+    smtpd_server,
+    sender_str,
+    recipient_str,
+    message_str,
+    received_messages,
+    tmp_path,
+    monkeypatch,
+):
+    message_path = tmp_path / "message.eml"
+    message_path.write_bytes(message_str.encode("ascii"))
+    open_threads = []
+
+    def recording_open(*args, **kwargs):
+        open_threads.append(threading.get_ident())
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr("aiosmtplib.streams.open", recording_open, raising=False)
+
+    async with smtp_client:
+        await smtp_client.sendmail(sender_str, [recipient_str], message_path)
+
+    assert len(open_threads) == 1
+    assert open_threads[0] != threading.get_ident()
+    assert len(received_messages) == 1
+
+
+@pytest.mark.parametrize(
+    "chunks,expected_payload",
+    (
+        ((b"Subject: Hi\r", b"\n\r\n.Hello\r", b"\n", b".World"), ".Hello\r\n.World"),
+        ((b"Subject: Hi\n\n", b".", b"Hello\n", b".", b".World"), ".Hello\r\n..World"),
+        (("Subject: Hi\n\n", "Hello\r", "World"), "Hello\r\nWorld"),
+    ),
+    ids=("split_crlf", "split_period", "str_chunks"),
+)
+async def test_sendmail_async_iterable(
+    smtp_client,
+    smtpd_server,
+    sender_str,
+    recipient_str,
+    received_messages,
+    chunks,
+    expected_payload,
+):
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], AsyncChunks(chunks)
+        )
+
+        assert not errors
+
+    assert len(received_messages) == 1
+    assert received_messages[0].get_payload() == expected_payload
+
+
+async def test_sendmail_async_iterable_chunked(
+    smtp_client,
+    smtpd_server,
+    smtpd_extensions,
+    sender_str,
+    recipient_str,
+    received_commands,
+    received_messages,
+):
+    smtpd_extensions("CHUNKING")
+    chunks = [b"Subject: Hi\n\n"] + [b"x" * 30 + b"\r", b"\n"] * 10
+
+    await smtp_client.connect(chunk_size=100)
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], AsyncChunks(chunks)
+        )
+
+        assert not errors
+        bdat_args = [
+            command[1] for command in received_commands if command[0] == "BDAT"
+        ]
+        assert bdat_args == ["100", "100", "100", "35 LAST"]
+
+    assert len(received_messages) == 1
+    assert (
+        received_messages[0].get_payload()
+        == "x" * 30 + "\r\n" + ("x" * 30 + "\r\n") * 9
+    )
+
+
+async def test_sendmail_prenormalized(
+    smtp_client, smtpd_server, sender_str, recipient_str, received_messages
+):
+    message = b"Subject: Hi\r\n\r\n.Hello\r\nWorld\r\n"
+
+    async with smtp_client:
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str], message, prenormalized=True
+        )
+
+        assert not errors
+
+    assert len(received_messages) == 1
+    assert received_messages[0].get_payload() == ".Hello\r\nWorld"
@@ -2,12 +2,14 @@
 Timeout tests.
 """
 import asyncio
+import datetime
 import socket
 
 import pytest
 
 from aiosmtplib import (
     SMTP,
+    send,
     SMTPConnectTimeoutError,
     SMTPServerDisconnected,
     SMTPStatus,
@@ -37,6 +39,15 @@ def delayed_read_response_handler(request):
     return delayed_read_response
 
 
+@pytest.fixture(scope="session")
+def slow_ok_response_handler(request):
+    async def slow_ok_response(smtpd, *args, **kwargs):
+        await asyncio.sleep(0.3)
+        await smtpd.push("{} all done".format(SMTPStatus.completed))
+
+    return slow_ok_response
+
+
 async def test_command_timeout_error(
     smtp_client, smtpd_server, smtpd_class, delayed_ok_response_handler, monkeypatch
 ):
@@ -112,6 +123,41 @@ async def test_protocol_read_response_with_timeout_times_out(
     assert str(exc.value) == "Timed out waiting for server response"
 
 
+async def test_protocol_read_response_timeout_handle_cancelled(
+    event_loop, echo_server, hostname, echo_server_port, monkeypatch
+):
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=echo_server_port
+    )
+    transport, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    handles = []
+    original_call_at = event_loop.call_at
+
+    def call_at(*args, **kwargs):
+        handle = original_call_at(*args, **kwargs)
+        handles.append(handle)
+        return handle
+
+    monkeypatch.setattr(event_loop, "call_at", call_at)
+
+    # Already received; no timer needed
+    protocol.data_received(b"250 ok\r\n")
+    response = await protocol.read_response(timeout=1.0)
+
+    assert response.code == SMTPStatus.completed
+    assert handles == []
+
+    # Echoed back by the server
+    protocol.write(b"250 ok\r\n")
+    response = await protocol.read_response(timeout=1.0)
+    transport.close()
+
+    assert response.code == SMTPStatus.completed
+    assert len(handles) == 1
+    assert handles[0].cancelled()
+
+
 async def test_connect_timeout_error(hostname, unused_tcp_port):
     client = SMTP(hostname=hostname, port=unused_tcp_port, timeout=0.0)
 
@@ -159,3 +205,136 @@ async def test_protocol_timeout_on_starttls(
 
     server.close()
     await server.wait_closed()
+
+
+@pytest.mark.parametrize("limit", ["timeout", "deadline"])
+async def test_protocol_data_write_times_out_when_server_stops_reading(
+    event_loop, bind_address, hostname, limit
+):
+    async def client_connected(reader, writer):
+        await reader.readuntil(b"DATA\r\n")
+        writer.write(b"354 go ahead\r\n")
+        await writer.drain()
+        # Stop reading, so that the client's write buffer fills up
+        await asyncio.sleep(2.0)
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1]
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+    transport, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    if limit == "timeout":
+        timeout = 0.5
+    else:
+        timeout = None
+        protocol.deadline = event_loop.time() + 0.5
+    start = event_loop.time()
+
+    with pytest.raises(SMTPTimeoutError):
+        await protocol.execute_data_command(b"x" * 32 * 1024 * 1024, timeout=timeout)
+
+    assert event_loop.time() - start < 1.5
+
+    transport.close()
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.parametrize(
+    "deadline", [0.5, datetime.datetime.now], ids=["relative", "absolute"],
+)
+async def test_sendmail_deadline_shared_by_commands(
+    smtp_client,
+    smtpd_server,
+    smtpd_class,
+    slow_ok_response_handler,
+    monkeypatch,
+    event_loop,
+    deadline,
+):
+    monkeypatch.setattr(smtpd_class, "smtp_RCPT", slow_ok_response_handler)
+    if callable(deadline):
+        deadline = deadline() + datetime.timedelta(seconds=0.5)
+    recipients = ["recipient{}@example.com".format(i) for i in range(5)]
+
+    await smtp_client.connect()
+    start = event_loop.time()
+
+    # Each RCPT is within the 1 second timeout, but not all of them together
+    with pytest.raises(SMTPTimeoutError):
+        await smtp_client.sendmail(
+            "sender@example.com", recipients, "Hello", deadline=deadline
+        )
+
+    assert event_loop.time() - start < 0.9
+    assert smtp_client._deadline is None
+
+
+async def test_sendmail_deadline_not_exceeded(
+    smtp_client, smtpd_server, received_messages
+):
+    async with smtp_client:
+        await smtp_client.sendmail(
+            "sender@example.com", ["recipient@example.com"], "Hello", deadline=1.0
+        )
+
+        assert smtp_client.protocol.deadline is None
+
+    assert len(received_messages) == 1
+
+
+async def test_concurrent_sendmail_deadlines_not_shared(
+    smtp_client, smtpd_server, smtpd_class, monkeypatch, event_loop, received_messages,
+):
+    original_rcpt = smtpd_class.smtp_RCPT
+
+    async def slow_rcpt(smtpd, arg):
+        await asyncio.sleep(0.3)
+        await original_rcpt(smtpd, arg)
+
+    monkeypatch.setattr(smtpd_class, "smtp_RCPT", slow_rcpt)
+    recipients = ["recipient1@example.com", "recipient2@example.com"]
+
+    async with smtp_client:
+        # The second send's deadline counts from when it's called, so time
+        # spent waiting for the first send to finish counts against it. It
+        # times out, without cutting the first send (which has no deadline)
+        # short.
+        first_send = event_loop.create_task(
+            smtp_client.sendmail("sender@example.com", recipients, "Hello")
+        )
+        second_send = event_loop.create_task(
+            smtp_client.sendmail(
+                "sender@example.com", recipients, "Hello", deadline=0.2
+            )
+        )
+
+        errors, response = await first_send
+        with pytest.raises(SMTPTimeoutError):
+            await second_send
+
+    assert not errors
+    assert response == "OK"
+    assert len(received_messages) == 1
+
+
+async def test_send_deadline_includes_connect(
+    hostname, smtpd_server_port, smtpd_class, delayed_ok_response_handler, monkeypatch
+):
+    monkeypatch.setattr(smtpd_class, "_handle_client", delayed_ok_response_handler)
+
+    with pytest.raises(SMTPConnectTimeoutError):
+        await send(
+            "Hello",
+            sender="sender@example.com",
+            recipients=["recipient@example.com"],
+            hostname=hostname,
+            port=smtpd_server_port,
+            timeout=5.0,
+            deadline=0.1,
+        )
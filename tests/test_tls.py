@@ -2,6 +2,8 @@
 TLS and STARTTLS handling.
 """
 import copy
+import os
+import shutil
 import ssl
 
 import pytest
@@ -14,6 +16,11 @@ from aiosmtplib import (
     SMTPServerDisconnected,
     SMTPStatus,
 )
+from aiosmtplib.tls import (
+    enable_session_resumption,
+    get_session_cache,
+    get_tls_context,
+)
 
 
 pytestmark = pytest.mark.asyncio()
@@ -270,3 +277,100 @@ async def test_tls_connection_with_cert_error(
         await tls_smtp_client.connect(validate_certs=True)
 
     assert "CERTIFICATE_VERIFY_FAILED" in str(exception_info.value)
+
+
+async def test_tls_context_cached(valid_cert_path, valid_key_path):
+    context = get_tls_context(True, cert_bundle=valid_cert_path)
+
+    assert get_tls_context(True, cert_bundle=valid_cert_path) is context
+    assert get_tls_context(False, cert_bundle=valid_cert_path) is not context
+    assert (
+        get_tls_context(
+            True,
+            cert_bundle=valid_cert_path,
+            client_cert=valid_cert_path,
+            client_key=valid_key_path,
+        )
+        is not context
+    )
+
+
+async def test_tls_context_shared_between_clients(hostname, valid_cert_path):
+    client = SMTP(hostname=hostname, cert_bundle=valid_cert_path)
+    other_client = SMTP(hostname=hostname, cert_bundle=valid_cert_path)
+
+    assert client._get_tls_context() is other_client._get_tls_context()
+
+
+async def test_tls_context_rebuilt_on_file_change(tmp_path, valid_cert_path):
+    cert_path = str(tmp_path / "cert.pem")
+    shutil.copyfile(valid_cert_path, cert_path)
+
+    context = get_tls_context(True, cert_bundle=cert_path)
+    stat = os.stat(cert_path)
+    os.utime(cert_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    assert get_tls_context(True, cert_bundle=cert_path) is not context
+
+
+async def test_tls_context_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        get_tls_context(True, cert_bundle=str(tmp_path / "missing.pem"))
+
+
+@pytest.mark.parametrize("start_tls", (False, True), ids=["use_tls", "start_tls"])
+async def test_tls_session_resumed(
+    hostname, tls_smtpd_server_port, smtpd_server_port, start_tls
+):
+    session_cache = get_session_cache(get_tls_context(False))
+    session_cache.clear()
+    hits, misses = session_cache.hits, session_cache.misses
+    port = smtpd_server_port if start_tls else tls_smtpd_server_port
+
+    reused = []
+    for _ in range(2):
+        client = SMTP(
+            hostname=hostname,
+            port=port,
+            use_tls=not start_tls,
+            start_tls=start_tls,
+            validate_certs=False,
+        )
+        async with client:
+            await client.noop()
+            reused.append(client.tls_session_reused)
+
+    assert reused == [False, True]
+    assert session_cache.hits == hits + 1
+    assert session_cache.misses == misses + 1
+    assert len(session_cache) == 1
+
+
+async def test_tls_session_not_reused_without_tls(smtp_client, smtpd_server):
+    async with smtp_client:
+        assert smtp_client.tls_session_reused is None
+
+
+async def test_tls_session_resumption_for_existing_sslcontext(
+    hostname, tls_smtpd_server_port
+):
+    tls_context = ssl.create_default_context()
+    tls_context.check_hostname = False
+    tls_context.verify_mode = ssl.CERT_NONE
+    assert get_session_cache(tls_context) is None
+
+    session_cache = enable_session_resumption(tls_context)
+    assert enable_session_resumption(tls_context) is session_cache
+
+    for _ in range(2):
+        client = SMTP(
+            hostname=hostname,
+            port=tls_smtpd_server_port,
+            use_tls=True,
+            tls_context=tls_context,
+        )
+        async with client:
+            await client.noop()
+
+    assert session_cache.hits == 1
+    assert session_cache.misses == 1